@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from typing import Any
+
 from core.services.plate_service import PlateAnalysis
-from schemas import RecipeResponse
+from schemas import RecipeResponse, RecipeSummary
 
 SCOPE_TITLE = {
     "top": "🔥 Топ рецептов",
@@ -22,14 +24,31 @@ def format_plate_analysis(analysis: PlateAnalysis) -> str:
     )
 
 
-def format_recipe(recipe: RecipeResponse) -> str:
+def format_nutrition(nutrition: dict[str, Any] | None) -> str:
+    if not nutrition or "calories_kcal" not in nutrition:
+        return ""
+    return (
+        f"🔥 На порцию: {nutrition['calories_kcal']} ккал, "
+        f"Б {nutrition['protein_g']} г, Ж {nutrition['fat_g']} г, У {nutrition['carbs_g']} г\n"
+    )
+
+
+def format_steps(steps: list[str]) -> str:
+    return "\n".join(f"{i}. {step}" for i, step in enumerate(steps, start=1))
+
+
+def format_recipe(recipe: RecipeSummary) -> str:
     ingredients = "\n".join(f"• {item}" for item in recipe.ingredients)
-    steps = "\n".join(f"{i}. {step}" for i, step in enumerate(recipe.steps, start=1))
+    if isinstance(recipe, RecipeResponse):
+        steps = format_steps(recipe.steps)
+    else:
+        steps = "Нажмите «📋 Показать шаги», чтобы получить подробные шаги."
     tips = "\n".join(f"• {tip}" for tip in recipe.tips) if recipe.tips else "• Без советов"
     return (
         f"🍽 {recipe.title}\n\n"
         f"⏱ Время: {recipe.time_minutes} мин\n"
-        f"🍴 Порции: {recipe.servings}\n\n"
+        f"🍴 Порции: {recipe.servings}\n"
+        f"{format_nutrition(recipe.nutrition)}\n"
         "Ингредиенты:\n"
         f"{ingredients}\n\n"
         "Шаги:\n"
@@ -1,3 +1,4 @@
+from bot.handlers.admin import router as admin_router
 from bot.handlers.browse import router as browse_router
 from bot.handlers.ingredients import router as ingredients_router
 from bot.handlers.menu import router as menu_router
@@ -6,6 +7,7 @@ from bot.handlers.settings import router as settings_router
 from bot.handlers.start import router as start_router
 
 __all__ = [
+    "admin_router",
     "browse_router",
     "ingredients_router",
     "ready_dish_router",
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import structlog
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from core.config import settings
+from core.services.ingredient_canonicalizer import canonical_cache_info
+from core.services.lexicon_reload import reload_lexicons
+from core.services.lexicons import LexiconError
+from db.session import pool_info
+from db.user_cache import user_id_cache
+
+router = Router()
+logger = structlog.get_logger(__name__)
+
+
+@router.message(Command("reload_lexicons"))
+async def reload_lexicons_handler(message: Message) -> None:
+    user_id = message.from_user.id if message.from_user else None
+    if user_id not in settings.admin_ids:
+        await message.answer("Команда доступна только администраторам.")
+        return
+
+    directory = Path(settings.lexicon_dir) if settings.lexicon_dir else None
+    try:
+        reports = await reload_lexicons(directory)
+    except LexiconError as exc:
+        logger.warning("lexicon_reload_failed", tg_user_id=user_id, error=str(exc))
+        await message.answer(f"Словари не обновлены: {exc}")
+        return
+
+    lines = [
+        f"• {report.name} v{report.version}: {report.entries} записей, "
+        f"{report.compile_ms:.1f} мс, {report.size_bytes / 1024:.1f} КБ"
+        for report in reports
+    ]
+    await message.answer("Словари обновлены:\n" + "\n".join(lines))
+
+
+def _cache_line(name: str, info: dict[str, int]) -> str:
+    lookups = info["hits"] + info["misses"]
+    hit_rate = info["hits"] / lookups if lookups else 0.0
+    return (
+        f"• {name}: {hit_rate:.1%} попаданий ({info['hits']}/{lookups}), "
+        f"{info['size']}/{info['max_size']} записей"
+    )
+
+
+def _pool_line(info: dict[str, float]) -> str:
+    return (
+        f"Пул БД: {info['in_use']}/{info['size']} занято, переполнение {info['overflow']}, "
+        f"ожидание {info['wait_ms_avg']:.1f} мс (макс. {info['wait_ms_max']:.1f}), "
+        f"выдач {info['checkouts']}, переполнений {info['overflow_events']}, таймаутов {info['timeouts']}"
+    )
+
+
+@router.message(Command("stats"))
+async def stats_handler(message: Message) -> None:
+    user_id = message.from_user.id if message.from_user else None
+    if user_id not in settings.admin_ids:
+        await message.answer("Команда доступна только администраторам.")
+        return
+
+    lines = [
+        _cache_line("пользователи", user_id_cache.info()),
+        _cache_line("ингредиенты", canonical_cache_info()),
+    ]
+    text = "Кэши:\n" + "\n".join(lines)
+    pool = pool_info()
+    if pool is not None:
+        text += "\n\n" + _pool_line(pool)
+    await message.answer(text)
@@ -3,19 +3,31 @@ from __future__ import annotations
 from math import ceil
 from typing import Literal
 
+import structlog
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardButton, Message
 
-from bot.formatters import SCOPE_TITLE, format_recipe, format_recipe_card
-from bot.keyboards.browse import BrowseContext, browse_keyboard, parse_context, recipe_actions_keyboard
+from bot.formatters import SCOPE_TITLE, format_recipe, format_recipe_card, format_steps
+from bot.keyboards.browse import (
+    BrowseContext,
+    browse_keyboard,
+    decode_cursor,
+    encode_cursor,
+    parse_context,
+    recipe_actions_keyboard,
+)
 from bot.keyboards.main_menu import MENU_FAVORITES, MENU_HISTORY, MENU_TOP
+from bot.recipe_steps import ensure_recipe_steps
 from bot.states import UserMode
-from db.repo import RecipeRepository, RecipeWithRating
-from db.session import SessionFactory
-from schemas import RecipeResponse
+from core.services.gigachat_service import GigaChatError
+from core.services.plate_cooccurrence import current_cooccurrence_model
+from db.repo import BrowseFilters
+from db.unit_of_work import UnitOfWork
+from schemas import RecipeResponse, parse_stored_recipe
 
+logger = structlog.get_logger(__name__)
 router = Router()
 PAGE_SIZE = 5
 
@@ -29,54 +41,6 @@ SCOPE_STATE = {
     "favorites": UserMode.viewing_favorites,
     "history": UserMode.viewing_history,
 }
-ANIMAL_KEYWORDS = (
-    "кур",
-    "индей",
-    "говя",
-    "свин",
-    "бекон",
-    "рыб",
-    "лосос",
-    "тунец",
-    "кревет",
-    "краб",
-    "мяс",
-)
-
-
-def _is_vegetarian(item: RecipeWithRating) -> bool:
-    payload = item.recipe.llm_response or {}
-    ingredients = payload.get("ingredients") or item.recipe.source_ingredients or []
-    normalized = " ".join(str(x).lower() for x in ingredients)
-    return not any(keyword in normalized for keyword in ANIMAL_KEYWORDS)
-
-
-def _apply_filters(
-    items: list[RecipeWithRating],
-    context: BrowseContext,
-    viewer_user_id: int,
-    liked_recipe_ids: set[int],
-) -> list[RecipeWithRating]:
-    filtered: list[RecipeWithRating] = []
-    for item in items:
-        recipe = item.recipe
-        if context.only_my and recipe.user_id != viewer_user_id:
-            continue
-        if context.only_liked and recipe.id not in liked_recipe_ids:
-            continue
-        if context.fast and (recipe.time_minutes is None or recipe.time_minutes > 20):
-            continue
-        if context.vegetarian and not _is_vegetarian(item):
-            continue
-        filtered.append(item)
-    return filtered
-
-
-def _paginate(items: list[RecipeWithRating], page: int) -> tuple[list[RecipeWithRating], int, int]:
-    total_pages = max(1, ceil(len(items) / PAGE_SIZE))
-    safe_page = min(max(page, 1), total_pages)
-    offset = (safe_page - 1) * PAGE_SIZE
-    return items[offset : offset + PAGE_SIZE], safe_page, total_pages
 
 
 def _active_filters(context: BrowseContext) -> str:
@@ -100,30 +64,48 @@ async def _render_scope(
     username: str | None,
     target_message: Message,
     edit: bool,
+    uow: UnitOfWork,
 ) -> None:
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(tg_user_id=user_id, username=username)
-        items = await repo.list_recipes_with_rating(scope=scope, viewer_user_id=user.id)
-        liked_recipe_ids = await repo.get_user_liked_recipe_ids(user.id)
-        filtered = _apply_filters(items=items, context=context, viewer_user_id=user.id, liked_recipe_ids=liked_recipe_ids)
-        page_items, safe_page, total_pages = _paginate(filtered, context.page)
-        await session.commit()
-
-    safe_context = context.with_page(safe_page)
+    cursor = decode_cursor(context.cursor)
+    filters = BrowseFilters(
+        only_my=context.only_my,
+        only_liked=context.only_liked,
+        fast=context.fast,
+        vegetarian=context.vegetarian,
+    )
+    repo = uow.repo
+    viewer_id = await repo.ensure_user_id(tg_user_id=user_id, username=username)
+    page = await repo.list_recipe_page(
+        scope=scope,
+        viewer_user_id=viewer_id,
+        filters=filters,
+        limit=PAGE_SIZE,
+        cursor_id=cursor[0] if cursor else None,
+        before=cursor[1] if cursor else False,
+    )
+    if cursor is not None and (not page.items or not page.has_prev):
+        # Stale cursor (recipe deleted) or walked back to the start.
+        page = await repo.list_recipe_page(scope=scope, viewer_user_id=viewer_id, filters=filters, limit=PAGE_SIZE)
+        context = context.with_page(1)
+    total = await repo.count_recipes(scope=scope, viewer_user_id=viewer_id, filters=filters)
+    await uow.commit()
+
     rows = [
-        (item.recipe.id, item.recipe.title or f"Рецепт #{item.recipe.id}", item.rating)
-        for item in page_items
+        (item.id, item.title or f"Рецепт #{item.id}", item.rating)
+        for item in page.items
     ]
     list_title = SCOPE_TITLE.get(scope, "Рецепты")
     text = (
         f"{list_title}\n"
-        f"Фильтры: {_active_filters(safe_context)}\n"
-        f"Найдено: {len(filtered)}"
+        f"Фильтры: {_active_filters(context)}\n"
+        f"Найдено: {total}"
     )
     if not rows:
         text += "\n\nНичего не найдено по выбранным фильтрам."
-    keyboard = browse_keyboard(rows, safe_context, total_pages)
+    prev_cursor = encode_cursor(page.items[0].id, before=True) if page.has_prev and page.items else None
+    next_cursor = encode_cursor(page.items[-1].id) if page.has_next and page.items else None
+    total_pages = max(1, ceil(total / PAGE_SIZE))
+    keyboard = browse_keyboard(rows, context, total_pages, prev_cursor, next_cursor)
 
     if edit:
         await target_message.edit_text(text, reply_markup=keyboard)
@@ -133,7 +115,7 @@ async def _render_scope(
 
 @router.message(Command("top"))
 @router.message(F.text == MENU_TOP)
-async def show_top_handler(message: Message, state: FSMContext) -> None:
+async def show_top_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         return
     await state.set_state(UserMode.viewing_top)
@@ -145,12 +127,13 @@ async def show_top_handler(message: Message, state: FSMContext) -> None:
         username=message.from_user.username,
         target_message=message,
         edit=False,
+        uow=uow,
     )
 
 
 @router.message(Command("favorites"))
 @router.message(F.text == MENU_FAVORITES)
-async def show_favorites_handler(message: Message, state: FSMContext) -> None:
+async def show_favorites_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         return
     await state.set_state(UserMode.viewing_favorites)
@@ -162,12 +145,13 @@ async def show_favorites_handler(message: Message, state: FSMContext) -> None:
         username=message.from_user.username,
         target_message=message,
         edit=False,
+        uow=uow,
     )
 
 
 @router.message(Command("history"))
 @router.message(F.text == MENU_HISTORY)
-async def show_history_handler(message: Message, state: FSMContext) -> None:
+async def show_history_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         return
     await state.set_state(UserMode.viewing_history)
@@ -179,11 +163,12 @@ async def show_history_handler(message: Message, state: FSMContext) -> None:
         username=message.from_user.username,
         target_message=message,
         edit=False,
+        uow=uow,
     )
 
 
 @router.callback_query(F.data.in_(SCOPE_BY_CALLBACK.keys()))
-async def scope_from_inline_menu_handler(callback: CallbackQuery, state: FSMContext) -> None:
+async def scope_from_inline_menu_handler(callback: CallbackQuery, state: FSMContext, uow: UnitOfWork) -> None:
     if callback.from_user is None or callback.message is None:
         await callback.answer()
         return
@@ -197,6 +182,7 @@ async def scope_from_inline_menu_handler(callback: CallbackQuery, state: FSMCont
         username=callback.from_user.username,
         target_message=callback.message,
         edit=True,
+        uow=uow,
     )
     await callback.answer()
 
@@ -207,12 +193,12 @@ async def noop_handler(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("L:"))
-async def list_page_handler(callback: CallbackQuery, state: FSMContext) -> None:
+async def list_page_handler(callback: CallbackQuery, state: FSMContext, uow: UnitOfWork) -> None:
     if callback.from_user is None or callback.message is None:
         await callback.answer()
         return
-    _, scope, page, flags = callback.data.split(":")
-    context = parse_context(scope, page, flags)
+    _, scope, page, flags, *cursor = callback.data.split(":")
+    context = parse_context(scope, page, flags, *cursor)
     await state.set_state(SCOPE_STATE.get(scope, UserMode.main_menu))
     await _render_scope(
         scope=scope,
@@ -221,12 +207,13 @@ async def list_page_handler(callback: CallbackQuery, state: FSMContext) -> None:
         username=callback.from_user.username,
         target_message=callback.message,
         edit=True,
+        uow=uow,
     )
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("F:"))
-async def toggle_filter_handler(callback: CallbackQuery, state: FSMContext) -> None:
+async def toggle_filter_handler(callback: CallbackQuery, state: FSMContext, uow: UnitOfWork) -> None:
     if callback.from_user is None or callback.message is None:
         await callback.answer()
         return
@@ -240,31 +227,29 @@ async def toggle_filter_handler(callback: CallbackQuery, state: FSMContext) -> N
         username=callback.from_user.username,
         target_message=callback.message,
         edit=True,
+        uow=uow,
     )
     await callback.answer("Фильтр обновлен")
 
 
 @router.callback_query(F.data.startswith("O:"))
-async def open_recipe_from_list_handler(callback: CallbackQuery) -> None:
+async def open_recipe_from_list_handler(callback: CallbackQuery, uow: UnitOfWork) -> None:
     if callback.from_user is None or callback.message is None:
         await callback.answer()
         return
-    _, recipe_id_text, scope, page, flags = callback.data.split(":")
+    _, recipe_id_text, scope, page, flags, *cursor = callback.data.split(":")
     recipe_id = int(recipe_id_text)
 
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=callback.from_user.id,
-            username=callback.from_user.username,
-        )
-        item = await repo.get_recipe_with_rating(recipe_id)
-        if item is None:
-            await callback.answer("Рецепт не найден", show_alert=True)
-            return
-        favorite_ids = await repo.get_user_favorite_recipe_ids(user.id)
-        is_favorite = recipe_id in favorite_ids
-        await session.commit()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=callback.from_user.id,
+        username=callback.from_user.username,
+    )
+    item = await repo.get_recipe_detail(recipe_id, viewer_user_id=user_id)
+    if item is None:
+        await callback.answer("Рецепт не найден", show_alert=True)
+        return
+    await uow.commit()
 
     payload = item.recipe.llm_response or {}
     details = format_recipe_card(
@@ -273,18 +258,25 @@ async def open_recipe_from_list_handler(callback: CallbackQuery) -> None:
         rating=item.rating,
         recipe_id=item.recipe.id,
     )
+    steps_pending = False
     try:
-        parsed = RecipeResponse.model_validate(payload)
+        parsed = parse_stored_recipe(payload)
         details = f"{details}\n\n{format_recipe(parsed)}"
+        steps_pending = not isinstance(parsed, RecipeResponse)
     except Exception:
         pass
 
-    keyboard = recipe_actions_keyboard(recipe_id=recipe_id, is_favorite=is_favorite)
+    keyboard = recipe_actions_keyboard(
+        recipe_id=recipe_id,
+        is_favorite=item.is_favorite,
+        steps_pending=steps_pending,
+        viewer_vote=item.viewer_vote,
+    )
     keyboard.inline_keyboard.append(
         [
             InlineKeyboardButton(
                 text="⬅️ К списку",
-                callback_data=f"L:{scope}:{page}:{flags}",
+                callback_data=parse_context(scope, page, flags, *cursor).list_callback,
             )
         ]
     )
@@ -292,8 +284,28 @@ async def open_recipe_from_list_handler(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("D:"))
+async def show_steps_handler(callback: CallbackQuery) -> None:
+    if callback.message is None:
+        await callback.answer()
+        return
+    recipe_id = int(callback.data.split(":")[1])
+    # Answer right away: generating the steps can outlast the callback timeout.
+    await callback.answer("Готовлю шаги…")
+    try:
+        recipe = await ensure_recipe_steps(recipe_id)
+    except GigaChatError as exc:
+        logger.warning("recipe_steps_failed", recipe_id=recipe_id, error=str(exc))
+        await callback.message.answer("Не удалось получить шаги от GigaChat. Попробуйте еще раз позже.")
+        return
+    if recipe is None:
+        await callback.message.answer("Рецепт не найден.")
+        return
+    await callback.message.answer(f"Шаги для рецепта #{recipe_id}:\n{format_steps(recipe.steps)}"[:4000])
+
+
 @router.callback_query(F.data.startswith("V:"))
-async def vote_recipe_handler(callback: CallbackQuery) -> None:
+async def vote_recipe_handler(callback: CallbackQuery, uow: UnitOfWork) -> None:
     if callback.from_user is None:
         await callback.answer()
         return
@@ -302,54 +314,51 @@ async def vote_recipe_handler(callback: CallbackQuery) -> None:
     vote = int(vote_text)
     vote_value: Literal[-1, 1] = 1 if vote > 0 else -1
 
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=callback.from_user.id,
-            username=callback.from_user.username,
-        )
-        await repo.set_vote(user_id=user.id, recipe_id=recipe_id, vote=vote_value)
-        rating = await repo.get_rating(recipe_id)
-        await session.commit()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=callback.from_user.id,
+        username=callback.from_user.username,
+    )
+    rating = await repo.set_vote(user_id=user_id, recipe_id=recipe_id, vote=vote_value)
+    await uow.commit()
 
+    current_cooccurrence_model().update_rating(recipe_id, rating)
     await callback.answer("Голос сохранен")
     if callback.message:
         await callback.message.answer(f"Рейтинг рецепта #{recipe_id}: {rating:+d}")
 
 
 @router.callback_query(F.data.startswith("A:"))
-async def add_favorite_handler(callback: CallbackQuery) -> None:
+async def add_favorite_handler(callback: CallbackQuery, uow: UnitOfWork) -> None:
     if callback.from_user is None:
         await callback.answer()
         return
     recipe_id = int(callback.data.split(":")[1])
 
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=callback.from_user.id,
-            username=callback.from_user.username,
-        )
-        await repo.add_favorite(user_id=user.id, recipe_id=recipe_id)
-        await session.commit()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=callback.from_user.id,
+        username=callback.from_user.username,
+    )
+    await repo.add_favorite(user_id=user_id, recipe_id=recipe_id)
+    await uow.commit()
 
     await callback.answer("Добавлено в избранное")
 
 
 @router.callback_query(F.data.startswith("R:"))
-async def remove_favorite_handler(callback: CallbackQuery) -> None:
+async def remove_favorite_handler(callback: CallbackQuery, uow: UnitOfWork) -> None:
     if callback.from_user is None:
         await callback.answer()
         return
     recipe_id = int(callback.data.split(":")[1])
 
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=callback.from_user.id,
-            username=callback.from_user.username,
-        )
-        await repo.remove_favorite(user_id=user.id, recipe_id=recipe_id)
-        await session.commit()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=callback.from_user.id,
+        username=callback.from_user.username,
+    )
+    await repo.remove_favorite(user_id=user_id, recipe_id=recipe_id)
+    await uow.commit()
 
     await callback.answer("Удалено из избранного")
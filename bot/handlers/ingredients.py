@@ -7,14 +7,19 @@ from aiogram.types import Message
 
 from bot.formatters import format_plate_analysis, format_recipe
 from bot.keyboards.browse import recipe_actions_keyboard
+from bot.recipe_steps import schedule_recipe_steps
 from bot.states import UserMode
 from core.services.gigachat_service import GigaChatClient, GigaChatError
-from core.services.plate_service import PlateService
-from core.services.recipe_match_service import find_best_recipe_match
+from core.services.plate_cooccurrence import current_cooccurrence_model
+from core.services.plate_service import plate_service
+from core.services.recipe_attributes import recipe_flags
+from core.services.recipe_match_service import MatchConstraints, find_best_recipe_match
+from core.services.recipe_text_index import recipe_text_index
+from core.services.request_parsing import split_ingredients
+from core.services.reuse_replay import REQUEST_EVENT, request_log_fields
 from core.services.safety_service import build_block_message, check_user_input
-from db.repo import RecipeRepository
-from db.session import SessionFactory
-from schemas import RecipeResponse
+from db.unit_of_work import UnitOfWork
+from schemas import RecipeResponse, parse_stored_recipe
 
 logger = structlog.get_logger(__name__)
 router = Router()
@@ -22,11 +27,6 @@ RECENT_USER_RECIPES_LIMIT = 150
 RECENT_GLOBAL_RECIPES_LIMIT = 300
 
 
-def _split_ingredients(text: str) -> list[str]:
-    normalized = text.replace("\n", ",").replace(";", ",")
-    return [item.strip() for item in normalized.split(",") if item.strip()]
-
-
 def _gigachat_error_message(exc: Exception) -> str:
     details = str(exc)
     details_upper = details.upper()
@@ -50,16 +50,17 @@ def _gigachat_error_message(exc: Exception) -> str:
 
 
 @router.message(UserMode.entering_ingredients, F.text)
-async def ingredients_input_handler(message: Message, state: FSMContext) -> None:
+async def ingredients_input_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         await message.answer("Не удалось определить пользователя.")
         return
 
-    ingredients = _split_ingredients(message.text or "")
+    ingredients = split_ingredients(message.text or "")
     if not ingredients:
         await message.answer("Не вижу ингредиентов. Отправьте список через запятую или с новой строки.")
         return
 
+    logger.info(REQUEST_EVENT, **request_log_fields("ingredients", ingredients=ingredients))
     safety_result = check_user_input(ingredients)
     if not safety_result.is_safe:
         logger.warning(
@@ -72,55 +73,52 @@ async def ingredients_input_handler(message: Message, state: FSMContext) -> None
         await state.set_state(UserMode.main_menu)
         return
 
-    plate_service = PlateService()
     analysis = plate_service.analyze(ingredients)
     await message.answer(format_plate_analysis(analysis))
 
-    user_id: int | None = None
-    user_preferences_text = "нет"
     reused_payload: dict | None = None
     reused_recipe_id: int | None = None
     reused_rating = 0
     reused_similarity = 0.0
     reused_scope: str | None = None
     reused_is_favorite = False
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=message.from_user.id,
-            username=message.from_user.username,
-        )
-        user_id = user.id
-        settings = await repo.get_user_settings(user.id)
-        user_preferences_text = settings.prompt_text()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=message.from_user.id,
+        username=message.from_user.username,
+    )
+    settings = await repo.get_user_settings(user_id)
+    user_preferences_text = settings.prompt_text()
+    constraints = MatchConstraints.from_settings(settings)
 
-        user_candidates = await repo.list_recent_recipes_with_rating_for_user(
-            user_id=user.id,
-            limit=RECENT_USER_RECIPES_LIMIT,
+    user_candidates = await repo.list_recent_recipes_with_rating_for_user(
+        user_id=user_id,
+        limit=RECENT_USER_RECIPES_LIMIT,
+    )
+    match = find_best_recipe_match(ingredients, user_candidates, constraints=constraints)
+    if match is not None:
+        reused_scope = "user"
+    else:
+        global_candidates = await repo.list_recent_recipes_with_rating_global(
+            limit=RECENT_GLOBAL_RECIPES_LIMIT,
+            exclude_user_id=user_id,
         )
-        match = find_best_recipe_match(ingredients, user_candidates)
+        match = find_best_recipe_match(ingredients, global_candidates, constraints=constraints)
         if match is not None:
-            reused_scope = "user"
-        else:
-            global_candidates = await repo.list_recent_recipes_with_rating_global(
-                limit=RECENT_GLOBAL_RECIPES_LIMIT,
-                exclude_user_id=user.id,
-            )
-            match = find_best_recipe_match(ingredients, global_candidates)
-            if match is not None:
-                reused_scope = "global"
+            reused_scope = "global"
 
-        if match is not None:
-            reused_payload = match.item.recipe.llm_response or {}
-            reused_recipe_id = match.item.recipe.id
-            reused_rating = match.item.rating
-            reused_similarity = match.similarity
-            reused_is_favorite = reused_recipe_id in await repo.get_user_favorite_recipe_ids(user.id)
-        await session.commit()
+    if match is not None:
+        reused_recipe_id = match.item.id
+        detail = await repo.get_recipe_detail(reused_recipe_id, viewer_user_id=user_id)
+        reused_payload = (detail.recipe.llm_response if detail else None) or {}
+        reused_rating = match.item.rating
+        reused_similarity = match.similarity
+        reused_is_favorite = detail is not None and detail.is_favorite
+    await uow.commit()
 
     if reused_payload and reused_recipe_id is not None:
         try:
-            reused_recipe = RecipeResponse.model_validate(reused_payload)
+            reused_recipe = parse_stored_recipe(reused_payload)
         except Exception:
             logger.warning("recipe_reuse_skipped_invalid_payload", recipe_id=reused_recipe_id)
         else:
@@ -132,7 +130,11 @@ async def ingredients_input_handler(message: Message, state: FSMContext) -> None
             )
             await message.answer(
                 format_recipe(reused_recipe),
-                reply_markup=recipe_actions_keyboard(recipe_id=reused_recipe_id, is_favorite=reused_is_favorite),
+                reply_markup=recipe_actions_keyboard(
+                    recipe_id=reused_recipe_id,
+                    is_favorite=reused_is_favorite,
+                    steps_pending=not isinstance(reused_recipe, RecipeResponse),
+                ),
             )
             await message.answer(
                 f"Найден похожий рецепт #{reused_recipe_id} (scope: {reused_scope}, "
@@ -143,11 +145,18 @@ async def ingredients_input_handler(message: Message, state: FSMContext) -> None
             return
 
     try:
-        recipe = await GigaChatClient().generate_recipe_from_ingredients(
-            ingredients=ingredients,
-            missing_groups=analysis.missing_groups,
-            user_preferences=user_preferences_text,
+        client = GigaChatClient()
+        generate = (
+            client.generate_summary_from_ingredients
+            if client.two_phase
+            else client.generate_recipe_from_ingredients
         )
+        async with uow.released():
+            recipe = await generate(
+                ingredients=ingredients,
+                missing_groups=analysis.missing_groups,
+                user_preferences=user_preferences_text,
+            )
     except GigaChatError as exc:
         logger.warning("recipe_generation_failed", mode="ingredients", error=str(exc))
         await message.answer(_gigachat_error_message(exc))
@@ -159,33 +168,35 @@ async def ingredients_input_handler(message: Message, state: FSMContext) -> None
         await state.set_state(UserMode.main_menu)
         return
 
-    recipe_id: int | None = None
-    is_favorite = False
-    rating = 0
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        if user_id is None:
-            user = await repo.ensure_user(
-                tg_user_id=message.from_user.id,
-                username=message.from_user.username,
-            )
-            user_id = user.id
-
-        saved = await repo.save_recipe(
-            user_id=user_id,
-            request_type="ingredients",
-            source_ingredients=ingredients,
-            supplemented_ingredients=analysis.recommendations,
-            llm_response=recipe.model_dump(by_alias=True),
-        )
-        recipe_id = saved.id
-        rating = await repo.get_rating(saved.id)
-        is_favorite = saved.id in await repo.get_user_favorite_recipe_ids(user_id)
-        await session.commit()
+    # A fresh session: the one used for matching was released for the LLM call.
+    repo = uow.repo
+    payload = recipe.model_dump(by_alias=True)
+    is_vegetarian, is_fast = recipe_flags(payload, ingredients)
+    saved = await repo.save_recipe(
+        user_id=user_id,
+        request_type="ingredients",
+        source_ingredients=ingredients,
+        supplemented_ingredients=analysis.recommendations,
+        llm_response=payload,
+        is_vegetarian=is_vegetarian,
+        is_fast=is_fast,
+    )
+    recipe_id = saved.id
+    plate_map = saved.plate_map
+    detail = await repo.get_recipe_detail(saved.id, viewer_user_id=user_id)
+    rating = detail.rating if detail else 0
+    is_favorite = detail is not None and detail.is_favorite
+    await uow.commit()
+
+    recipe_text_index.add(recipe_id, recipe.title, recipe.ingredients)
+    current_cooccurrence_model().add_recipe(recipe_id, plate_map, rating)
 
+    steps_pending = not isinstance(recipe, RecipeResponse)
     await message.answer(
         format_recipe(recipe),
-        reply_markup=recipe_actions_keyboard(recipe_id=recipe_id, is_favorite=is_favorite),
+        reply_markup=recipe_actions_keyboard(recipe_id=recipe_id, is_favorite=is_favorite, steps_pending=steps_pending),
     )
     await message.answer(f"Рецепт #{recipe_id} сохранен. Источник: llm. Рейтинг: {rating:+d}")
+    if steps_pending:
+        schedule_recipe_steps(recipe_id, recipe)
     await state.set_state(UserMode.main_menu)
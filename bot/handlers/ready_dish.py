@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import re
-
 import structlog
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
@@ -9,28 +7,26 @@ from aiogram.types import Message
 
 from bot.formatters import format_recipe
 from bot.keyboards.browse import recipe_actions_keyboard
+from bot.recipe_steps import schedule_recipe_steps
 from bot.states import UserMode
 from core.services.gigachat_service import GigaChatClient, GigaChatError
-from core.services.recipe_match_service import find_best_recipe_match
+from core.services.plate_cooccurrence import current_cooccurrence_model
+from core.services.recipe_attributes import recipe_flags
+from core.services.recipe_match_service import MatchConstraints, find_best_recipe_match, satisfies_constraints
+from core.services.recipe_text_index import parse_text_query, recipe_text_index, sync_recipe_text_index
+from core.services.request_parsing import extract_source_ingredients
+from core.services.reuse_replay import REQUEST_EVENT, request_log_fields
 from core.services.safety_service import build_block_message, check_user_input
-from db.repo import RecipeRepository
-from db.session import SessionFactory
-from schemas import RecipeResponse
+from db.repo import RecipeCandidate
+from db.unit_of_work import UnitOfWork
+from schemas import RecipeResponse, parse_stored_recipe
 
 logger = structlog.get_logger(__name__)
 router = Router()
 RECENT_USER_RECIPES_LIMIT = 150
 RECENT_GLOBAL_RECIPES_LIMIT = 300
-
-
-def _extract_source_ingredients(request_text: str) -> list[str]:
-    normalized = request_text.replace("\n", ",").replace(";", ",")
-    items = [item.strip() for item in normalized.split(",") if item.strip()]
-    if len(items) > 1:
-        return items[:8]
-
-    tokens = re.findall(r"[a-zа-я0-9]+", request_text.lower())
-    return tokens[:6]
+TEXT_MATCH_MIN_SCORE = 0.6
+TEXT_MATCH_CANDIDATES = 3
 
 
 def _gigachat_error_message(exc: Exception) -> str:
@@ -56,7 +52,7 @@ def _gigachat_error_message(exc: Exception) -> str:
 
 
 @router.message(UserMode.choosing_ready_dish, F.text)
-async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
+async def ready_dish_input_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         await message.answer("Не удалось определить пользователя.")
         return
@@ -66,6 +62,7 @@ async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
         await message.answer("Опишите, какое блюдо хотите: например, 'быстрый вегетарианский ужин'.")
         return
 
+    logger.info(REQUEST_EVENT, **request_log_fields("ready_dish", dish_request=dish_request))
     safety_result = check_user_input(dish_request)
     if not safety_result.is_safe:
         logger.warning(
@@ -78,8 +75,6 @@ async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
         await state.set_state(UserMode.main_menu)
         return
 
-    user_id: int | None = None
-    user_preferences_text = "нет"
     reused_payload: dict | None = None
     reused_recipe_id: int | None = None
     reused_rating = 0
@@ -87,45 +82,65 @@ async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
     reused_scope: str | None = None
     reused_is_favorite = False
 
-    source_ingredients = _extract_source_ingredients(dish_request)
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=message.from_user.id,
-            username=message.from_user.username,
+    source_ingredients = extract_source_ingredients(dish_request)
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=message.from_user.id,
+        username=message.from_user.username,
+    )
+    settings = await repo.get_user_settings(user_id)
+    user_preferences_text = settings.prompt_text()
+    # "рис без курицы" must not be answered with a chicken recipe.
+    constraints = MatchConstraints.from_settings(settings).excluding(parse_text_query(dish_request).excluded)
+
+    reused_item: RecipeCandidate | None = None
+    if len(source_ingredients) >= 2:
+        user_candidates = await repo.list_recent_recipes_with_rating_for_user(
+            user_id=user_id,
+            limit=RECENT_USER_RECIPES_LIMIT,
         )
-        user_id = user.id
-        settings = await repo.get_user_settings(user.id)
-        user_preferences_text = settings.prompt_text()
-
-        if len(source_ingredients) >= 2:
-            user_candidates = await repo.list_recent_recipes_with_rating_for_user(
-                user_id=user.id,
-                limit=RECENT_USER_RECIPES_LIMIT,
+        match = find_best_recipe_match(source_ingredients, user_candidates, constraints=constraints)
+        if match is not None:
+            reused_scope = "user"
+        else:
+            global_candidates = await repo.list_recent_recipes_with_rating_global(
+                limit=RECENT_GLOBAL_RECIPES_LIMIT,
+                exclude_user_id=user_id,
             )
-            match = find_best_recipe_match(source_ingredients, user_candidates)
-            if match is not None:
-                reused_scope = "user"
-            else:
-                global_candidates = await repo.list_recent_recipes_with_rating_global(
-                    limit=RECENT_GLOBAL_RECIPES_LIMIT,
-                    exclude_user_id=user.id,
-                )
-                match = find_best_recipe_match(source_ingredients, global_candidates)
-                if match is not None:
-                    reused_scope = "global"
-
+            match = find_best_recipe_match(source_ingredients, global_candidates, constraints=constraints)
             if match is not None:
-                reused_payload = match.item.recipe.llm_response or {}
-                reused_recipe_id = match.item.recipe.id
-                reused_rating = match.item.rating
-                reused_similarity = match.similarity
-                reused_is_favorite = reused_recipe_id in await repo.get_user_favorite_recipe_ids(user.id)
-        await session.commit()
+                reused_scope = "global"
+
+        if match is not None:
+            reused_item = match.item
+            reused_similarity = match.similarity
+
+    if reused_item is None:
+        await sync_recipe_text_index(repo)
+        text_matches = recipe_text_index.search(
+            dish_request,
+            limit=TEXT_MATCH_CANDIDATES,
+            min_score=TEXT_MATCH_MIN_SCORE,
+        )
+        for text_match in text_matches:
+            item = await repo.get_recipe_candidate(text_match.recipe_id)
+            if item is not None and satisfies_constraints(item, constraints):
+                reused_item = item
+                reused_scope = "text"
+                reused_similarity = text_match.score
+                break
+
+    if reused_item is not None:
+        reused_recipe_id = reused_item.id
+        detail = await repo.get_recipe_detail(reused_recipe_id, viewer_user_id=user_id)
+        reused_payload = (detail.recipe.llm_response if detail else None) or {}
+        reused_rating = reused_item.rating
+        reused_is_favorite = detail is not None and detail.is_favorite
+    await uow.commit()
 
     if reused_payload and reused_recipe_id is not None:
         try:
-            reused_recipe = RecipeResponse.model_validate(reused_payload)
+            reused_recipe = parse_stored_recipe(reused_payload)
         except Exception:
             logger.warning("recipe_reuse_skipped_invalid_payload", recipe_id=reused_recipe_id)
         else:
@@ -137,7 +152,11 @@ async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
             )
             await message.answer(
                 format_recipe(reused_recipe),
-                reply_markup=recipe_actions_keyboard(recipe_id=reused_recipe_id, is_favorite=reused_is_favorite),
+                reply_markup=recipe_actions_keyboard(
+                    recipe_id=reused_recipe_id,
+                    is_favorite=reused_is_favorite,
+                    steps_pending=not isinstance(reused_recipe, RecipeResponse),
+                ),
             )
             await message.answer(
                 f"Найден похожий рецепт #{reused_recipe_id} (scope: {reused_scope}, "
@@ -148,10 +167,13 @@ async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
             return
 
     try:
-        recipe = await GigaChatClient().generate_ready_dish(
-            dish_request=dish_request,
-            user_preferences=user_preferences_text,
-        )
+        client = GigaChatClient()
+        generate = client.generate_ready_dish_summary if client.two_phase else client.generate_ready_dish
+        async with uow.released():
+            recipe = await generate(
+                dish_request=dish_request,
+                user_preferences=user_preferences_text,
+            )
         if not source_ingredients:
             source_ingredients = recipe.ingredients[:6]
     except GigaChatError as exc:
@@ -165,33 +187,34 @@ async def ready_dish_input_handler(message: Message, state: FSMContext) -> None:
         await state.set_state(UserMode.main_menu)
         return
 
-    recipe_id: int | None = None
-    is_favorite = False
-    rating = 0
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        if user_id is None:
-            user = await repo.ensure_user(
-                tg_user_id=message.from_user.id,
-                username=message.from_user.username,
-            )
-            user_id = user.id
+    repo = uow.repo
+    payload = recipe.model_dump(by_alias=True)
+    is_vegetarian, is_fast = recipe_flags(payload, source_ingredients)
+    saved = await repo.save_recipe(
+        user_id=user_id,
+        request_type="random",
+        source_ingredients=source_ingredients,
+        supplemented_ingredients=[],
+        llm_response=payload,
+        is_vegetarian=is_vegetarian,
+        is_fast=is_fast,
+    )
+    recipe_id = saved.id
+    plate_map = saved.plate_map
+    detail = await repo.get_recipe_detail(saved.id, viewer_user_id=user_id)
+    rating = detail.rating if detail else 0
+    is_favorite = detail is not None and detail.is_favorite
+    await uow.commit()
 
-        saved = await repo.save_recipe(
-            user_id=user_id,
-            request_type="random",
-            source_ingredients=source_ingredients,
-            supplemented_ingredients=[],
-            llm_response=recipe.model_dump(by_alias=True),
-        )
-        recipe_id = saved.id
-        rating = await repo.get_rating(saved.id)
-        is_favorite = saved.id in await repo.get_user_favorite_recipe_ids(user_id)
-        await session.commit()
+    recipe_text_index.add(recipe_id, recipe.title, recipe.ingredients)
+    current_cooccurrence_model().add_recipe(recipe_id, plate_map, rating)
 
+    steps_pending = not isinstance(recipe, RecipeResponse)
     await message.answer(
         format_recipe(recipe),
-        reply_markup=recipe_actions_keyboard(recipe_id=recipe_id, is_favorite=is_favorite),
+        reply_markup=recipe_actions_keyboard(recipe_id=recipe_id, is_favorite=is_favorite, steps_pending=steps_pending),
     )
     await message.answer(f"Рецепт #{recipe_id} сохранен. Источник: llm. Рейтинг: {rating:+d}")
+    if steps_pending:
+        schedule_recipe_steps(recipe_id, recipe)
     await state.set_state(UserMode.main_menu)
@@ -8,8 +8,8 @@ from aiogram.types import CallbackQuery, Message
 from bot.keyboards.main_menu import MENU_SETTINGS
 from bot.keyboards.settings import GOAL_LABELS, settings_keyboard
 from bot.states import UserMode
-from db.repo import RecipeRepository, UserSettings
-from db.session import SessionFactory
+from db.repo import UserSettings
+from db.unit_of_work import UnitOfWork
 
 router = Router()
 
@@ -60,21 +60,21 @@ def _format_settings(settings: UserSettings) -> str:
     )
 
 
-async def _load_settings_text(user_id: int, username: str | None) -> tuple[int, str]:
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(tg_user_id=user_id, username=username)
-        settings = await repo.get_user_settings(user.id)
-        await session.commit()
-        return user.id, _format_settings(settings)
+async def _load_settings_text(uow: UnitOfWork, user_id: int, username: str | None) -> tuple[int, str]:
+    repo = uow.repo
+    db_user_id = await repo.ensure_user_id(tg_user_id=user_id, username=username)
+    settings = await repo.get_user_settings(db_user_id)
+    await uow.commit()
+    return db_user_id, _format_settings(settings)
 
 
 @router.message(Command("settings"))
 @router.message(F.text == MENU_SETTINGS)
-async def show_settings_handler(message: Message, state: FSMContext) -> None:
+async def show_settings_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         return
     _, text = await _load_settings_text(
+        uow,
         user_id=message.from_user.id,
         username=message.from_user.username,
     )
@@ -83,11 +83,12 @@ async def show_settings_handler(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "menu:settings")
-async def show_settings_from_inline_handler(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_settings_from_inline_handler(callback: CallbackQuery, state: FSMContext, uow: UnitOfWork) -> None:
     if callback.from_user is None or callback.message is None:
         await callback.answer()
         return
     _, text = await _load_settings_text(
+        uow,
         user_id=callback.from_user.id,
         username=callback.from_user.username,
     )
@@ -97,25 +98,24 @@ async def show_settings_from_inline_handler(callback: CallbackQuery, state: FSMC
 
 
 @router.callback_query(F.data.startswith("S:"))
-async def settings_callback_handler(callback: CallbackQuery, state: FSMContext) -> None:
+async def settings_callback_handler(callback: CallbackQuery, state: FSMContext, uow: UnitOfWork) -> None:
     if callback.from_user is None or callback.message is None:
         await callback.answer()
         return
     _, action, value = (callback.data.split(":", 2) + [""])[:3]
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=callback.from_user.id,
-            username=callback.from_user.username,
-        )
-        if action == "goal" and value in GOAL_LABELS:
-            await repo.update_user_settings(user.id, goal=value)
-        elif action == "clear" and value == "allergies":
-            await repo.update_user_settings(user.id, allergies=[])
-        elif action == "clear" and value == "excluded":
-            await repo.update_user_settings(user.id, excluded_products=[])
-        settings = await repo.get_user_settings(user.id)
-        await session.commit()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=callback.from_user.id,
+        username=callback.from_user.username,
+    )
+    if action == "goal" and value in GOAL_LABELS:
+        await repo.update_user_settings(user_id, goal=value)
+    elif action == "clear" and value == "allergies":
+        await repo.update_user_settings(user_id, allergies=[])
+    elif action == "clear" and value == "excluded":
+        await repo.update_user_settings(user_id, excluded_products=[])
+    settings = await repo.get_user_settings(user_id)
+    await uow.commit()
 
     await state.set_state(UserMode.editing_settings)
     await callback.message.edit_text(_format_settings(settings), reply_markup=settings_keyboard())
@@ -126,63 +126,62 @@ async def settings_callback_handler(callback: CallbackQuery, state: FSMContext)
     UserMode.editing_settings,
     F.text.regexp(r"(?i)^(аллергии:|исключить:|кухня:|сложность:|лимит:|предпочтения:|показать$|настройки$|/settings$)"),
 )
-async def settings_text_handler(message: Message, state: FSMContext) -> None:
+async def settings_text_handler(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         return
     text = (message.text or "").strip()
     lowered = text.lower()
-    async with SessionFactory() as session:
-        repo = RecipeRepository(session)
-        user = await repo.ensure_user(
-            tg_user_id=message.from_user.id,
-            username=message.from_user.username,
-        )
-        try:
-            if lowered.startswith("аллергии:"):
-                await repo.update_user_settings(user.id, allergies=_split_list(text.split(":", 1)[1]))
-            elif lowered.startswith("исключить:"):
-                await repo.update_user_settings(
-                    user.id,
-                    excluded_products=_split_list(text.split(":", 1)[1]),
-                )
-            elif lowered.startswith("кухня:"):
-                await repo.update_user_settings(
-                    user.id,
-                    preferred_cuisine=_parse_optional_text(text.split(":", 1)[1]),
-                )
-            elif lowered.startswith("сложность:"):
-                await repo.update_user_settings(
-                    user.id,
-                    preferred_complexity=_parse_optional_text(text.split(":", 1)[1]),
-                )
-            elif lowered.startswith("лимит:"):
-                await repo.update_user_settings(
-                    user.id,
-                    time_limit_minutes=_parse_limit(text.split(":", 1)[1]),
-                )
-            elif lowered.startswith("предпочтения:"):
-                payload = text.split(":", 1)[1]
-                parts = [p.strip() for p in payload.split(";") if p.strip()]
-                updates: dict[str, object] = {}
-                for part in parts:
-                    if "=" not in part:
-                        continue
-                    key, value = [x.strip().lower() for x in part.split("=", 1)]
-                    if key == "кухня":
-                        updates["preferred_cuisine"] = _parse_optional_text(value)
-                    elif key == "сложность":
-                        updates["preferred_complexity"] = _parse_optional_text(value)
-                    elif key == "лимит":
-                        updates["time_limit_minutes"] = _parse_limit(value)
-                await repo.update_user_settings(user.id, **updates)
-            elif lowered in {"показать", "настройки", "/settings"}:
-                pass
-        except ValueError as exc:
-            await message.answer(str(exc))
-            return
-
-        settings = await repo.get_user_settings(user.id)
-        await session.commit()
+    repo = uow.repo
+    user_id = await repo.ensure_user_id(
+        tg_user_id=message.from_user.id,
+        username=message.from_user.username,
+    )
+    try:
+        if lowered.startswith("аллергии:"):
+            await repo.update_user_settings(user_id, allergies=_split_list(text.split(":", 1)[1]))
+        elif lowered.startswith("исключить:"):
+            await repo.update_user_settings(
+                user_id,
+                excluded_products=_split_list(text.split(":", 1)[1]),
+            )
+        elif lowered.startswith("кухня:"):
+            await repo.update_user_settings(
+                user_id,
+                preferred_cuisine=_parse_optional_text(text.split(":", 1)[1]),
+            )
+        elif lowered.startswith("сложность:"):
+            await repo.update_user_settings(
+                user_id,
+                preferred_complexity=_parse_optional_text(text.split(":", 1)[1]),
+            )
+        elif lowered.startswith("лимит:"):
+            await repo.update_user_settings(
+                user_id,
+                time_limit_minutes=_parse_limit(text.split(":", 1)[1]),
+            )
+        elif lowered.startswith("предпочтения:"):
+            payload = text.split(":", 1)[1]
+            parts = [p.strip() for p in payload.split(";") if p.strip()]
+            updates: dict[str, object] = {}
+            for part in parts:
+                if "=" not in part:
+                    continue
+                key, value = [x.strip().lower() for x in part.split("=", 1)]
+                if key == "кухня":
+                    updates["preferred_cuisine"] = _parse_optional_text(value)
+                elif key == "сложность":
+                    updates["preferred_complexity"] = _parse_optional_text(value)
+                elif key == "лимит":
+                    updates["time_limit_minutes"] = _parse_limit(value)
+            await repo.update_user_settings(user_id, **updates)
+        elif lowered in {"показать", "настройки", "/settings"}:
+            pass
+    except ValueError as exc:
+        await message.answer(str(exc))
+        return
+
+    settings = await repo.get_user_settings(user_id)
+    await uow.commit()
 
     await state.set_state(UserMode.editing_settings)
     await message.answer(_format_settings(settings), reply_markup=settings_keyboard())
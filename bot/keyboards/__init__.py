@@ -1,4 +1,11 @@
-from bot.keyboards.browse import BrowseContext, browse_keyboard, parse_context, recipe_actions_keyboard
+from bot.keyboards.browse import (
+    BrowseContext,
+    browse_keyboard,
+    decode_cursor,
+    encode_cursor,
+    parse_context,
+    recipe_actions_keyboard,
+)
 from bot.keyboards.main_menu import (
     MENU_FAVORITES,
     MENU_HISTORY,
@@ -19,6 +26,8 @@ __all__ = [
     "MENU_SETTINGS",
     "MENU_TOP",
     "browse_keyboard",
+    "decode_cursor",
+    "encode_cursor",
     "main_menu_inline_keyboard",
     "main_menu_keyboard",
     "parse_context",
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
 
 @dataclass(slots=True, frozen=True)
 class BrowseContext:
@@ -13,6 +14,8 @@ class BrowseContext:
     only_liked: bool = False
     fast: bool = False
     vegetarian: bool = False
+    # Keyset cursor of the rendered page, see encode_cursor.
+    cursor: str = ""
 
     @property
     def flags(self) -> str:
@@ -21,7 +24,7 @@ class BrowseContext:
             for flag in (self.only_my, self.only_liked, self.fast, self.vegetarian)
         )
 
-    def with_page(self, page: int) -> "BrowseContext":
+    def with_page(self, page: int, cursor: str = "") -> "BrowseContext":
         return BrowseContext(
             scope=self.scope,
             page=max(page, 1),
@@ -29,8 +32,13 @@ class BrowseContext:
             only_liked=self.only_liked,
             fast=self.fast,
             vegetarian=self.vegetarian,
+            cursor=cursor,
         )
 
+    @property
+    def list_callback(self) -> str:
+        return f"L:{self.scope}:{self.page}:{self.flags}:{self.cursor}"
+
     def toggled(self, key: str) -> "BrowseContext":
         return BrowseContext(
             scope=self.scope,
@@ -42,7 +50,7 @@ class BrowseContext:
         )
 
 
-def parse_context(scope: str, page: str, flags: str) -> BrowseContext:
+def parse_context(scope: str, page: str, flags: str, cursor: str = "") -> BrowseContext:
     padded = (flags or "0000").ljust(4, "0")
     return BrowseContext(
         scope=scope,
@@ -51,37 +59,62 @@ def parse_context(scope: str, page: str, flags: str) -> BrowseContext:
         only_liked=padded[1] == "1",
         fast=padded[2] == "1",
         vegetarian=padded[3] == "1",
+        cursor=cursor,
     )
 
 
+def encode_cursor(recipe_id: int, before: bool = False) -> str:
+    # "n<id>" = rows after the recipe, "p<id>" = rows before it; base36 keeps
+    # callback data well under Telegram's 64-byte limit.
+    digits = ""
+    value = recipe_id
+    while True:
+        value, remainder = divmod(value, 36)
+        digits = _BASE36[remainder] + digits
+        if value == 0:
+            break
+    return f"{'p' if before else 'n'}{digits}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, bool] | None:
+    if len(cursor) < 2 or cursor[0] not in "np":
+        return None
+    try:
+        return int(cursor[1:], 36), cursor[0] == "p"
+    except ValueError:
+        return None
+
+
 def browse_keyboard(
     recipes: list[tuple[int, str, int]],
     context: BrowseContext,
     total_pages: int,
+    prev_cursor: str | None,
+    next_cursor: str | None,
 ) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
 
     for recipe_id, title, rating in recipes:
         text = f"#{recipe_id} {title[:28]} · {rating:+d}"
-        callback_data = f"O:{recipe_id}:{context.scope}:{context.page}:{context.flags}"
+        callback_data = f"O:{recipe_id}:{context.scope}:{context.page}:{context.flags}:{context.cursor}"
         rows.append([InlineKeyboardButton(text=text, callback_data=callback_data)])
 
     nav_row: list[InlineKeyboardButton] = []
-    if context.page > 1:
+    if prev_cursor is not None:
         nav_row.append(
             InlineKeyboardButton(
                 text="⬅️",
-                callback_data=f"L:{context.scope}:{context.page - 1}:{context.flags}",
+                callback_data=context.with_page(context.page - 1, prev_cursor).list_callback,
             )
         )
     nav_row.append(
-        InlineKeyboardButton(text=f"{context.page}/{max(total_pages, 1)}", callback_data="noop")
+        InlineKeyboardButton(text=f"{context.page}/{max(total_pages, context.page)}", callback_data="noop")
     )
-    if context.page < total_pages:
+    if next_cursor is not None:
         nav_row.append(
             InlineKeyboardButton(
                 text="➡️",
-                callback_data=f"L:{context.scope}:{context.page + 1}:{context.flags}",
+                callback_data=context.with_page(context.page + 1, next_cursor).list_callback,
             )
         )
     rows.append(nav_row)
@@ -114,15 +147,23 @@ def browse_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def recipe_actions_keyboard(recipe_id: int, is_favorite: bool) -> InlineKeyboardMarkup:
+def recipe_actions_keyboard(
+    recipe_id: int,
+    is_favorite: bool,
+    steps_pending: bool = False,
+    viewer_vote: int = 0,
+) -> InlineKeyboardMarkup:
     favorite_text = "⭐ Убрать из избранного" if is_favorite else "⭐ В избранное"
     favorite_callback = f"R:{recipe_id}" if is_favorite else f"A:{recipe_id}"
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="👍 Лайк", callback_data=f"V:{recipe_id}:1"),
-                InlineKeyboardButton(text="👎 Дизлайк", callback_data=f"V:{recipe_id}:-1"),
-            ],
-            [InlineKeyboardButton(text=favorite_text, callback_data=favorite_callback)],
-        ]
-    )
+    like_text = "✅ 👍 Лайк" if viewer_vote > 0 else "👍 Лайк"
+    dislike_text = "✅ 👎 Дизлайк" if viewer_vote < 0 else "👎 Дизлайк"
+    rows = [
+        [
+            InlineKeyboardButton(text=like_text, callback_data=f"V:{recipe_id}:1"),
+            InlineKeyboardButton(text=dislike_text, callback_data=f"V:{recipe_id}:-1"),
+        ],
+        [InlineKeyboardButton(text=favorite_text, callback_data=favorite_callback)],
+    ]
+    if steps_pending:
+        rows.insert(0, [InlineKeyboardButton(text="📋 Показать шаги", callback_data=f"D:{recipe_id}")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -1,10 +1,14 @@
 import asyncio
+import time
+from pathlib import Path
 
 import structlog
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy.exc import SQLAlchemyError
 
 from bot.handlers import (
+    admin_router,
     browse_router,
     ingredients_router,
     menu_router,
@@ -13,21 +17,102 @@ from bot.handlers import (
     start_router,
 )
 from bot.middlewares.logging import UpdateLoggingMiddleware
+from bot.middlewares.unit_of_work import UnitOfWorkMiddleware
+from bot.recipe_steps import cancel_steps_prefetch
 from core.config import settings
 from core.logging import configure_logging
-from db.session import init_models
+from core.services.lexicon_reload import LexiconWatcher, reload_lexicons
+from core.services.plate_cooccurrence import rebuild_cooccurrence_model
+from core.services.plate_learning import load_learned_plate_groups, refresh_learned_plate_groups
+from core.services.recipe_index_snapshot import restore_snapshot, write_snapshot
+from core.services.recipe_text_index import recipe_text_index, sync_recipe_text_index
+from db.repo import RecipeRepository
+from db.session import SessionFactory, init_models, pool_info
 
 logger = structlog.get_logger(__name__)
 
 
+def _snapshot_path() -> Path | None:
+    return Path(settings.recipe_index_snapshot_path) if settings.recipe_index_snapshot_path else None
+
+
+async def warm_recipe_text_index() -> None:
+    started = time.perf_counter()
+    snapshot_path = _snapshot_path()
+    restored = snapshot_path is not None and restore_snapshot(snapshot_path, recipe_text_index)
+    snapshot_ms = (time.perf_counter() - started) * 1000
+
+    async with SessionFactory() as session:
+        caught_up = await sync_recipe_text_index(RecipeRepository(session))
+    logger.info(
+        "recipe_index_ready",
+        source="snapshot" if restored else "db",
+        documents=len(recipe_text_index),
+        caught_up=caught_up,
+        high_water_mark=recipe_text_index.high_water_mark,
+        snapshot_ms=round(snapshot_ms, 2),
+        total_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+async def save_recipe_text_index() -> None:
+    snapshot_path = _snapshot_path()
+    if snapshot_path is None:
+        return
+    size = await asyncio.to_thread(write_snapshot, recipe_text_index, snapshot_path)
+    logger.info("recipe_index_snapshot_saved", path=str(snapshot_path), bytes=size)
+
+
+async def load_plate_models() -> None:
+    try:
+        async with SessionFactory() as session:
+            repo = RecipeRepository(session)
+            loaded = await load_learned_plate_groups(repo)
+            await rebuild_cooccurrence_model(repo)
+    except SQLAlchemyError as exc:
+        logger.warning("plate_models_load_failed", error=str(exc))
+        return
+    logger.info("plate_groups_loaded", ingredients=loaded)
+
+
+async def refresh_plate_models_periodically(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with SessionFactory() as session:
+                repo = RecipeRepository(session)
+                await refresh_learned_plate_groups(repo)
+                await rebuild_cooccurrence_model(repo)
+        except Exception:
+            # Any failure skips this round only; a dead task would freeze the
+            # models for the life of the process. CancelledError is not an
+            # Exception, so shutdown still stops the loop.
+            logger.exception("plate_models_refresh_failed")
+
+
 async def main() -> None:
     configure_logging(settings.log_level)
     logger.info("bot_starting")
     await init_models()
+    await warm_recipe_text_index()
+    await load_plate_models()
+    lexicon_dir = Path(settings.lexicon_dir) if settings.lexicon_dir else None
+    if lexicon_dir is not None:
+        await reload_lexicons(lexicon_dir)
+    background_tasks: list[asyncio.Task] = []
+    if settings.lexicon_watch_interval_seconds > 0:
+        watcher = LexiconWatcher(lexicon_dir, settings.lexicon_watch_interval_seconds)
+        background_tasks.append(asyncio.create_task(watcher.run()))
+    if settings.plate_mining_interval_seconds > 0:
+        background_tasks.append(
+            asyncio.create_task(refresh_plate_models_periodically(settings.plate_mining_interval_seconds))
+        )
 
     dp = Dispatcher(storage=MemoryStorage())
     dp.update.middleware(UpdateLoggingMiddleware())
+    dp.update.middleware(UnitOfWorkMiddleware())
     dp.include_router(start_router)
+    dp.include_router(admin_router)
     dp.include_router(ingredients_router)
     dp.include_router(ready_dish_router)
     dp.include_router(browse_router)
@@ -35,7 +120,16 @@ async def main() -> None:
     dp.include_router(menu_router)
 
     bot = Bot(token=settings.tg_token)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await cancel_steps_prefetch()
+        await save_recipe_text_index()
+        pool = pool_info()
+        if pool is not None:
+            logger.info("db_pool_stats", **pool)
 
 
 if __name__ == "__main__":
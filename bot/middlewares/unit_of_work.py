@@ -0,0 +1,34 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from db.session import SessionFactory
+from db.unit_of_work import UnitOfWork
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    # Handlers receive the unit of work as the `uow` argument; nothing touches
+    # the pool until they first use `uow.repo`.
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = SessionFactory) -> None:
+        self.session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        uow = UnitOfWork(self.session_factory)
+        data["uow"] = uow
+        try:
+            result = await handler(event, data)
+            await uow.commit()
+            return result
+        except Exception:
+            await uow.rollback()
+            raise
+        finally:
+            await uow.close()
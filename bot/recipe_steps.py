@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+
+import structlog
+
+from core.config import settings
+from core.services.gigachat_service import GigaChatClient
+from db.repo import RecipeRepository
+from db.session import SessionFactory
+from schemas import RecipeResponse, RecipeSummary, parse_stored_recipe
+
+logger = structlog.get_logger(__name__)
+
+# recipe id -> running second-phase generation; a prefetch and a "show steps"
+# tap for the same recipe share one GigaChat call.
+_in_flight: dict[int, asyncio.Task[RecipeResponse | None]] = {}
+
+
+async def _complete_steps(recipe_id: int, summary: RecipeSummary | None) -> RecipeResponse | None:
+    if summary is None:
+        async with SessionFactory() as session:
+            payload = await RecipeRepository(session).get_recipe_payload(recipe_id)
+        if payload is None:
+            return None
+        summary = parse_stored_recipe(payload)
+    if isinstance(summary, RecipeResponse):
+        return summary
+
+    detailed = await GigaChatClient().generate_steps(summary)
+    async with SessionFactory() as session:
+        await RecipeRepository(session).update_recipe_steps(recipe_id, detailed.steps)
+        await session.commit()
+    logger.info("recipe_steps_saved", recipe_id=recipe_id, steps=len(detailed.steps))
+    return detailed
+
+
+def _start(recipe_id: int, summary: RecipeSummary | None) -> asyncio.Task[RecipeResponse | None]:
+    task = _in_flight.get(recipe_id)
+    if task is None:
+        task = asyncio.create_task(_complete_steps(recipe_id, summary))
+        _in_flight[recipe_id] = task
+        task.add_done_callback(lambda done: _in_flight.pop(recipe_id, None))
+    return task
+
+
+def _log_prefetch_result(task: asyncio.Task[RecipeResponse | None]) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("recipe_steps_prefetch_failed", error=str(task.exception()))
+
+
+def schedule_recipe_steps(recipe_id: int, summary: RecipeSummary) -> None:
+    # Without prefetch the steps are generated on the first "show steps" tap.
+    if settings.gigachat_prefetch_steps:
+        _start(recipe_id, summary).add_done_callback(_log_prefetch_result)
+
+
+async def ensure_recipe_steps(recipe_id: int) -> RecipeResponse | None:
+    # shield: a cancelled callback handler must not cancel a shared prefetch.
+    return await asyncio.shield(_start(recipe_id, None))
+
+
+async def cancel_steps_prefetch() -> None:
+    tasks = list(_in_flight.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,6 +23,10 @@ class Settings(BaseSettings):
     gigachat_ca_bundle: str = Field("", alias="GIGACHAT_CA_BUNDLE")
     gigachat_timeout_seconds: float = Field(30.0, alias="GIGACHAT_TIMEOUT_SECONDS")
     gigachat_max_retries: int = Field(3, alias="GIGACHAT_MAX_RETRIES")
+    gigachat_streaming: bool = Field(True, alias="GIGACHAT_STREAMING")
+    gigachat_output_format: Literal["full", "compact", "ab"] = Field("full", alias="GIGACHAT_OUTPUT_FORMAT")
+    gigachat_two_phase: bool = Field(False, alias="GIGACHAT_TWO_PHASE")
+    gigachat_prefetch_steps: bool = Field(True, alias="GIGACHAT_PREFETCH_STEPS")
     db_backend: str = Field("sqlite", alias="DB_BACKEND")
     db_dsn: str = Field("", alias="DB_DSN")
     db_dsn_sqlite: str = Field("sqlite+aiosqlite:///./app.db", alias="DB_DSN_SQLITE")
@@ -30,6 +35,25 @@ class Settings(BaseSettings):
         alias="DB_DSN_MYSQL",
     )
     db_auto_create: bool = Field(False, alias="DB_AUTO_CREATE")
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(30.0, alias="DB_POOL_TIMEOUT_SECONDS")
+    db_pool_recycle_seconds: int = Field(1800, alias="DB_POOL_RECYCLE_SECONDS")
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    db_sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"] = Field(
+        "WAL",
+        alias="DB_SQLITE_JOURNAL_MODE",
+    )
+    db_sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field("NORMAL", alias="DB_SQLITE_SYNCHRONOUS")
+    db_sqlite_busy_timeout_ms: int = Field(5000, alias="DB_SQLITE_BUSY_TIMEOUT_MS")
+    user_cache_size: int = Field(10000, alias="USER_CACHE_SIZE")
+    user_cache_ttl_seconds: float = Field(600.0, alias="USER_CACHE_TTL_SECONDS")
+    recipe_index_snapshot_path: str = Field("./var/recipe_index.snapshot", alias="RECIPE_INDEX_SNAPSHOT_PATH")
+    lexicon_dir: str = Field("", alias="LEXICON_DIR")
+    lexicon_watch_interval_seconds: float = Field(5.0, alias="LEXICON_WATCH_INTERVAL_SECONDS")
+    plate_mining_interval_seconds: float = Field(21600.0, alias="PLATE_MINING_INTERVAL_SECONDS")
+    admin_tg_ids: str = Field("", alias="ADMIN_TG_IDS")
+    record_recipe_requests: bool = Field(False, alias="RECORD_RECIPE_REQUESTS")
     log_level: str = Field("INFO", alias="LOG_LEVEL")
 
     model_config = SettingsConfigDict(
@@ -51,6 +75,10 @@ class Settings(BaseSettings):
         # Backward compatibility: GIGACHAT_TOKEN may store Basic key in existing setups.
         return self.gigachat_auth_key or self.gigachat_token
 
+    @property
+    def admin_ids(self) -> frozenset[int]:
+        return frozenset(int(value) for value in self.admin_tg_ids.replace(";", ",").split(",") if value.strip())
+
 
 @lru_cache
 def get_settings() -> Settings:
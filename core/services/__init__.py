@@ -1,22 +1,41 @@
 from core.services.gigachat_service import GigaChatClient, GigaChatError
+from core.services.ingredient_canonicalizer import canonical_ingredient_set, canonicalize_ingredient
 from core.services.plate_service import PlateAnalysis, PlateService
-from core.services.recipe_match_service import RecipeMatch, find_best_recipe_match
+from core.services.recipe_match_service import (
+    MatchConstraints,
+    RecipeMatch,
+    find_best_recipe_match,
+    find_top_matches,
+)
+from core.services.recipe_text_index import RecipeTextIndex, TextMatch, TextQuery, parse_text_query
 from core.services.safety_service import (
     SafetyResult,
+    TermMatch,
     build_block_message,
     check_recipe_output,
     check_user_input,
+    find_prohibited_terms,
 )
 
 __all__ = [
     "GigaChatClient",
     "GigaChatError",
+    "MatchConstraints",
     "PlateAnalysis",
     "PlateService",
     "RecipeMatch",
+    "RecipeTextIndex",
     "SafetyResult",
+    "TermMatch",
+    "TextMatch",
+    "TextQuery",
     "build_block_message",
+    "canonical_ingredient_set",
+    "canonicalize_ingredient",
     "check_recipe_output",
     "check_user_input",
     "find_best_recipe_match",
+    "find_prohibited_terms",
+    "find_top_matches",
+    "parse_text_query",
 ]
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import asyncio
 import json
+import random
 import re
-from typing import Any
+import time
+from collections.abc import Callable
+from typing import Any, Literal, TypeVar
 
 import structlog
 from gigachat import GigaChat
@@ -11,13 +14,21 @@ from gigachat import exceptions as gigachat_exceptions
 from pydantic import ValidationError
 
 from core.config import settings
+from core.services.nutrition_service import compute_nutrition
 from core.services.prompt_templates import (
+    COMPACT_RESPONSE_CONTRACT,
+    COMPACT_SUMMARY_CONTRACT,
+    FULL_RESPONSE_CONTRACT,
+    FULL_SUMMARY_CONTRACT,
     INGREDIENTS_PROMPT_TEMPLATE,
     READY_DISH_PROMPT_TEMPLATE,
+    STEPS_PROMPT_TEMPLATE,
+    STEPS_REQUIREMENTS,
+    SUMMARY_STEPS_NOTE,
     SYSTEM_PROMPT,
 )
-from core.services.safety_service import check_recipe_output
-from schemas import RecipeResponse
+from core.services.safety_service import GATED_RECIPE_FIELDS, StreamingSafetyScanner, check_recipe_output
+from schemas import CompactDecodeError, RecipeResponse, RecipeSteps, RecipeSummary, expand_compact_payload
 
 logger = structlog.get_logger(__name__)
 
@@ -36,6 +47,25 @@ BadRequestError = getattr(gigachat_exceptions, "BadRequestError", _MissingSDKExc
 ResponseError = getattr(gigachat_exceptions, "ResponseError", _MissingSDKException)
 
 
+OutputFormat = Literal["full", "compact"]
+
+_RESPONSE_CONTRACTS: dict[str, str] = {
+    "full": FULL_RESPONSE_CONTRACT,
+    "compact": COMPACT_RESPONSE_CONTRACT,
+}
+_SUMMARY_CONTRACTS: dict[str, str] = {
+    "full": FULL_SUMMARY_CONTRACT,
+    "compact": COMPACT_SUMMARY_CONTRACT,
+}
+
+RECIPE_MAX_TOKENS = 900
+SUMMARY_MAX_TOKENS = 450
+STEPS_MAX_TOKENS = 700
+
+ResultT = TypeVar("ResultT")
+SummaryT = TypeVar("SummaryT", bound=RecipeSummary)
+
+
 class GigaChatError(RuntimeError):
     pass
 
@@ -51,6 +81,9 @@ class GigaChatClient:
         model: str | None = None,
         timeout_seconds: float | None = None,
         max_retries: int | None = None,
+        streaming: bool | None = None,
+        output_format: str | None = None,
+        two_phase: bool | None = None,
     ) -> None:
         self.auth_key = (
             auth_key
@@ -67,6 +100,17 @@ class GigaChatClient:
             timeout_seconds if timeout_seconds is not None else settings.gigachat_timeout_seconds
         )
         self.max_retries = max_retries if max_retries is not None else settings.gigachat_max_retries
+        self.streaming = streaming if streaming is not None else settings.gigachat_streaming
+        self.output_format = output_format if output_format is not None else settings.gigachat_output_format
+        self.two_phase = two_phase if two_phase is not None else settings.gigachat_two_phase
+        if self.output_format not in (*_RESPONSE_CONTRACTS, "ab"):
+            raise GigaChatError(f"Unknown GIGACHAT_OUTPUT_FORMAT: {self.output_format}")
+
+    def _pick_output_format(self) -> OutputFormat:
+        if self.output_format == "ab":
+            # Each request is assigned at random; the stats log carries the arm.
+            return random.choice(("full", "compact"))
+        return self.output_format  # type: ignore[return-value]
 
     @staticmethod
     def _extract_json(text: str) -> dict[str, Any]:
@@ -114,6 +158,82 @@ class GigaChatClient:
 
         raise GigaChatError("GigaChat SDK client doesn't provide chat/achat methods")
 
+    @staticmethod
+    def _extract_chunk_content(chunk: Any) -> str:
+        if isinstance(chunk, dict):
+            return str(chunk.get("choices", [{}])[0].get("delta", {}).get("content") or "")
+
+        choices = getattr(chunk, "choices", None)
+        if choices:
+            delta = getattr(choices[0], "delta", None)
+            if delta is not None:
+                return str(getattr(delta, "content", None) or "")
+        return ""
+
+    @staticmethod
+    def _extract_completion_tokens(response: Any) -> int | None:
+        usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+        if isinstance(usage, dict):
+            value = usage.get("completion_tokens")
+        else:
+            value = getattr(usage, "completion_tokens", None)
+        return value if isinstance(value, int) else None
+
+    async def _sdk_stream(
+        self,
+        client: Any,
+        request_payload: dict[str, Any],
+        scenario: str,
+    ) -> tuple[str, int | None] | None:
+        astream = getattr(client, "astream", None)
+        if not self.streaming or not callable(astream):
+            return None
+
+        scanner = StreamingSafetyScanner(GATED_RECIPE_FIELDS)
+        parts: list[str] = []
+        completion_tokens: int | None = None
+        stream = astream({**request_payload, "stream": True})
+        try:
+            async for chunk in stream:
+                # Usage, when the API sends it, arrives with the last chunk.
+                completion_tokens = self._extract_completion_tokens(chunk) or completion_tokens
+                content = self._extract_chunk_content(chunk)
+                if not content:
+                    continue
+                parts.append(content)
+                safety_result = scanner.feed(content)
+                if not safety_result.is_safe:
+                    # Leaving the loop closes the stream, which cancels the
+                    # in-flight HTTP request before the rest is generated.
+                    logger.warning(
+                        "gigachat_stream_aborted_by_safety",
+                        scenario=scenario,
+                        category=safety_result.category,
+                        matched_terms=list(safety_result.matched_terms),
+                        chars_received=scanner.chars_seen,
+                    )
+                    raise GigaChatError(
+                        "UNSAFE_RECIPE: "
+                        f"category={safety_result.category}; terms={','.join(safety_result.matched_terms)}"
+                    )
+        finally:
+            aclose = getattr(stream, "aclose", None)
+            if callable(aclose):
+                await aclose()
+        return "".join(parts).strip(), completion_tokens
+
+    async def _generate_text(
+        self,
+        client: Any,
+        request_payload: dict[str, Any],
+        scenario: str,
+    ) -> tuple[str, int | None]:
+        streamed = await self._sdk_stream(client, request_payload, scenario)
+        if streamed is not None:
+            return streamed
+        response = await self._sdk_chat(client, request_payload)
+        return self._extract_response_content(response), self._extract_completion_tokens(response)
+
     @staticmethod
     def _extract_response_content(response: Any) -> str:
         if isinstance(response, dict):
@@ -172,11 +292,14 @@ class GigaChatClient:
         ingredients: list[str],
         missing_groups: list[str],
         user_preferences: str | None = None,
+        output_format: OutputFormat = "full",
+        summary_only: bool = False,
     ) -> list[dict[str, str]]:
         user_prompt = INGREDIENTS_PROMPT_TEMPLATE.format(
             ingredients=self._format_list(ingredients),
             missing_groups=self._format_list(missing_groups),
             user_preferences=user_preferences or "нет",
+            **self._contract_parts(output_format, summary_only),
         )
         return [
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -187,23 +310,98 @@ class GigaChatClient:
         self,
         dish_request: str,
         user_preferences: str | None = None,
+        output_format: OutputFormat = "full",
+        summary_only: bool = False,
     ) -> list[dict[str, str]]:
         user_prompt = READY_DISH_PROMPT_TEMPLATE.format(
             dish_request=dish_request.strip(),
             user_preferences=user_preferences or "нет",
+            **self._contract_parts(output_format, summary_only),
+        )
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt.strip()},
+        ]
+
+    def _build_messages_for_steps(self, summary: RecipeSummary) -> list[dict[str, str]]:
+        user_prompt = STEPS_PROMPT_TEMPLATE.format(
+            title=summary.title,
+            ingredients="\n".join(f"- {item}" for item in summary.ingredients),
+            time_minutes=summary.time_minutes,
+            servings=summary.servings,
+            steps_requirements=STEPS_REQUIREMENTS,
         )
         return [
             {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt.strip()},
         ]
 
-    async def _request_recipe(self, messages: list[dict[str, str]], scenario: str) -> RecipeResponse:
+    @staticmethod
+    def _contract_parts(output_format: OutputFormat, summary_only: bool) -> dict[str, str]:
+        if summary_only:
+            return {
+                "response_contract": _SUMMARY_CONTRACTS[output_format],
+                "steps_requirements": SUMMARY_STEPS_NOTE,
+            }
+        return {
+            "response_contract": _RESPONSE_CONTRACTS[output_format],
+            "steps_requirements": STEPS_REQUIREMENTS,
+        }
+
+    @staticmethod
+    def _check_safety(scenario: str, title: str, ingredients: list[str], steps: list[str]) -> None:
+        safety_result = check_recipe_output(recipe_title=title, ingredients=ingredients, steps=steps)
+        if not safety_result.is_safe:
+            logger.warning(
+                "gigachat_recipe_blocked_by_safety",
+                scenario=scenario,
+                category=safety_result.category,
+                matched_terms=list(safety_result.matched_terms),
+            )
+            raise GigaChatError(
+                "UNSAFE_RECIPE: "
+                f"category={safety_result.category}; terms={','.join(safety_result.matched_terms)}"
+            )
+
+    @classmethod
+    def _parse_recipe(cls, model: type[SummaryT], parsed: dict[str, Any], scenario: str) -> SummaryT:
+        validated = model.model_validate(parsed)
+        cls._check_safety(scenario, validated.title, validated.ingredients, getattr(validated, "steps", []))
+        # Nutrition is no longer requested from the model; it is derived
+        # from the ingredient quantities so it stays consistent.
+        nutrition = compute_nutrition(validated.ingredients, validated.servings)
+        if nutrition is not None:
+            validated = validated.model_copy(update={"nutrition": nutrition})
+        return validated
+
+    async def _request_recipe(
+        self,
+        messages: list[dict[str, str]],
+        scenario: str,
+        output_format: OutputFormat = "full",
+    ) -> RecipeResponse:
+        return await self._request_validated(
+            messages,
+            scenario,
+            output_format,
+            RECIPE_MAX_TOKENS,
+            lambda parsed: self._parse_recipe(RecipeResponse, parsed, scenario),
+        )
+
+    async def _request_validated(
+        self,
+        messages: list[dict[str, str]],
+        scenario: str,
+        output_format: OutputFormat,
+        max_tokens: int,
+        validate: Callable[[dict[str, Any]], ResultT],
+    ) -> ResultT:
         request_payload = {
             "model": self.model,
             "messages": messages,
             "n": 1,
             "stream": False,
-            "max_tokens": 900,
+            "max_tokens": max_tokens,
             "repetition_penalty": 1,
             "update_interval": 0,
             "temperature": 0.3,
@@ -213,38 +411,33 @@ class GigaChatClient:
 
         for attempt in range(1, self.max_retries + 1):
             try:
+                started = time.perf_counter()
                 client = GigaChat(**self._build_gigachat_kwargs())
                 if hasattr(client, "__aenter__") and hasattr(client, "__aexit__"):
                     async with client as sdk_client:
-                        response = await self._sdk_chat(sdk_client, request_payload)
+                        llm_text, completion_tokens = await self._generate_text(sdk_client, request_payload, scenario)
                 elif hasattr(client, "__enter__") and hasattr(client, "__exit__"):
                     with client as sdk_client:
-                        response = await self._sdk_chat(sdk_client, request_payload)
+                        llm_text, completion_tokens = await self._generate_text(sdk_client, request_payload, scenario)
                 else:
-                    response = await self._sdk_chat(client, request_payload)
+                    llm_text, completion_tokens = await self._generate_text(client, request_payload, scenario)
+                logger.info(
+                    "gigachat_generation_stats",
+                    scenario=scenario,
+                    output_format=output_format,
+                    attempt=attempt,
+                    latency_ms=round((time.perf_counter() - started) * 1000, 2),
+                    completion_tokens=completion_tokens,
+                    response_chars=len(llm_text),
+                )
 
-                llm_text = self._extract_response_content(response)
                 if not llm_text:
                     raise GigaChatError("LLM returned empty response")
 
                 parsed = self._extract_json(llm_text)
-                validated = RecipeResponse.model_validate(parsed)
-                safety_result = check_recipe_output(
-                    recipe_title=validated.title,
-                    ingredients=validated.ingredients,
-                    steps=validated.steps,
-                )
-                if not safety_result.is_safe:
-                    logger.warning(
-                        "gigachat_recipe_blocked_by_safety",
-                        scenario=scenario,
-                        category=safety_result.category,
-                        matched_terms=list(safety_result.matched_terms),
-                    )
-                    raise GigaChatError(
-                        "UNSAFE_RECIPE: "
-                        f"category={safety_result.category}; terms={','.join(safety_result.matched_terms)}"
-                    )
+                if output_format == "compact":
+                    parsed = expand_compact_payload(parsed)
+                validated = validate(parsed)
                 logger.info("gigachat_recipe_validated", attempt=attempt, scenario=scenario)
                 return validated
             except AuthenticationError as exc:
@@ -262,7 +455,7 @@ class GigaChatClient:
                     max_retries=self.max_retries,
                     error=str(last_error),
                 )
-            except (json.JSONDecodeError, ValidationError, GigaChatError) as exc:
+            except (json.JSONDecodeError, CompactDecodeError, ValidationError, GigaChatError) as exc:
                 last_error = exc
                 logger.warning(
                     "gigachat_attempt_failed",
@@ -301,12 +494,36 @@ class GigaChatClient:
         missing_groups: list[str],
         user_preferences: str | None = None,
     ) -> RecipeResponse:
+        output_format = self._pick_output_format()
         messages = self._build_messages_for_ingredients(
             ingredients=ingredients,
             missing_groups=missing_groups,
             user_preferences=user_preferences,
+            output_format=output_format,
+        )
+        return await self._request_recipe(messages=messages, scenario="ingredients", output_format=output_format)
+
+    async def generate_summary_from_ingredients(
+        self,
+        ingredients: list[str],
+        missing_groups: list[str],
+        user_preferences: str | None = None,
+    ) -> RecipeSummary:
+        output_format = self._pick_output_format()
+        messages = self._build_messages_for_ingredients(
+            ingredients=ingredients,
+            missing_groups=missing_groups,
+            user_preferences=user_preferences,
+            output_format=output_format,
+            summary_only=True,
+        )
+        return await self._request_validated(
+            messages,
+            "ingredients_summary",
+            output_format,
+            SUMMARY_MAX_TOKENS,
+            lambda parsed: self._parse_recipe(RecipeSummary, parsed, "ingredients_summary"),
         )
-        return await self._request_recipe(messages=messages, scenario="ingredients")
 
     async def generate_ready_dish(
         self,
@@ -317,8 +534,48 @@ class GigaChatClient:
         if not normalized_request:
             raise GigaChatError("Dish request is empty")
 
+        output_format = self._pick_output_format()
+        messages = self._build_messages_for_ready_dish(
+            dish_request=normalized_request,
+            user_preferences=user_preferences,
+            output_format=output_format,
+        )
+        return await self._request_recipe(messages=messages, scenario="ready_dish", output_format=output_format)
+
+    async def generate_ready_dish_summary(
+        self,
+        dish_request: str,
+        user_preferences: str | None = None,
+    ) -> RecipeSummary:
+        normalized_request = dish_request.strip()
+        if not normalized_request:
+            raise GigaChatError("Dish request is empty")
+
+        output_format = self._pick_output_format()
         messages = self._build_messages_for_ready_dish(
             dish_request=normalized_request,
             user_preferences=user_preferences,
+            output_format=output_format,
+            summary_only=True,
+        )
+        return await self._request_validated(
+            messages,
+            "ready_dish_summary",
+            output_format,
+            SUMMARY_MAX_TOKENS,
+            lambda parsed: self._parse_recipe(RecipeSummary, parsed, "ready_dish_summary"),
+        )
+
+    async def generate_steps(self, summary: RecipeSummary) -> RecipeResponse:
+        def validate(parsed: dict[str, Any]) -> RecipeResponse:
+            steps = RecipeSteps.model_validate(parsed).steps
+            self._check_safety("steps", summary.title, summary.ingredients, steps)
+            return RecipeResponse.model_validate({**summary.model_dump(by_alias=True), "steps": steps})
+
+        return await self._request_validated(
+            self._build_messages_for_steps(summary),
+            "steps",
+            "full",
+            STEPS_MAX_TOKENS,
+            validate,
         )
-        return await self._request_recipe(messages=messages, scenario="ready_dish")
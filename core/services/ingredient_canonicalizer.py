@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import re
+import zlib
+from functools import lru_cache
+
+from core.services.text_normalization import fold_case
+
+CANONICAL_CACHE_SIZE = 8192
+# Bump when the canonicalization code changes; the tables below are covered
+# by CANONICALIZER_FINGERPRINT automatically.
+CANONICALIZER_VERSION = 1
+
+_QUANTITY_RE = re.compile(r"\d+(?:[.,/]\d+)?(?:\s*[-–—]\s*\d+(?:[.,/]\d+)?)?")
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+_SPOON_RE = re.compile(r"\b(?:ч|ст|дес)\s*\.?\s*л\b\.?")
+_NON_WORD_RE = re.compile(r"[^a-zа-я\s]+")
+
+_UNITS = frozenset(
+    {
+        "г",
+        "гр",
+        "грамм",
+        "граммов",
+        "грамма",
+        "кг",
+        "мг",
+        "мл",
+        "л",
+        "литр",
+        "литра",
+        "шт",
+        "штук",
+        "штуки",
+        "штука",
+        "стакан",
+        "стакана",
+        "стаканов",
+        "зубчик",
+        "зубчика",
+        "зубчиков",
+        "пучок",
+        "пучка",
+        "щепотка",
+        "щепотки",
+        "ломтик",
+        "ломтика",
+        "ломтиков",
+        "банка",
+        "банки",
+        "упаковка",
+        "g",
+        "kg",
+        "ml",
+        "l",
+        "pcs",
+        "tsp",
+        "tbsp",
+    }
+)
+
+_FILLER_WORDS = frozenset(
+    {
+        "по",
+        "вкусу",
+        "для",
+        "подачи",
+        "и",
+        "или",
+        "с",
+        "без",
+        "свежий",
+        "свежая",
+        "свежее",
+        "свежие",
+        "свежих",
+        "свежей",
+        "мелкий",
+        "мелкая",
+        "мелкие",
+        "крупный",
+        "крупная",
+        "крупные",
+        "примерно",
+        "около",
+    }
+)
+
+# Longest endings first: the first matching suffix wins.
+_ENDINGS = tuple(
+    sorted(
+        (
+            "ями",
+            "ами",
+            "ого",
+            "его",
+            "ому",
+            "ему",
+            "ыми",
+            "ими",
+            "ой",
+            "ей",
+            "ий",
+            "ый",
+            "ая",
+            "яя",
+            "ое",
+            "ее",
+            "ые",
+            "ие",
+            "ую",
+            "юю",
+            "ых",
+            "их",
+            "ов",
+            "ев",
+            "ам",
+            "ям",
+            "ах",
+            "ях",
+            "ом",
+            "ем",
+            "а",
+            "я",
+            "о",
+            "е",
+            "ы",
+            "и",
+            "у",
+            "ю",
+            "ь",
+            "й",
+        ),
+        key=len,
+        reverse=True,
+    )
+)
+_MIN_STEM_LENGTH = 3
+
+# Raw spellings on both sides; keys and values are canonicalized at import time.
+_TOKEN_SYNONYMS_RAW: dict[str, str] = {
+    "томат": "помидор",
+    "томаты": "помидор",
+    "черри": "помидор",
+    "куриный": "курица",
+    "куриная": "курица",
+    "цыпленок": "курица",
+    "картошка": "картофель",
+    "кабачки": "кабачок",
+    "цукини": "кабачок",
+    "гречневая": "гречка",
+    "овсяные": "овсянка",
+    "яичный": "яйцо",
+    "яиц": "яйцо",
+}
+
+_PHRASE_SYNONYMS_RAW: dict[str, str] = {
+    "куриная грудка": "курица",
+    "куриное филе": "курица",
+    "филе курицы": "курица",
+    "грудка курицы": "курица",
+    "гречневая крупа": "гречка",
+    "овсяные хлопья": "овсянка",
+    "рис басмати": "рис",
+    "рис жасмин": "рис",
+}
+
+
+def _strip_ending(token: str) -> str:
+    for ending in _ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= _MIN_STEM_LENGTH:
+            return token[: -len(ending)]
+    return token
+
+
+def _clean(value: str) -> str:
+    normalized = fold_case(value)
+    normalized = _PARENTHESES_RE.sub(" ", normalized)
+    normalized = _SPOON_RE.sub(" ", normalized)
+    normalized = _QUANTITY_RE.sub(" ", normalized)
+    return _NON_WORD_RE.sub(" ", normalized)
+
+
+def _stem_tokens(value: str) -> list[str]:
+    return [
+        _strip_ending(token)
+        for token in _clean(value).split()
+        if token not in _UNITS and token not in _FILLER_WORDS
+    ]
+
+
+def _build_token_synonyms() -> dict[str, str]:
+    mapping: dict[str, str] = {}
+    for raw_key, raw_value in _TOKEN_SYNONYMS_RAW.items():
+        key = _stem_tokens(raw_key)
+        value = _stem_tokens(raw_value)
+        if len(key) == 1 and len(value) == 1 and key != value:
+            mapping[key[0]] = value[0]
+    return mapping
+
+
+_TOKEN_SYNONYMS = _build_token_synonyms()
+
+
+def _apply_token_synonyms(tokens: list[str]) -> list[str]:
+    return [_TOKEN_SYNONYMS.get(token, token) for token in tokens]
+
+
+def _build_phrase_synonyms() -> dict[str, str]:
+    mapping: dict[str, str] = {}
+    for raw_key, raw_value in _PHRASE_SYNONYMS_RAW.items():
+        key = " ".join(sorted(dict.fromkeys(_apply_token_synonyms(_stem_tokens(raw_key)))))
+        value = " ".join(sorted(dict.fromkeys(_apply_token_synonyms(_stem_tokens(raw_value)))))
+        if key and value:
+            mapping[key] = value
+    return mapping
+
+
+_PHRASE_SYNONYMS = _build_phrase_synonyms()
+
+
+def _fingerprint() -> int:
+    rules = (
+        CANONICALIZER_VERSION,
+        [pattern.pattern for pattern in (_QUANTITY_RE, _PARENTHESES_RE, _SPOON_RE, _NON_WORD_RE)],
+        sorted(_UNITS),
+        sorted(_FILLER_WORDS),
+        _ENDINGS,
+        _MIN_STEM_LENGTH,
+        sorted(_TOKEN_SYNONYMS.items()),
+        sorted(_PHRASE_SYNONYMS.items()),
+    )
+    return zlib.crc32(repr(rules).encode("utf-8"))
+
+
+# Stored with derived data (the recipe index snapshot) to detect stale keys.
+CANONICALIZER_FINGERPRINT = _fingerprint()
+
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def canonicalize_ingredient(value: str) -> str:
+    # "200 г куриной грудки" and "Курица" both become "куриц".
+    tokens = _apply_token_synonyms(_stem_tokens(value))
+    key = " ".join(sorted(dict.fromkeys(tokens)))
+    return _PHRASE_SYNONYMS.get(key, key)
+
+
+def canonical_ingredient_set(values: list[str]) -> set[str]:
+    return {key for raw in values if raw and (key := canonicalize_ingredient(raw))}
+
+
+def canonical_cache_info() -> dict[str, int]:
+    info = canonicalize_ingredient.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize or 0,
+    }
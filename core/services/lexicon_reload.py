@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from core.services.lexicons import (
+    NUTRITION_LEXICON,
+    PLATE_LEXICON,
+    SAFETY_LEXICON,
+    LexiconError,
+    LexiconReport,
+    lexicon_path,
+)
+from core.services.nutrition_service import install_nutrition_table, load_nutrition_table
+from core.services.plate_service import install_plate_lexicon, load_plate_lexicon
+from core.services.safety_service import install_safety_lexicon, load_safety_lexicon
+
+logger = structlog.get_logger(__name__)
+
+_LOADERS: dict[str, tuple[Callable[[Path], tuple[Any, LexiconReport]], Callable[[Any], None]]] = {
+    SAFETY_LEXICON: (load_safety_lexicon, install_safety_lexicon),
+    PLATE_LEXICON: (load_plate_lexicon, install_plate_lexicon),
+    NUTRITION_LEXICON: (load_nutrition_table, install_nutrition_table),
+}
+
+
+async def reload_lexicons(directory: Path | None = None, names: list[str] | None = None) -> list[LexiconReport]:
+    # Everything is compiled in a worker thread first and installed only when
+    # all files are valid, so a broken file leaves the active lexicons intact.
+    compiled: list[tuple[Callable[[Any], None], Any, LexiconReport]] = []
+    for name in names or list(_LOADERS):
+        load, install = _LOADERS[name]
+        lexicon, report = await asyncio.to_thread(load, lexicon_path(name, directory))
+        compiled.append((install, lexicon, report))
+
+    reports: list[LexiconReport] = []
+    for install, lexicon, report in compiled:
+        install(lexicon)
+        logger.info(
+            "lexicon_reloaded",
+            name=report.name,
+            version=report.version,
+            entries=report.entries,
+            compile_ms=round(report.compile_ms, 2),
+            size_bytes=report.size_bytes,
+        )
+        reports.append(report)
+    return reports
+
+
+class LexiconWatcher:
+    def __init__(self, directory: Path | None = None, interval_seconds: float = 5.0) -> None:
+        self.directory = directory
+        self.interval_seconds = interval_seconds
+        self._mtimes = self._read_mtimes()
+
+    def _read_mtimes(self) -> dict[str, float | None]:
+        mtimes: dict[str, float | None] = {}
+        for name in _LOADERS:
+            try:
+                mtimes[name] = lexicon_path(name, self.directory).stat().st_mtime
+            except OSError:
+                mtimes[name] = None
+        return mtimes
+
+    async def check_once(self) -> list[LexiconReport]:
+        mtimes = self._read_mtimes()
+        changed = [name for name, mtime in mtimes.items() if mtime is not None and mtime != self._mtimes.get(name)]
+        # A file that fails to load is not retried until it changes again.
+        self._mtimes = mtimes
+        if not changed:
+            return []
+        try:
+            return await reload_lexicons(self.directory, changed)
+        except LexiconError as exc:
+            logger.warning("lexicon_reload_failed", names=changed, error=str(exc))
+            return []
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.check_once()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+DEFAULT_LEXICON_DIR = Path(__file__).resolve().parents[2] / "data" / "lexicons"
+SAFETY_LEXICON = "safety"
+PLATE_LEXICON = "plate"
+NUTRITION_LEXICON = "nutrition"
+
+
+class LexiconError(ValueError):
+    pass
+
+
+@dataclass(slots=True, frozen=True)
+class LexiconReport:
+    name: str
+    version: int
+    entries: int
+    compile_ms: float
+    size_bytes: int
+
+
+def lexicon_path(name: str, directory: Path | None = None) -> Path:
+    return (directory or DEFAULT_LEXICON_DIR) / f"{name}.json"
+
+
+def read_lexicon(path: Path, sections: tuple[str, ...]) -> dict[str, Any]:
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        raise LexiconError(f"Cannot read lexicon {path}: {exc}") from exc
+
+    if not isinstance(payload, dict):
+        raise LexiconError(f"Lexicon {path} must be a JSON object")
+    version = payload.get("version")
+    if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+        raise LexiconError(f"Lexicon {path} has no valid version")
+    for section in sections:
+        values = payload.get(section)
+        if not isinstance(values, dict) or not all(
+            isinstance(items, list) and all(isinstance(item, str) for item in items) for items in values.values()
+        ):
+            raise LexiconError(f"Lexicon {path}: section '{section}' must map names to lists of strings")
+    return payload
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import re
+import sys
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from core.services.lexicons import NUTRITION_LEXICON, LexiconError, LexiconReport, lexicon_path, read_lexicon
+from core.services.text_normalization import normalize_text
+
+PARSE_CACHE_SIZE = 16384
+MACROS = ("kcal", "protein", "fat", "carbs")
+
+# Grams per unit; millilitres are counted as grams, which is close enough
+# for the water-based liquids recipes measure by volume.
+_UNIT_GRAMS = {
+    "кг": 1000.0,
+    "г": 1.0,
+    "л": 1000.0,
+    "мл": 1.0,
+    "ст.л.": 15.0,
+    "ч.л.": 5.0,
+    "стакан": 200.0,
+    "щепотка": 0.5,
+}
+_UNIT_ALIASES = (
+    (re.compile(r"кг|килограмм\w*"), "кг"),
+    (re.compile(r"мл|миллилитр\w*"), "мл"),
+    (re.compile(r"гр?|грамм\w*"), "г"),
+    (re.compile(r"л|литр\w*"), "л"),
+    (re.compile(r"ст\.?\s?л\.?|столов\w*(?:\s+лож\w*)?"), "ст.л."),
+    (re.compile(r"ч\.?\s?л\.?|чайн\w*(?:\s+лож\w*)?"), "ч.л."),
+    (re.compile(r"стакан\w*"), "стакан"),
+    (re.compile(r"щепот\w*"), "щепотка"),
+    (re.compile(r"шт\.?|штук\w*|зубч\w*"), "шт"),
+)
+_FRACTIONS = {"½": "1/2", "⅓": "1/3", "¼": "1/4", "¾": "3/4", "⅔": "2/3"}
+_NUMBER = r"\d+(?:[.,]\d+)?(?:\s*/\s*\d+)?"
+_QUANTITY_RE = re.compile(
+    rf"(?P<amount>{_NUMBER}(?:\s*[-–—]\s*{_NUMBER})?)\s*"
+    rf"(?P<unit>(?:{'|'.join(pattern.pattern for pattern, _ in _UNIT_ALIASES)})(?![а-яa-z]))?",
+    re.IGNORECASE,
+)
+
+
+# eq=False keeps identity hashing so the table can key the parse cache,
+# the same way the plate lexicon keys the classify cache.
+@dataclass(slots=True, frozen=True, eq=False)
+class NutritionTable:
+    version: int
+    names: tuple[str, ...]
+    # One column per macro, per 100 g, indexed like names.
+    columns: tuple[tuple[float, ...], ...]
+    piece_grams: tuple[float | None, ...]
+    keyword_index: dict[str, int]
+    pattern: re.Pattern[str]
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedQuantity:
+    food_index: int
+    grams: float
+
+
+def _number(value: Any, field: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise LexiconError(f"Nutrition lexicon: '{field}' must be a non-negative number")
+    return float(value)
+
+
+def compile_nutrition_table(payload: dict[str, Any]) -> NutritionTable:
+    foods = payload.get("foods")
+    if not isinstance(foods, list) or not foods:
+        raise LexiconError("Nutrition lexicon: 'foods' must be a non-empty list")
+
+    names: list[str] = []
+    rows: list[tuple[float, ...]] = []
+    piece_grams: list[float | None] = []
+    keyword_index: dict[str, int] = {}
+    for food in foods:
+        keywords = food.get("keywords") if isinstance(food, dict) else None
+        if not isinstance(keywords, list) or not keywords or not all(isinstance(item, str) for item in keywords):
+            raise LexiconError("Nutrition lexicon: every food needs a list of keywords")
+        index = len(names)
+        for keyword in keywords:
+            normalized = normalize_text(keyword)
+            if normalized:
+                keyword_index.setdefault(normalized, index)
+        names.append(keywords[0])
+        rows.append(tuple(_number(food.get(macro), macro) for macro in MACROS))
+        piece = food.get("piece_g")
+        piece_grams.append(None if piece is None else _number(piece, "piece_g"))
+
+    return NutritionTable(
+        version=payload["version"],
+        names=tuple(names),
+        columns=tuple(zip(*rows)),
+        piece_grams=tuple(piece_grams),
+        keyword_index=keyword_index,
+        pattern=re.compile("|".join(map(re.escape, sorted(keyword_index, key=len, reverse=True)))),
+    )
+
+
+def load_nutrition_table(path: Path | None = None) -> tuple[NutritionTable, LexiconReport]:
+    started = time.perf_counter()
+    payload = read_lexicon(path or lexicon_path(NUTRITION_LEXICON), ())
+    table = compile_nutrition_table(payload)
+    report = LexiconReport(
+        name=NUTRITION_LEXICON,
+        version=table.version,
+        entries=len(table.names),
+        compile_ms=(time.perf_counter() - started) * 1000,
+        size_bytes=sys.getsizeof(table.pattern.pattern) + sum(sys.getsizeof(column) for column in table.columns),
+    )
+    return table, report
+
+
+_table, _ = load_nutrition_table()
+
+
+def install_nutrition_table(table: NutritionTable) -> None:
+    global _table
+    _table = table
+
+
+def current_nutrition_table() -> NutritionTable:
+    return _table
+
+
+def _parse_amount(value: str) -> float:
+    parts = re.split(r"\s*[-–—]\s*", value.replace(",", "."))
+    # Ranges such as "2-3 шт" count as their midpoint.
+    amounts = []
+    for part in parts:
+        numerator, _, denominator = part.partition("/")
+        amounts.append(float(numerator) / float(denominator) if denominator else float(numerator))
+    return sum(amounts) / len(amounts)
+
+
+def _canonical_unit(unit: str | None) -> str | None:
+    if not unit:
+        return None
+    folded = unit.lower()
+    for pattern, canonical in _UNIT_ALIASES:
+        if pattern.fullmatch(folded):
+            return canonical
+    return None
+
+
+def _find_food(table: NutritionTable, line: str) -> int | None:
+    # The longest keyword wins, so "масло сливочное" is butter, not oil.
+    best: str | None = None
+    for match in table.pattern.finditer(normalize_text(line)):
+        if best is None or len(match.group(0)) > len(best):
+            best = match.group(0)
+    return None if best is None else table.keyword_index[best]
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_line(table: NutritionTable, line: str) -> ParsedQuantity | None:
+    for fraction, replacement in _FRACTIONS.items():
+        line = line.replace(fraction, replacement)
+    quantity = _QUANTITY_RE.search(line)
+    if quantity is None:
+        return None
+    food_index = _find_food(table, line)
+    if food_index is None:
+        return None
+
+    amount = _parse_amount(quantity.group("amount"))
+    unit = _canonical_unit(quantity.group("unit"))
+    if unit is None or unit == "шт":
+        piece = table.piece_grams[food_index]
+        if piece is None:
+            return None
+        return ParsedQuantity(food_index=food_index, grams=amount * piece)
+    return ParsedQuantity(food_index=food_index, grams=amount * _UNIT_GRAMS[unit])
+
+
+def parse_ingredient_quantity(line: str) -> ParsedQuantity | None:
+    return _parse_line(_table, line)
+
+
+def compute_nutrition(ingredients: Iterable[str], servings: int) -> dict[str, Any] | None:
+    table = _table
+    lines = list(ingredients)
+    # Grams are summed per food first, then each macro column is folded in
+    # one pass, instead of multiplying every macro for every line.
+    grams_by_food: dict[int, float] = {}
+    matched = 0
+    for line in lines:
+        parsed = _parse_line(table, line)
+        if parsed is not None:
+            matched += 1
+            grams_by_food[parsed.food_index] = grams_by_food.get(parsed.food_index, 0.0) + parsed.grams
+    if not grams_by_food:
+        return None
+
+    portions = max(servings, 1) * 100
+    kcal, protein, fat, carbs = (
+        sum(column[index] * grams for index, grams in grams_by_food.items()) / portions for column in table.columns
+    )
+    return {
+        "calories_kcal": round(kcal),
+        "protein_g": round(protein, 1),
+        "fat_g": round(fat, 1),
+        "carbs_g": round(carbs, 1),
+        "per_serving": True,
+        "coverage": round(matched / len(lines), 2),
+    }
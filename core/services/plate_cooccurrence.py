@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+import structlog
+
+from core.services.ingredient_canonicalizer import canonicalize_ingredient
+from db.repo import RecipeRepository
+
+logger = structlog.get_logger(__name__)
+
+# Only recipes with at least this rating contribute co-occurrence weight;
+# every stored recipe is remembered so a later upvote can add it.
+MIN_RATING = 1
+TOP_PER_GROUP = 5
+REBUILD_BATCH_SIZE = 1000
+_IGNORED_GROUPS = frozenset({"others"})
+
+
+def _weight(rating: int) -> int:
+    return rating if rating >= MIN_RATING else 0
+
+
+class CooccurrenceModel:
+    # Sparse symmetric matrix as dict-of-Counters over canonical ingredient
+    # keys. Per (key, group) top lists are cached and dropped for the keys a
+    # change touches, so lookups stay O(1) between updates. _top_groups maps a
+    # key to the groups cached for it, so invalidation never scans the cache.
+
+    def __init__(self) -> None:
+        self._recipes: dict[int, tuple[frozenset[str], int]] = {}
+        self._counts: dict[str, Counter[str]] = defaultdict(Counter)
+        self._groups: dict[str, Counter[str]] = defaultdict(Counter)
+        self._names: dict[str, str] = {}
+        self._top: dict[tuple[str, str], tuple[tuple[str, int], ...]] = {}
+        self._top_groups: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    def _apply(self, keys: frozenset[str], delta: int) -> None:
+        if not delta:
+            return
+        for key in keys:
+            row = self._counts[key]
+            for other in keys:
+                if other != key:
+                    row[other] += delta
+                    if row[other] <= 0:
+                        del row[other]
+        self._touch(keys)
+
+    def _touch(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            for group in self._top_groups.pop(key, ()):
+                del self._top[(key, group)]
+
+    def add_recipe(self, recipe_id: int, plate_map: dict[str, Any], rating: int = 0) -> None:
+        if recipe_id in self._recipes:
+            # Stored plate maps never change; only the rating can.
+            self.update_rating(recipe_id, rating)
+            return
+        keys: set[str] = set()
+        regrouped: set[str] = set()
+        for group, names in (plate_map or {}).items():
+            if group in _IGNORED_GROUPS or not isinstance(names, list):
+                continue
+            for name in names:
+                key = canonicalize_ingredient(str(name))
+                if not key:
+                    continue
+                keys.add(key)
+                self._names.setdefault(key, str(name).strip().lower())
+                previous = self._group_of(key)
+                self._groups[key][group] += 1
+                if previous != self._group_of(key):
+                    regrouped.add(key)
+
+        frozen = frozenset(keys)
+        weight = _weight(rating)
+        self._recipes[recipe_id] = (frozen, weight)
+        self._apply(frozen, weight)
+        for key in regrouped:
+            # A key moving to another group changes the top lists of the keys
+            # whose rows contain it; the matrix is symmetric, so those are its own row.
+            self._touch(self._counts.get(key, ()))
+
+    def remove_recipe(self, recipe_id: int) -> None:
+        entry = self._recipes.pop(recipe_id, None)
+        if entry is not None:
+            keys, weight = entry
+            self._apply(keys, -weight)
+
+    def update_rating(self, recipe_id: int, rating: int) -> None:
+        entry = self._recipes.get(recipe_id)
+        if entry is None:
+            return
+        keys, weight = entry
+        new_weight = _weight(rating)
+        if new_weight != weight:
+            self._recipes[recipe_id] = (keys, new_weight)
+            self._apply(keys, new_weight - weight)
+
+    def _group_of(self, key: str) -> str | None:
+        groups = self._groups.get(key)
+        return groups.most_common(1)[0][0] if groups else None
+
+    def _top_for(self, key: str, group: str) -> tuple[tuple[str, int], ...]:
+        cache_key = (key, group)
+        top = self._top.get(cache_key)
+        if top is None:
+            row = self._counts.get(key) or {}
+            candidates = [(other, count) for other, count in row.items() if self._group_of(other) == group]
+            candidates.sort(key=lambda item: (-item[1], item[0]))
+            top = self._top[cache_key] = tuple(candidates[:TOP_PER_GROUP])
+            self._top_groups.setdefault(key, set()).add(group)
+        return top
+
+    def suggest(
+        self,
+        present_keys: set[str],
+        group: str,
+        *,
+        exclude: frozenset[str] | set[str] = frozenset(),
+        limit: int = 1,
+    ) -> list[str]:
+        scores: Counter[str] = Counter()
+        for key in present_keys:
+            for other, count in self._top_for(key, group):
+                if other not in present_keys and self._names[other] not in exclude:
+                    scores[other] += count
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self._names[key] for key, _ in ranked[:limit]]
+
+
+_model = CooccurrenceModel()
+
+
+def current_cooccurrence_model() -> CooccurrenceModel:
+    return _model
+
+
+def install_cooccurrence_model(model: CooccurrenceModel) -> None:
+    global _model
+    _model = model
+
+
+async def rebuild_cooccurrence_model(repo: RecipeRepository) -> CooccurrenceModel:
+    # Builds a fresh model off to the side and swaps it in, so recommendations
+    # keep using the old matrix while the corpus is scanned.
+    started = time.perf_counter()
+    model = CooccurrenceModel()
+    after_id = 0
+    while True:
+        batch = await repo.list_recipe_plate_maps_with_rating(after_id=after_id, limit=REBUILD_BATCH_SIZE)
+        if not batch:
+            break
+        for recipe_id, plate_map, rating in batch:
+            model.add_recipe(recipe_id, plate_map, rating)
+        after_id = batch[-1][0]
+
+    install_cooccurrence_model(model)
+    logger.info(
+        "plate_cooccurrence_rebuilt",
+        recipes=len(model),
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    return model
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+
+from core.services.ingredient_canonicalizer import canonicalize_ingredient
+from core.services.plate_service import GROUP_ORDER, GROUP_OTHERS, LearnedPlateGroups, install_learned_groups
+from db.models import IngredientPlateGroup
+from db.repo import RecipeRepository
+
+logger = structlog.get_logger(__name__)
+
+MIN_SUPPORT = 3
+MIN_CONFIDENCE = 0.7
+MINING_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True, frozen=True)
+class LearnedPlateGroup:
+    canonical_key: str
+    plate_group: str
+    confidence: float
+    support: int
+    sample_name: str
+
+
+class PlateGroupMiner:
+    # Counts LLM group votes per canonical ingredient key; plate maps are
+    # added one at a time so the corpus never has to sit in memory.
+
+    def __init__(self) -> None:
+        self._votes: dict[str, Counter[str]] = defaultdict(Counter)
+        self._samples: dict[str, str] = {}
+        self.recipes = 0
+
+    def add(self, plate_map: dict[str, Any]) -> None:
+        self.recipes += 1
+        for group, names in (plate_map or {}).items():
+            # "others" says nothing useful: keyword scans already fall back to it.
+            if group not in GROUP_ORDER or group == GROUP_OTHERS or not isinstance(names, list):
+                continue
+            for name in names:
+                key = canonicalize_ingredient(str(name))
+                if key:
+                    self._votes[key][group] += 1
+                    self._samples.setdefault(key, str(name).strip()[:255])
+
+    def learned(
+        self,
+        *,
+        min_support: int = MIN_SUPPORT,
+        min_confidence: float = MIN_CONFIDENCE,
+    ) -> list[LearnedPlateGroup]:
+        learned: list[LearnedPlateGroup] = []
+        for key, counter in self._votes.items():
+            support = sum(counter.values())
+            group, count = counter.most_common(1)[0]
+            confidence = count / support
+            if support >= min_support and confidence >= min_confidence:
+                learned.append(
+                    LearnedPlateGroup(
+                        canonical_key=key,
+                        plate_group=group,
+                        confidence=confidence,
+                        support=support,
+                        sample_name=self._samples[key],
+                    )
+                )
+        learned.sort(key=lambda entry: entry.canonical_key)
+        return learned
+
+
+def mine_plate_groups(
+    plate_maps: Iterable[dict[str, Any]],
+    *,
+    min_support: int = MIN_SUPPORT,
+    min_confidence: float = MIN_CONFIDENCE,
+) -> list[LearnedPlateGroup]:
+    miner = PlateGroupMiner()
+    for plate_map in plate_maps:
+        miner.add(plate_map)
+    return miner.learned(min_support=min_support, min_confidence=min_confidence)
+
+
+def _install(entries: Iterable[tuple[str, str, float]]) -> int:
+    learned = LearnedPlateGroups(groups={key: (group, confidence) for key, group, confidence in entries})
+    install_learned_groups(learned)
+    return len(learned.groups)
+
+
+async def load_learned_plate_groups(repo: RecipeRepository) -> int:
+    rows = await repo.list_ingredient_plate_groups()
+    return _install((row.canonical_key, row.plate_group, row.confidence) for row in rows)
+
+
+async def refresh_learned_plate_groups(repo: RecipeRepository) -> int:
+    started = time.perf_counter()
+    miner = PlateGroupMiner()
+    after_id = 0
+    while True:
+        batch = await repo.list_recipe_plate_maps(after_id=after_id, limit=MINING_BATCH_SIZE)
+        if not batch:
+            break
+        for _, plate_map in batch:
+            miner.add(plate_map)
+        after_id = batch[-1][0]
+
+    learned = miner.learned()
+    await repo.replace_ingredient_plate_groups(
+        [
+            IngredientPlateGroup(
+                canonical_key=entry.canonical_key,
+                plate_group=entry.plate_group,
+                confidence=entry.confidence,
+                support=entry.support,
+                sample_name=entry.sample_name,
+            )
+            for entry in learned
+        ]
+    )
+    await repo.session.commit()
+    installed = _install((entry.canonical_key, entry.plate_group, entry.confidence) for entry in learned)
+    logger.info(
+        "plate_groups_mined",
+        recipes=miner.recipes,
+        ingredients=installed,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    return installed
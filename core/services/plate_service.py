@@ -1,7 +1,18 @@
 from __future__ import annotations
 
 import re
+import sys
+import time
+from collections.abc import Iterable
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from core.services.ingredient_canonicalizer import canonicalize_ingredient
+from core.services.lexicons import PLATE_LEXICON, LexiconReport, lexicon_path, read_lexicon
+from core.services.plate_cooccurrence import current_cooccurrence_model
+from core.services.text_normalization import normalize_text
 
 GROUP_VEGGIES_FRUITS = "veggies_fruits"
 GROUP_WHOLE_GRAINS = "whole_grains"
@@ -25,78 +36,64 @@ REQUIRED_GROUPS = (
     GROUP_WHOLE_GRAINS,
 )
 
-GROUP_KEYWORDS: dict[str, tuple[str, ...]] = {
-    GROUP_VEGGIES_FRUITS: (
-        "брокколи",
-        "помидор",
-        "томат",
-        "огурец",
-        "шпинат",
-        "салат",
-        "морковь",
-        "перец",
-        "лук",
-        "яблок",
-        "банан",
-        "груш",
-        "ягод",
-        "капуст",
-        "кабач",
-    ),
-    GROUP_WHOLE_GRAINS: (
-        "гречк",
-        "рис",
-        "овсян",
-        "киноа",
-        "булгур",
-        "перлов",
-        "цельнозерн",
-        "макарон",
-        "хлеб",
-        "паста",
-    ),
-    GROUP_PROTEINS: (
-        "куриц",
-        "курин",
-        "индейк",
-        "говядин",
-        "рыб",
-        "лосос",
-        "тунец",
-        "яйц",
-        "нут",
-        "фасол",
-        "чечевиц",
-        "тофу",
-        "кревет",
-    ),
-    GROUP_FATS: (
-        "авокадо",
-        "масл",
-        "оливк",
-        "орех",
-        "миндал",
-        "семечк",
-        "кунжут",
-        "арахис",
-    ),
-    GROUP_DAIRY_OPTIONAL: (
-        "йогурт",
-        "кефир",
-        "молок",
-        "сыр",
-        "творог",
-        "ряженк",
-    ),
-}
-
-RECOMMENDATION_POOL: dict[str, tuple[str, ...]] = {
-    GROUP_VEGGIES_FRUITS: ("брокколи", "шпинат", "помидоры"),
-    GROUP_WHOLE_GRAINS: ("гречка", "киноа", "овсянка"),
-    GROUP_PROTEINS: ("куриная грудка", "яйца", "нут"),
-    GROUP_FATS: ("авокадо", "оливковое масло", "грецкие орехи"),
-    GROUP_DAIRY_OPTIONAL: ("греческий йогурт", "творог", "кефир"),
-}
+CLASSIFY_CACHE_SIZE = 16384
+
+
+# eq=False keeps identity hashing, so a lexicon can key the classify cache
+# and a reload naturally stops hitting entries of the replaced lexicon.
+@dataclass(slots=True, frozen=True, eq=False)
+class PlateLexicon:
+    version: int
+    group_keywords: dict[str, tuple[str, ...]]
+    recommendation_pool: dict[str, tuple[str, ...]]
+    group_patterns: tuple[tuple[str, re.Pattern[str]], ...]
+
+
+def compile_plate_lexicon(payload: dict[str, Any]) -> PlateLexicon:
+    group_keywords = {
+        group: tuple(keyword for keyword in keywords if keyword)
+        for group, keywords in payload["group_keywords"].items()
+        if group in GROUP_ORDER
+    }
+    # One alternation per group keeps the group priority of the old loop:
+    # the first group with any keyword inside the ingredient wins.
+    group_patterns = tuple(
+        (group, re.compile("|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))))
+        for group, keywords in group_keywords.items()
+        if keywords
+    )
+    return PlateLexicon(
+        version=payload["version"],
+        group_keywords=group_keywords,
+        recommendation_pool={group: tuple(values) for group, values in payload["recommendation_pool"].items()},
+        group_patterns=group_patterns,
+    )
+
+
+def load_plate_lexicon(path: Path | None = None) -> tuple[PlateLexicon, LexiconReport]:
+    started = time.perf_counter()
+    payload = read_lexicon(path or lexicon_path(PLATE_LEXICON), ("group_keywords", "recommendation_pool"))
+    lexicon = compile_plate_lexicon(payload)
+    report = LexiconReport(
+        name=PLATE_LEXICON,
+        version=lexicon.version,
+        entries=sum(len(keywords) for keywords in lexicon.group_keywords.values()),
+        compile_ms=(time.perf_counter() - started) * 1000,
+        size_bytes=sum(sys.getsizeof(pattern.pattern) for _, pattern in lexicon.group_patterns),
+    )
+    return lexicon, report
+
+
+_lexicon, _ = load_plate_lexicon()
+
+
+def install_plate_lexicon(lexicon: PlateLexicon) -> None:
+    global _lexicon
+    _lexicon = lexicon
+
+
+def current_plate_lexicon() -> PlateLexicon:
+    return _lexicon
 
 
 @dataclass(slots=True)
@@ -107,26 +104,65 @@ class PlateAnalysis:
     classified_ingredients: dict[str, list[str]]
 
 
+@dataclass(slots=True, frozen=True, eq=False)
+class LearnedPlateGroups:
+    # canonical ingredient key -> (plate group, confidence), mined from stored plate maps.
+    groups: dict[str, tuple[str, float]]
+
+
+_learned = LearnedPlateGroups(groups={})
+
+
+def install_learned_groups(learned: LearnedPlateGroups) -> None:
+    global _learned
+    _learned = learned
+
+
+def current_learned_groups() -> LearnedPlateGroups:
+    return _learned
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def _classify(lexicon: PlateLexicon, learned: LearnedPlateGroups, ingredient: str) -> str:
+    if learned.groups:
+        entry = learned.groups.get(canonicalize_ingredient(ingredient))
+        if entry is not None:
+            return entry[0]
+    normalized = normalize_text(ingredient)
+    for group, pattern in lexicon.group_patterns:
+        if pattern.search(normalized):
+            return group
+    return GROUP_OTHERS
+
+
 class PlateService:
     @staticmethod
     def _normalize(ingredient: str) -> str:
-        return re.sub(r"[^a-zа-я0-9 ]+", "", ingredient.lower()).strip()
+        return normalize_text(ingredient)
 
-    def classify_ingredients(self, ingredients: list[str]) -> dict[str, list[str]]:
-        classified = {group: [] for group in GROUP_ORDER}
+    @staticmethod
+    def classify_one(ingredient: str) -> str:
+        return _classify(_lexicon, _learned, ingredient)
 
+    @staticmethod
+    def classify_many(ingredients: Iterable[str]) -> list[str]:
+        # A local memo keeps large corpora from evicting the shared cache
+        # and pins one lexicon and learned table for the whole batch.
+        lexicon = _lexicon
+        learned = _learned
+        groups: dict[str, str] = {}
+        result: list[str] = []
         for ingredient in ingredients:
-            normalized = self._normalize(ingredient)
-            matched_group = None
-
-            for group, keywords in GROUP_KEYWORDS.items():
-                if any(keyword in normalized for keyword in keywords):
-                    matched_group = group
-                    break
-
-            target_group = matched_group or GROUP_OTHERS
-            classified[target_group].append(ingredient)
+            group = groups.get(ingredient)
+            if group is None:
+                group = groups[ingredient] = _classify(lexicon, learned, ingredient)
+            result.append(group)
+        return result
 
+    def classify_ingredients(self, ingredients: list[str]) -> dict[str, list[str]]:
+        classified = {group: [] for group in GROUP_ORDER}
+        for ingredient, group in zip(ingredients, self.classify_many(ingredients)):
+            classified[group].append(ingredient)
         return classified
 
     @staticmethod
@@ -134,10 +170,22 @@ class PlateService:
         return [group for group in REQUIRED_GROUPS if not classified.get(group)]
 
     @staticmethod
-    def build_recommendations(missing_groups: list[str], limit: int = 3) -> list[str]:
+    def build_recommendations(
+        missing_groups: list[str],
+        limit: int = 3,
+        ingredients: list[str] | None = None,
+    ) -> list[str]:
+        # Co-occurrence with what the user already has comes first; the static
+        # pool covers cold starts and ingredients the model has not seen.
+        present_keys = {key for key in map(canonicalize_ingredient, ingredients or []) if key}
+        model = current_cooccurrence_model() if present_keys else None
         recommendations: list[str] = []
+        recommendation_pool = _lexicon.recommendation_pool
         for group in missing_groups:
-            candidates = RECOMMENDATION_POOL.get(group, ())
+            candidates = [
+                *(model.suggest(present_keys, group, exclude=set(recommendations)) if model is not None else ()),
+                *recommendation_pool.get(group, ()),
+            ]
             for ingredient in candidates:
                 if ingredient not in recommendations:
                     recommendations.append(ingredient)
@@ -150,10 +198,13 @@ class PlateService:
         classified = self.classify_ingredients(ingredients)
         covered_groups = [group for group in GROUP_ORDER if classified.get(group)]
         missing_groups = self.get_missing_groups(classified)
-        recommendations = self.build_recommendations(missing_groups)
+        recommendations = self.build_recommendations(missing_groups, ingredients=ingredients)
         return PlateAnalysis(
             covered_groups=covered_groups,
             missing_groups=missing_groups,
             recommendations=recommendations,
             classified_ingredients=classified,
         )
+
+
+plate_service = PlateService()
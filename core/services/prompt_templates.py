@@ -5,37 +5,89 @@ SYSTEM_PROMPT = (
     "наркотические и нелегальные вещества. Если пользователь просит такое, все равно выдай безопасный съедобный рецепт."
 )
 
-INGREDIENTS_PROMPT_TEMPLATE = """
-Сформируй рецепт из ингредиентов пользователя.
-
-Входные ингредиенты:
-{ingredients}
-
-Недостающие группы тарелки:
-{missing_groups}
+FULL_RESPONSE_CONTRACT = """
+1) Только JSON-объект.
+2) Поля:
+   - title: string
+   - ingredients: string[]
+   - steps: string[]
+   - time_minutes: int
+   - servings: int
+   - plate_map: object с ключами veggies_fruits, whole_grains, proteins, fats, dairy(optional), others
+   - tips: string[]
+3) Каждое поле с типом string[] должно быть именно JSON-массивом строк, не одной строкой.
+""".strip()
 
-Пожелания пользователя:
-{user_preferences}
+# Short keys and plate groups as ingredient indexes; schemas.compact expands
+# the answer back into RecipeResponse.
+COMPACT_RESPONSE_CONTRACT = """
+1) Только JSON-объект в компактной записи, без пробелов и переносов строк между полями.
+2) Поля:
+   - t: string (название)
+   - i: string[] (ингредиенты)
+   - s: string[] (шаги)
+   - m: int (время в минутах)
+   - n: int (число порций)
+   - p: object с ключами v (овощи и фрукты), g (цельные злаки), r (белки), f (жиры), d (молочное, необязательно),
+     o (прочее); значения - массивы номеров ингредиентов из i, считая с 0
+   - x: string[] (советы)
+3) Каждое поле с типом string[] должно быть именно JSON-массивом строк, не одной строкой.
+""".strip()
 
-Требования к JSON-ответу:
+# Two-phase generation: the summary contracts omit steps, which are requested
+# later with STEPS_PROMPT_TEMPLATE for the stored recipe.
+FULL_SUMMARY_CONTRACT = """
 1) Только JSON-объект.
 2) Поля:
    - title: string
    - ingredients: string[]
-   - steps: string[]
    - time_minutes: int
    - servings: int
    - plate_map: object с ключами veggies_fruits, whole_grains, proteins, fats, dairy(optional), others
-   - nutrition: object | null
    - tips: string[]
 3) Каждое поле с типом string[] должно быть именно JSON-массивом строк, не одной строкой.
-4) Учитывай принципы Harvard Plate и заполни plate_map содержательно.
-5) Для ingredients указывай конкретные количества и единицы (г, мл, шт, ч.л., ст.л.).
-6) Для steps давай подробные, исполнимые шаги:
+""".strip()
+
+COMPACT_SUMMARY_CONTRACT = """
+1) Только JSON-объект в компактной записи, без пробелов и переносов строк между полями.
+2) Поля:
+   - t: string (название)
+   - i: string[] (ингредиенты)
+   - m: int (время в минутах)
+   - n: int (число порций)
+   - p: object с ключами v (овощи и фрукты), g (цельные злаки), r (белки), f (жиры), d (молочное, необязательно),
+     o (прочее); значения - массивы номеров ингредиентов из i, считая с 0
+   - x: string[] (советы)
+3) Каждое поле с типом string[] должно быть именно JSON-массивом строк, не одной строкой.
+""".strip()
+
+STEPS_REQUIREMENTS = """
+6) Для шагов давай подробные, исполнимые шаги:
    - структура prep -> cooking -> serving;
    - указывай время шага и/или температуру, где это уместно;
    - указывай критерии готовности (цвет, текстура, температура).
 7) Избегай общих фраз. Каждый шаг должен быть конкретным действием, которое можно выполнить на кухне.
+""".strip()
+
+SUMMARY_STEPS_NOTE = "6) Не пиши шаги приготовления: их запросят отдельно."
+
+INGREDIENTS_PROMPT_TEMPLATE = """
+Сформируй рецепт из ингредиентов пользователя.
+
+Входные ингредиенты:
+{ingredients}
+
+Недостающие группы тарелки:
+{missing_groups}
+
+Пожелания пользователя:
+{user_preferences}
+
+Требования к JSON-ответу:
+{response_contract}
+4) Учитывай принципы Harvard Plate и содержательно распредели ингредиенты по группам тарелки.
+5) Для ингредиентов указывай конкретные количества и единицы (г, мл, шт, ч.л., ст.л.).
+{steps_requirements}
 """
 
 READY_DISH_PROMPT_TEMPLATE = """
@@ -48,24 +100,30 @@ READY_DISH_PROMPT_TEMPLATE = """
 {user_preferences}
 
 Требования к JSON-ответу:
-1) Только JSON-объект.
-2) Поля:
-   - title: string
-   - ingredients: string[]
-   - steps: string[]
-   - time_minutes: int
-   - servings: int
-   - plate_map: object с ключами veggies_fruits, whole_grains, proteins, fats, dairy(optional), others
-   - nutrition: object | null
-   - tips: string[]
-3) Каждое поле с типом string[] должно быть именно JSON-массивом строк, не одной строкой.
+{response_contract}
 4) Рецепт должен быть реалистичным, выполнимым дома и соответствовать Harvard Plate.
-5) Для ingredients указывай конкретные количества и единицы (г, мл, шт, ч.л., ст.л.).
-6) Для steps давай подробные, исполнимые шаги:
-   - структура prep -> cooking -> serving;
-   - указывай время шага и/или температуру, где это уместно;
-   - указывай критерии готовности (цвет, текстура, температура).
-7) Избегай общих фраз. Каждый шаг должен быть конкретным действием, которое можно выполнить на кухне.
+5) Для ингредиентов указывай конкретные количества и единицы (г, мл, шт, ч.л., ст.л.).
+{steps_requirements}
+"""
+
+STEPS_PROMPT_TEMPLATE = """
+Напиши шаги приготовления для уже выбранного рецепта, не меняя его состав.
+
+Название:
+{title}
+
+Ингредиенты:
+{ingredients}
+
+Время: {time_minutes} минут, порций: {servings}.
+
+Требования к JSON-ответу:
+1) Только JSON-объект с одним полем steps: string[].
+2) Поле steps должно быть именно JSON-массивом строк, не одной строкой, минимум 5 шагов.
+3) Используй только перечисленные ингредиенты и их количества.
+4) Уложись в указанное время приготовления.
+5) Рассчитай шаги на указанное число порций.
+{steps_requirements}
 """
 
 # Backward-compatible alias for existing imports.
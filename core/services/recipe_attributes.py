@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from core.services.text_normalization import normalize_text
+
+FAST_RECIPE_MINUTES = 20
+ANIMAL_KEYWORDS = (
+    "кур",
+    "индей",
+    "говя",
+    "свин",
+    "бекон",
+    "рыб",
+    "лосос",
+    "тунец",
+    "кревет",
+    "краб",
+    "мяс",
+)
+
+
+def is_vegetarian(ingredients: Iterable[Any]) -> bool:
+    normalized = " ".join(normalize_text(str(x)) for x in ingredients)
+    return not any(keyword in normalized for keyword in ANIMAL_KEYWORDS)
+
+
+def is_fast(time_minutes: int | None) -> bool:
+    return time_minutes is not None and time_minutes <= FAST_RECIPE_MINUTES
+
+
+def recipe_flags(llm_response: dict[str, Any], source_ingredients: list[str] | None) -> tuple[bool, bool]:
+    # Passed to save_recipe so the browse filters are plain WHERE clauses.
+    ingredients = llm_response.get("ingredients") or source_ingredients or []
+    return is_vegetarian(ingredients), is_fast(llm_response.get("time_minutes"))
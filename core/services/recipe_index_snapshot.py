@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+
+import structlog
+
+from core.services.ingredient_canonicalizer import CANONICALIZER_FINGERPRINT
+from core.services.recipe_text_index import RecipeTextIndex
+
+logger = structlog.get_logger(__name__)
+
+# Layout (little-endian, every section padded to 4 bytes):
+#   header | vocabulary (NUL-separated UTF-8) | doc_freq u32[T] | term_offsets u32[T+1]
+#   | posting_docs u32[NNZ] | posting_weights f32[NNZ] | doc_ids u32[D] | live bitset u8[ceil(D/8)]
+# Postings are stored column-wise (CSC): the documents of term t are
+# posting_docs[term_offsets[t]:term_offsets[t + 1]], as positions into doc_ids.
+# The header records the canonicalizer fingerprint: n-grams are built from
+# canonicalized words, so a snapshot from other rules would silently miss.
+MAGIC = b"RTIX"
+VERSION = 2
+_HEADER = struct.Struct("<4sIIIIIQII")
+
+
+def _padded(size: int) -> int:
+    return (size + 3) & ~3
+
+
+class SnapshotSegment:
+    # Read-only base segment: postings stay inside the mapping and are read
+    # through memoryview casts; only the vocabulary is decoded into a dict.
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size or self._mmap[:4] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a recipe index snapshot: {path}")
+        view = memoryview(self._mmap)
+        (
+            magic,
+            version,
+            fingerprint,
+            ngram_size,
+            doc_count,
+            term_count,
+            high_water_mark,
+            vocab_size,
+            nnz,
+        ) = _HEADER.unpack_from(view)
+        if version != VERSION:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"Unsupported recipe index snapshot version {version}: {path}")
+
+        self.fingerprint = fingerprint
+        self.ngram_size = ngram_size
+        self.high_water_mark = high_water_mark
+        offset = _HEADER.size
+
+        vocabulary = bytes(view[offset : offset + vocab_size]).decode("utf-8")
+        self.vocabulary = {gram: term_id for term_id, gram in enumerate(vocabulary.split("\0"))} if term_count else {}
+        offset += _padded(vocab_size)
+
+        def section(length: int, fmt: str, item_size: int = 4) -> memoryview:
+            nonlocal offset
+            chunk = view[offset : offset + length * item_size].cast(fmt)
+            offset += _padded(length * item_size)
+            return chunk
+
+        self._doc_freq = section(term_count, "I")
+        self._term_offsets = section(term_count + 1, "I")
+        self._posting_docs = section(nnz, "I")
+        self._posting_weights = section(nnz, "f")
+        self._doc_ids = section(doc_count, "I")
+        bitset_size = (doc_count + 7) // 8
+        self._live = bytearray(view[offset : offset + bitset_size])
+        self._positions = {doc_id: position for position, doc_id in enumerate(self._doc_ids)}
+        self.live_count = sum(bin(byte).count("1") for byte in self._live)
+        self._view = view
+
+    def close(self) -> None:
+        for chunk in (self._doc_freq, self._term_offsets, self._posting_docs, self._posting_weights, self._doc_ids):
+            chunk.release()
+        self._view.release()
+        self._mmap.close()
+
+    def _is_live(self, position: int) -> bool:
+        return bool(self._live[position >> 3] & (1 << (position & 7)))
+
+    def contains(self, recipe_id: int) -> bool:
+        position = self._positions.get(recipe_id)
+        return position is not None and self._is_live(position)
+
+    def kill(self, recipe_id: int) -> bool:
+        # Document frequencies of a killed row are not adjusted: the snapshot has
+        # no row index, and replacing stored recipes is rare enough to ignore.
+        position = self._positions.get(recipe_id)
+        if position is None or not self._is_live(position):
+            return False
+        self._live[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+        self.live_count -= 1
+        return True
+
+    def doc_freq(self, gram: str) -> int:
+        term_id = self.vocabulary.get(gram)
+        return self._doc_freq[term_id] if term_id is not None else 0
+
+    def postings(self, gram: str) -> Iterator[tuple[int, float]]:
+        term_id = self.vocabulary.get(gram)
+        if term_id is None:
+            return
+        start, end = self._term_offsets[term_id], self._term_offsets[term_id + 1]
+        for index in range(start, end):
+            position = self._posting_docs[index]
+            if self._is_live(position):
+                yield self._doc_ids[position], self._posting_weights[index]
+
+    def doc_ids(self) -> Iterator[int]:
+        for position, doc_id in enumerate(self._doc_ids):
+            if self._is_live(position):
+                yield doc_id
+
+    def iter_postings(self) -> Iterator[tuple[str, int, float]]:
+        for gram in self.vocabulary:
+            for doc_id, weight in self.postings(gram):
+                yield gram, doc_id, weight
+
+
+def write_snapshot(index: RecipeTextIndex, path: Path) -> int:
+    columns: dict[str, list[tuple[int, float]]] = {}
+    for gram, doc_id, weight in index.iter_postings():
+        columns.setdefault(gram, []).append((doc_id, weight))
+    grams = sorted(columns)
+    doc_ids = sorted(index.doc_ids())
+    positions = {doc_id: position for position, doc_id in enumerate(doc_ids)}
+
+    vocabulary = "\0".join(grams).encode("utf-8")
+    term_offsets = [0]
+    posting_docs: list[int] = []
+    posting_weights: list[float] = []
+    for gram in grams:
+        for doc_id, weight in sorted(columns[gram]):
+            posting_docs.append(positions[doc_id])
+            posting_weights.append(weight)
+        term_offsets.append(len(posting_docs))
+    doc_freq = [term_offsets[position + 1] - term_offsets[position] for position in range(len(grams))]
+    live = bytearray(b"\xff" * (len(doc_ids) // 8))
+    if len(doc_ids) % 8:
+        live.append((1 << (len(doc_ids) % 8)) - 1)
+
+    def pack(fmt: str, values: list) -> bytes:
+        data = struct.pack(f"<{len(values)}{fmt}", *values)
+        return data + b"\0" * (_padded(len(data)) - len(data))
+
+    payload = b"".join(
+        [
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                CANONICALIZER_FINGERPRINT,
+                index.ngram_size,
+                len(doc_ids),
+                len(grams),
+                index.high_water_mark,
+                len(vocabulary),
+                len(posting_docs),
+            ),
+            vocabulary + b"\0" * (_padded(len(vocabulary)) - len(vocabulary)),
+            pack("I", doc_freq),
+            pack("I", term_offsets),
+            pack("I", posting_docs),
+            pack("f", posting_weights),
+            pack("I", doc_ids),
+            bytes(live),
+        ]
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(payload)
+    os.replace(temp_path, path)
+    return len(payload)
+
+
+def load_snapshot(path: Path, index: RecipeTextIndex) -> RecipeTextIndex:
+    segment = SnapshotSegment(path)
+    if segment.fingerprint != CANONICALIZER_FINGERPRINT:
+        segment.close()
+        raise ValueError(
+            f"Snapshot canonicalizer fingerprint {segment.fingerprint:08x} != current {CANONICALIZER_FINGERPRINT:08x}"
+        )
+    if segment.ngram_size != index.ngram_size:
+        segment.close()
+        raise ValueError(f"Snapshot n-gram size {segment.ngram_size} != index n-gram size {index.ngram_size}")
+    index.attach_base(segment)
+    index.high_water_mark = max(index.high_water_mark, segment.high_water_mark)
+    return index
+
+
+def restore_snapshot(path: Path, index: RecipeTextIndex) -> bool:
+    if not path.exists():
+        return False
+    try:
+        load_snapshot(path, index)
+    except (OSError, ValueError) as exc:
+        logger.warning("recipe_index_snapshot_unreadable", path=str(path), error=str(exc))
+        return False
+    return True
@@ -1,38 +1,112 @@
 from __future__ import annotations
 
-import re
-from dataclasses import dataclass
+import heapq
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
 
-from db.repo import RecipeWithRating
+from core.services.ingredient_canonicalizer import canonical_ingredient_set, canonicalize_ingredient
+from db.repo import RecipeCandidate, UserSettings
+
+PROFILE_CACHE_SIZE = 4096
 
 
 @dataclass(slots=True, frozen=True)
 class RecipeMatch:
-    item: RecipeWithRating
+    item: RecipeCandidate
     similarity: float
     match_type: str
 
 
-def _normalize_ingredient(value: str) -> str:
-    normalized = value.lower().replace("ё", "е")
-    normalized = re.sub(r"[^a-zа-я0-9\s]+", " ", normalized)
-    normalized = re.sub(r"\s+", " ", normalized)
-    return normalized.strip()
+@dataclass(slots=True, frozen=True)
+class MatchConstraints:
+    allergies: tuple[str, ...] = ()
+    excluded_products: tuple[str, ...] = ()
+    time_limit_minutes: int | None = None
+
+    @classmethod
+    def from_settings(cls, settings: UserSettings) -> MatchConstraints:
+        return cls(
+            allergies=tuple(settings.allergies or ()),
+            excluded_products=tuple(settings.excluded_products or ()),
+            time_limit_minutes=settings.time_limit_minutes,
+        )
+
+    def excluding(self, products: tuple[str, ...]) -> MatchConstraints:
+        if not products:
+            return self
+        return replace(self, excluded_products=(*self.excluded_products, *products))
+
+    def forbidden_terms(self) -> tuple[tuple[str, ...], ...]:
+        terms: list[tuple[str, ...]] = []
+        for raw in (*self.allergies, *self.excluded_products):
+            tokens = tuple(canonicalize_ingredient(raw).split())
+            if tokens and tokens not in terms:
+                terms.append(tokens)
+        return tuple(terms)
+
+
+@dataclass(slots=True, frozen=True)
+class _CandidateProfile:
+    ingredient_keys: frozenset[str]
+    tokens: frozenset[str]
+
+
+_profile_cache: OrderedDict[tuple[int, datetime | None], _CandidateProfile] = OrderedDict()
 
 
 def _canonical_set(values: list[str]) -> set[str]:
-    return {item for raw in values if raw and (item := _normalize_ingredient(raw))}
+    return canonical_ingredient_set(values)
+
+
+def _ingredients_from_recipe(item: RecipeCandidate) -> list[str]:
+    return list(item.source_ingredients or item.ingredients)
+
+
+def _build_profile(item: RecipeCandidate) -> _CandidateProfile:
+    ingredient_keys = frozenset(_canonical_set(_ingredients_from_recipe(item)))
+    all_keys = ingredient_keys | _canonical_set(list(item.ingredients))
+    tokens = frozenset(token for key in all_keys for token in key.split())
+    return _CandidateProfile(ingredient_keys=ingredient_keys, tokens=tokens)
+
+
+def _candidate_profile(item: RecipeCandidate) -> _CandidateProfile:
+    # Stored recipes never change their ingredients, so profiles are cached per row.
+    cache_key = (item.id, item.created_at)
+    profile = _profile_cache.get(cache_key)
+    if profile is not None:
+        _profile_cache.move_to_end(cache_key)
+        return profile
+
+    profile = _build_profile(item)
+    _profile_cache[cache_key] = profile
+    if len(_profile_cache) > PROFILE_CACHE_SIZE:
+        _profile_cache.popitem(last=False)
+    return profile
+
 
+def _contains_term(tokens: frozenset[str], term: tuple[str, ...]) -> bool:
+    return all(any(token.startswith(part) for token in tokens) for part in term)
 
-def _ingredients_from_recipe(item: RecipeWithRating) -> list[str]:
-    source = list(item.recipe.source_ingredients or [])
-    if source:
-        return source
-    payload = item.recipe.llm_response or {}
-    raw = payload.get("ingredients")
-    if isinstance(raw, list):
-        return [str(value) for value in raw if str(value).strip()]
-    return []
+
+def _is_allowed(
+    item: RecipeCandidate,
+    profile: _CandidateProfile,
+    constraints: MatchConstraints,
+    forbidden_terms: tuple[tuple[str, ...], ...],
+) -> bool:
+    time_minutes = item.time_minutes
+    if (
+        constraints.time_limit_minutes is not None
+        and time_minutes is not None
+        and time_minutes > constraints.time_limit_minutes
+    ):
+        return False
+    return not any(_contains_term(profile.tokens, term) for term in forbidden_terms)
+
+
+def satisfies_constraints(item: RecipeCandidate, constraints: MatchConstraints) -> bool:
+    return _is_allowed(item, _candidate_profile(item), constraints, constraints.forbidden_terms())
 
 
 def _jaccard(left: set[str], right: set[str]) -> float:
@@ -42,45 +116,65 @@ def _jaccard(left: set[str], right: set[str]) -> float:
     return len(left & right) / len(union)
 
 
-def find_best_recipe_match(
+def find_top_matches(
     source_ingredients: list[str],
-    candidates: list[RecipeWithRating],
+    candidates: list[RecipeCandidate],
+    k: int = 3,
+    constraints: MatchConstraints | None = None,
     *,
     min_jaccard: float = 0.8,
     min_intersection: int = 3,
-) -> RecipeMatch | None:
+) -> list[RecipeMatch]:
     source_set = _canonical_set(source_ingredients)
-    if not source_set:
-        return None
+    if not source_set or k <= 0:
+        return []
 
-    exact_matches: list[RecipeMatch] = []
-    similar_matches: list[RecipeMatch] = []
+    forbidden_terms = constraints.forbidden_terms() if constraints is not None else ()
+    matches: list[RecipeMatch] = []
 
     for candidate in candidates:
-        candidate_set = _canonical_set(_ingredients_from_recipe(candidate))
+        profile = _candidate_profile(candidate)
+        candidate_set = profile.ingredient_keys
         if not candidate_set:
             continue
+        if constraints is not None and not _is_allowed(candidate, profile, constraints, forbidden_terms):
+            continue
 
         if candidate_set == source_set:
-            exact_matches.append(RecipeMatch(item=candidate, similarity=1.0, match_type="exact"))
+            matches.append(RecipeMatch(item=candidate, similarity=1.0, match_type="exact"))
             continue
 
         intersection_size = len(source_set & candidate_set)
         jaccard = _jaccard(source_set, candidate_set)
         if jaccard >= min_jaccard and intersection_size >= min_intersection:
-            similar_matches.append(RecipeMatch(item=candidate, similarity=jaccard, match_type="similar"))
+            matches.append(RecipeMatch(item=candidate, similarity=jaccard, match_type="similar"))
 
-    ranked = exact_matches or similar_matches
-    if not ranked:
-        return None
-
-    ranked.sort(
+    # Exact matches always rank first: any other candidate has similarity < 1.0.
+    return heapq.nlargest(
+        k,
+        matches,
         key=lambda match: (
             match.similarity,
             match.item.rating,
-            match.item.recipe.created_at,
+            match.item.created_at,
         ),
-        reverse=True,
     )
-    return ranked[0]
 
+
+def find_best_recipe_match(
+    source_ingredients: list[str],
+    candidates: list[RecipeCandidate],
+    *,
+    constraints: MatchConstraints | None = None,
+    min_jaccard: float = 0.8,
+    min_intersection: int = 3,
+) -> RecipeMatch | None:
+    top = find_top_matches(
+        source_ingredients,
+        candidates,
+        k=1,
+        constraints=constraints,
+        min_jaccard=min_jaccard,
+        min_intersection=min_intersection,
+    )
+    return top[0] if top else None
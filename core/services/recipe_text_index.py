@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from core.services.ingredient_canonicalizer import canonicalize_ingredient
+from core.services.text_normalization import fold_case
+
+if TYPE_CHECKING:
+    from core.services.recipe_index_snapshot import SnapshotSegment
+    from db.repo import RecipeRepository
+
+NGRAM_SIZE = 3
+DEFAULT_MIN_SCORE = 0.6
+SYNC_BATCH_SIZE = 500
+
+_QUERY_TOKEN_RE = re.compile(r"[a-zа-я0-9]+|,")
+_NEGATIONS = frozenset({"без", "не", "кроме"})
+_NEGATION_JOINERS = frozenset({"и", "или", ","})
+
+
+@dataclass(slots=True, frozen=True)
+class TextMatch:
+    recipe_id: int
+    score: float
+
+
+@dataclass(slots=True, frozen=True)
+class TextQuery:
+    text: str
+    excluded: tuple[str, ...]
+
+
+def parse_text_query(query: str) -> TextQuery:
+    # The canonicalizer drops "без" as filler, which would turn "рис без
+    # курицы" into a request for chicken. Negated words ("без X", "не X",
+    # "без X и Y") are split off here: they leave the ranked text and come
+    # back as exclusions for the caller's constraints.
+    kept: list[str] = []
+    excluded: list[str] = []
+    expecting_term = in_list = False
+    for token in _QUERY_TOKEN_RE.findall(fold_case(query)):
+        if token in _NEGATIONS:
+            expecting_term, in_list = True, False
+            continue
+        if expecting_term:
+            if token in _NEGATION_JOINERS:
+                continue
+            if canonicalize_ingredient(token):
+                excluded.append(token)
+                expecting_term, in_list = False, True
+                continue
+            # A preposition such as "с" ends the negated list.
+            expecting_term = False
+        elif in_list and token in _NEGATION_JOINERS:
+            expecting_term = True
+            continue
+        in_list = False
+        if token != ",":
+            kept.append(token)
+    return TextQuery(text=" ".join(kept), excluded=tuple(dict.fromkeys(excluded)))
+
+
+def _ngrams(parts: list[str], size: int) -> Counter[str]:
+    grams: Counter[str] = Counter()
+    words = [word for part in parts if part for word in canonicalize_ingredient(part).split()]
+    for word in words:
+        padded = f" {word} "
+        if len(padded) <= size:
+            grams[padded] += 1
+            continue
+        for start in range(len(padded) - size + 1):
+            grams[padded[start : start + size]] += 1
+    return grams
+
+
+def _log_tf(count: int) -> float:
+    return 1.0 + math.log(count)
+
+
+class RecipeTextIndex:
+    # Documents are stored as log-tf unit vectors and IDF is applied to the
+    # query only (SMART lnc.ltc), so adding a recipe never re-weights the others.
+    # An optional read-only base segment (a loaded snapshot) sits under the
+    # in-memory rows; re-added recipes shadow their base copy.
+
+    def __init__(self, ngram_size: int = NGRAM_SIZE) -> None:
+        self.ngram_size = ngram_size
+        self.high_water_mark = 0
+        self._vocabulary: dict[str, int] = {}
+        self._doc_freq: list[int] = []
+        self._postings: list[dict[int, float]] = []
+        self._rows: dict[int, dict[int, float]] = {}
+        self._base: SnapshotSegment | None = None
+
+    def __len__(self) -> int:
+        return len(self._rows) + (self._base.live_count if self._base is not None else 0)
+
+    def __contains__(self, recipe_id: int) -> bool:
+        return recipe_id in self._rows or (self._base is not None and self._base.contains(recipe_id))
+
+    def attach_base(self, segment: SnapshotSegment) -> None:
+        if self._base is not None:
+            self._base.close()
+        self._base = segment
+        for recipe_id in self._rows:
+            segment.kill(recipe_id)
+
+    def doc_ids(self) -> Iterator[int]:
+        yield from self._rows
+        if self._base is not None:
+            yield from self._base.doc_ids()
+
+    def iter_postings(self) -> Iterator[tuple[str, int, float]]:
+        for gram, term_id in self._vocabulary.items():
+            for recipe_id, weight in self._postings[term_id].items():
+                yield gram, recipe_id, weight
+        if self._base is not None:
+            yield from self._base.iter_postings()
+
+    def _term_id(self, gram: str) -> int:
+        term_id = self._vocabulary.get(gram)
+        if term_id is None:
+            term_id = len(self._doc_freq)
+            self._vocabulary[gram] = term_id
+            self._doc_freq.append(0)
+            self._postings.append({})
+        return term_id
+
+    def add(self, recipe_id: int, title: str | None, ingredients: list[str]) -> None:
+        self.remove(recipe_id)
+        grams = _ngrams([title or "", *ingredients], self.ngram_size)
+        if not grams:
+            return
+
+        weights = {gram: _log_tf(count) for gram, count in grams.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        row: dict[int, float] = {}
+        for gram, weight in weights.items():
+            term_id = self._term_id(gram)
+            value = weight / norm
+            row[term_id] = value
+            self._postings[term_id][recipe_id] = value
+            self._doc_freq[term_id] += 1
+        self._rows[recipe_id] = row
+
+    def remove(self, recipe_id: int) -> bool:
+        row = self._rows.pop(recipe_id, None)
+        if row is None:
+            return self._base is not None and self._base.kill(recipe_id)
+        for term_id in row:
+            self._postings[term_id].pop(recipe_id, None)
+            self._doc_freq[term_id] -= 1
+        return True
+
+    def _idf(self, doc_freq: int) -> float:
+        return math.log((len(self) + 1) / (doc_freq + 1)) + 1.0
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 3,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> list[TextMatch]:
+        if not len(self):
+            return []
+
+        # N-grams unseen in the corpus get the maximum IDF: they lower the score
+        # through the query norm without matching any document.
+        query_weights: list[tuple[str, int | None, float]] = []
+        squared_norm = 0.0
+        for gram, count in _ngrams([parse_text_query(query).text], self.ngram_size).items():
+            term_id = self._vocabulary.get(gram)
+            doc_freq = self._doc_freq[term_id] if term_id is not None else 0
+            if self._base is not None:
+                doc_freq += self._base.doc_freq(gram)
+            weight = _log_tf(count) * self._idf(doc_freq)
+            squared_norm += weight * weight
+            if doc_freq:
+                query_weights.append((gram, term_id, weight))
+        norm = math.sqrt(squared_norm)
+        if not norm:
+            return []
+
+        scores: dict[int, float] = {}
+        for gram, term_id, weight in query_weights:
+            query_value = weight / norm
+            if term_id is not None:
+                for recipe_id, doc_value in self._postings[term_id].items():
+                    scores[recipe_id] = scores.get(recipe_id, 0.0) + query_value * doc_value
+            if self._base is not None:
+                for recipe_id, doc_value in self._base.postings(gram):
+                    scores[recipe_id] = scores.get(recipe_id, 0.0) + query_value * doc_value
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda pair: (pair[1], pair[0]))
+        return [
+            TextMatch(recipe_id=recipe_id, score=score)
+            for recipe_id, score in best
+            if score >= min_score
+        ]
+
+
+recipe_text_index = RecipeTextIndex()
+
+
+async def sync_recipe_text_index(repo: RecipeRepository, index: RecipeTextIndex = recipe_text_index) -> int:
+    added = 0
+    while True:
+        rows = await repo.list_recipe_index_rows(after_id=index.high_water_mark, limit=SYNC_BATCH_SIZE)
+        for row in rows:
+            index.add(row.id, row.title, row.ingredients)
+            index.high_water_mark = max(index.high_water_mark, row.id)
+        added += len(rows)
+        if len(rows) < SYNC_BATCH_SIZE:
+            return added
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import re
+
+
+def split_ingredients(text: str) -> list[str]:
+    normalized = text.replace("\n", ",").replace(";", ",")
+    return [item.strip() for item in normalized.split(",") if item.strip()]
+
+
+def extract_source_ingredients(request_text: str) -> list[str]:
+    items = split_ingredients(request_text)
+    if len(items) > 1:
+        return items[:8]
+
+    tokens = re.findall(r"[a-zа-я0-9]+", request_text.lower())
+    return tokens[:6]
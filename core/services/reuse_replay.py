@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from core.config import settings
+from core.services.recipe_match_service import find_best_recipe_match
+from core.services.recipe_text_index import DEFAULT_MIN_SCORE, RecipeTextIndex
+from core.services.request_parsing import extract_source_ingredients, split_ingredients
+from db.repo import RecipeCandidate
+
+REQUEST_EVENT = "recipe_request_received"
+DEFAULT_JACCARD_GRID = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+DEFAULT_INTERSECTION_GRID = (2, 3, 4)
+DEFAULT_LLM_LATENCY_SECONDS = 12.0
+
+
+@dataclass(slots=True, frozen=True)
+class ReplayRequest:
+    mode: str
+    text: str
+
+
+@dataclass(slots=True, frozen=True)
+class ReplayReport:
+    min_jaccard: float
+    min_intersection: int
+    requests: int
+    ingredient_hits: int
+    text_hits: int
+    match_seconds: float
+    llm_latency_seconds: float
+
+    @property
+    def hits(self) -> int:
+        return self.ingredient_hits + self.text_hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    @property
+    def llm_calls_saved(self) -> int:
+        return self.hits
+
+    @property
+    def latency_saved_seconds(self) -> float:
+        return self.hits * self.llm_latency_seconds - self.match_seconds
+
+
+def request_log_fields(mode: str, **content: Any) -> dict[str, Any]:
+    # Request text can carry allergy or health details, so it is written to
+    # the log for replay only when RECORD_RECIPE_REQUESTS is switched on.
+    if settings.record_recipe_requests:
+        return {"mode": mode, **content}
+    return {"mode": mode}
+
+
+def _request_from_record(record: dict[str, Any]) -> ReplayRequest | None:
+    # Accept both the fixture format and raw structlog lines from the bot.
+    if "event" in record and record["event"] != REQUEST_EVENT:
+        return None
+    mode = record.get("mode")
+    if mode == "ingredients":
+        raw = record.get("text") or record.get("ingredients") or []
+        text = ", ".join(str(item) for item in raw) if isinstance(raw, list) else str(raw)
+    elif mode == "ready_dish":
+        text = str(record.get("text") or record.get("dish_request") or "")
+    else:
+        return None
+    text = text.strip()
+    return ReplayRequest(mode=mode, text=text) if text else None
+
+
+def parse_request_line(line: str) -> ReplayRequest | None:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return _request_from_record(record) if isinstance(record, dict) else None
+
+
+def load_requests(path: Path) -> list[ReplayRequest]:
+    with path.open(encoding="utf-8") as handle:
+        return [request for line in handle if (request := parse_request_line(line)) is not None]
+
+
+def _candidate_from_record(record: dict[str, Any], created_at: datetime) -> RecipeCandidate:
+    ingredients = record.get("ingredients") or record.get("source_ingredients") or []
+    return RecipeCandidate(
+        id=int(record["id"]),
+        title=record.get("title"),
+        time_minutes=record.get("time_minutes"),
+        rating=int(record.get("rating", 0)),
+        created_at=created_at,
+        source_ingredients=tuple(str(value) for value in record.get("source_ingredients") or []),
+        ingredients=tuple(str(value) for value in ingredients if str(value).strip()),
+    )
+
+
+def load_corpus(path: Path) -> tuple[list[RecipeCandidate], list[ReplayRequest]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    # Fixed timestamps keep ranking ties reproducible between runs.
+    base_time = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    candidates = [
+        _candidate_from_record(record, base_time + timedelta(minutes=position))
+        for position, record in enumerate(payload.get("recipes", []))
+    ]
+    requests = [
+        request
+        for record in payload.get("requests", [])
+        if (request := _request_from_record(record)) is not None
+    ]
+    return candidates, requests
+
+
+def _build_text_index(candidates: list[RecipeCandidate]) -> RecipeTextIndex:
+    index = RecipeTextIndex()
+    for item in candidates:
+        index.add(item.id, item.title, list(item.ingredients or item.source_ingredients))
+    return index
+
+
+def replay(
+    requests: list[ReplayRequest],
+    candidates: list[RecipeCandidate],
+    *,
+    jaccard_grid: tuple[float, ...] = DEFAULT_JACCARD_GRID,
+    intersection_grid: tuple[int, ...] = DEFAULT_INTERSECTION_GRID,
+    text_min_score: float = DEFAULT_MIN_SCORE,
+    llm_latency_seconds: float = DEFAULT_LLM_LATENCY_SECONDS,
+) -> list[ReplayReport]:
+    text_index = _build_text_index(candidates)
+    # Text matching does not depend on the grid, so it is evaluated once per request.
+    text_results: dict[int, tuple[bool, float]] = {}
+    for position, request in enumerate(requests):
+        if request.mode != "ready_dish":
+            continue
+        started = time.perf_counter()
+        matched = bool(text_index.search(request.text, limit=1, min_score=text_min_score))
+        text_results[position] = (matched, time.perf_counter() - started)
+
+    reports: list[ReplayReport] = []
+    for min_jaccard in jaccard_grid:
+        for min_intersection in intersection_grid:
+            ingredient_hits = 0
+            text_hits = 0
+            match_seconds = 0.0
+            for position, request in enumerate(requests):
+                if request.mode == "ingredients":
+                    source = split_ingredients(request.text)
+                else:
+                    source = extract_source_ingredients(request.text)
+                    if len(source) < 2:
+                        source = []
+
+                started = time.perf_counter()
+                match = (
+                    find_best_recipe_match(
+                        source,
+                        candidates,
+                        min_jaccard=min_jaccard,
+                        min_intersection=min_intersection,
+                    )
+                    if source
+                    else None
+                )
+                match_seconds += time.perf_counter() - started
+                if match is not None:
+                    ingredient_hits += 1
+                elif position in text_results:
+                    text_matched, text_seconds = text_results[position]
+                    match_seconds += text_seconds
+                    text_hits += int(text_matched)
+
+            reports.append(
+                ReplayReport(
+                    min_jaccard=min_jaccard,
+                    min_intersection=min_intersection,
+                    requests=len(requests),
+                    ingredient_hits=ingredient_hits,
+                    text_hits=text_hits,
+                    match_seconds=match_seconds,
+                    llm_latency_seconds=llm_latency_seconds,
+                )
+            )
+    return reports
+
+
+def format_reports(reports: list[ReplayReport]) -> str:
+    lines = [
+        "jaccard  min_inter  requests  hits  hit_rate  llm_saved  latency_saved_s  match_ms",
+    ]
+    for report in reports:
+        lines.append(
+            f"{report.min_jaccard:>7.2f}  {report.min_intersection:>9d}  {report.requests:>8d}  "
+            f"{report.hits:>4d}  {report.hit_rate:>8.1%}  {report.llm_calls_saved:>9d}  "
+            f"{report.latency_saved_seconds:>15.1f}  {report.match_seconds * 1000:>8.2f}"
+        )
+    return "\n".join(lines)
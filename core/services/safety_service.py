@@ -1,7 +1,15 @@
 from __future__ import annotations
 
-import re
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from core.services.lexicons import SAFETY_LEXICON, LexiconError, LexiconReport, lexicon_path, read_lexicon
+from core.services.text_normalization import collapse_separators, normalize_text
 
 
 @dataclass(slots=True, frozen=True)
@@ -9,125 +17,345 @@ class SafetyResult:
     is_safe: bool
     category: str | None = None
     matched_terms: tuple[str, ...] = ()
+    categories: tuple[str, ...] = ()
+    # (category, its matched terms) in the order of `categories`.
+    terms_by_category: tuple[tuple[str, tuple[str, ...]], ...] = ()
+
+
+@dataclass(slots=True, frozen=True)
+class TermMatch:
+    category: str
+    term: str
+    start: int
+    end: int
+
+
+class _TermAutomaton:
+    # Aho-Corasick automaton over normalized terms. Failure links are folded
+    # into a full transition table, so scanning costs one dict lookup per char.
+    __slots__ = ("terms", "_patterns", "_transitions", "_outputs")
+
+    def __init__(self, terms: list[tuple[str, str, str]]) -> None:
+        # terms: (category, original term, normalized term); ids follow list order.
+        self.terms = terms
+        self._patterns = tuple(dict.fromkeys(pattern for _, _, pattern in terms))
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[tuple[int, ...]] = [()]
+        for term_id, (_, _, pattern) in enumerate(terms):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] += (term_id,)
+
+        fail = [0] * len(goto)
+        transitions: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = transitions[fail[state]].get(char, 0)
+                queue.append(next_state)
+        self._transitions = transitions
+        self._outputs = outputs
+
+    @property
+    def state_count(self) -> int:
+        return len(self._transitions)
+
+    def size_bytes(self) -> int:
+        return sum(map(sys.getsizeof, self._transitions)) + sum(map(sys.getsizeof, self._outputs))
+
+    def might_match(self, text: str) -> bool:
+        # The per-char loop runs in Python; a C-level substring check lets
+        # clean texts, the common case, skip it entirely.
+        return any(pattern in text for pattern in self._patterns)
+
+    def advance(self, state: int, text: str) -> tuple[int, list[int]]:
+        # Resumable variant of scan for streamed text: returns the state to
+        # continue from and the ids of the terms that ended inside `text`.
+        transitions = self._transitions
+        outputs = self._outputs
+        found: list[int] = []
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.extend(outputs[state])
+        return state, found
+
+    def scan(self, text: str) -> Iterator[tuple[int, int]]:
+        # Yields (term id, end offset) for every occurrence, overlapping ones included.
+        if not self.might_match(text):
+            return
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+        for position, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for term_id in outputs[state]:
+                    yield term_id, position + 1
+
+
+@dataclass(slots=True, frozen=True)
+class SafetyLexicon:
+    version: int
+    automaton: _TermAutomaton
+    category_labels: dict[str, str]
+    safe_alternatives: dict[str, tuple[str, ...]]
+
+
+def compile_safety_lexicon(payload: dict[str, Any]) -> SafetyLexicon:
+    terms: list[tuple[str, str, str]] = []
+    for category, category_terms in payload["prohibited_terms"].items():
+        for term in category_terms:
+            pattern = normalize_text(term)
+            if pattern:
+                terms.append((category, term, pattern))
+    if not terms:
+        raise LexiconError("Safety lexicon has no prohibited terms")
+    labels = payload.get("category_labels") or {}
+    return SafetyLexicon(
+        version=payload["version"],
+        automaton=_TermAutomaton(terms),
+        category_labels={str(key): str(value) for key, value in labels.items()},
+        safe_alternatives={key: tuple(values) for key, values in payload["safe_alternatives"].items()},
+    )
+
+
+def load_safety_lexicon(path: Path | None = None) -> tuple[SafetyLexicon, LexiconReport]:
+    # Reads and compiles without touching the active lexicon; callers swap
+    # the result in with install_safety_lexicon.
+    started = time.perf_counter()
+    payload = read_lexicon(path or lexicon_path(SAFETY_LEXICON), ("prohibited_terms", "safe_alternatives"))
+    lexicon = compile_safety_lexicon(payload)
+    report = LexiconReport(
+        name=SAFETY_LEXICON,
+        version=lexicon.version,
+        entries=len(lexicon.automaton.terms),
+        compile_ms=(time.perf_counter() - started) * 1000,
+        size_bytes=lexicon.automaton.size_bytes(),
+    )
+    return lexicon, report
+
+
+_lexicon, _ = load_safety_lexicon()
+
+
+def install_safety_lexicon(lexicon: SafetyLexicon) -> None:
+    # Rebinding one module global is atomic: requests that already hold the
+    # previous lexicon finish with it, new ones pick up the replacement.
+    global _lexicon
+    _lexicon = lexicon
+
+
+def current_safety_lexicon() -> SafetyLexicon:
+    return _lexicon
+
 
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    # Normalized text only contains letters, digits and single spaces.
+    return (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " ")
 
-_PROHIBITED_TERMS: dict[str, tuple[str, ...]] = {
-    "cannibalism_human_tissue": (
-        "человечина",
-        "человеческое мясо",
-        "мясо человека",
-        "человеческая кровь",
-        "каннибал",
-        "каннибализм",
-        "людоед",
-        "human meat",
-        "human flesh",
-        "cannibal",
-    ),
-    "dangerous_non_food": (
-        "ртуть",
-        "мышьяк",
-        "цианид",
-        "антифриз",
-        "бензин",
-        "керосин",
-        "ацетон",
-        "отбеливатель",
-        "хлорка",
-        "пластик",
-        "стекло",
-        "battery acid",
-        "bleach",
-        "gasoline",
-        "mercury",
-        "arsenic",
-        "cyanide",
-    ),
-    "illegal_drugs": (
-        "кокаин",
-        "героин",
-        "метамфетамин",
-        "амфетамин",
-        "лсд",
-        "мдма",
-        "спайс",
-        "наркотик",
-        "cocaine",
-        "heroin",
-        "methamphetamine",
-        "amphetamine",
-        "lsd",
-        "mdma",
-    ),
-}
-
-_CATEGORY_LABELS: dict[str, str] = {
-    "cannibalism_human_tissue": "человеческие ткани / каннибализм",
-    "dangerous_non_food": "опасные или несъедобные вещества",
-    "illegal_drugs": "нелегальные или наркотические вещества",
-}
-
-_SAFE_ALTERNATIVES: dict[str, tuple[str, ...]] = {
-    "cannibalism_human_tissue": ("куриная грудка", "тофу", "нут", "шампиньоны"),
-    "dangerous_non_food": ("цветная капуста", "нут", "гречка", "оливковое масло"),
-    "illegal_drugs": ("какао", "ваниль", "мята", "лимонная цедра"),
-}
-
-
-def normalize_text(value: str) -> str:
-    normalized = value.lower().replace("ё", "е")
-    normalized = re.sub(r"[^a-zа-я0-9\s]+", " ", normalized)
-    normalized = re.sub(r"\s+", " ", normalized)
-    return normalized.strip()
-
-
-def _collect_matches(text: str) -> tuple[str | None, tuple[str, ...]]:
-    if not text:
-        return None, ()
-
-    matches: list[str] = []
-    for category, terms in _PROHIBITED_TERMS.items():
-        category_matches = [term for term in terms if normalize_text(term) in text]
-        if category_matches:
-            matches.extend(category_matches)
-            deduped = tuple(dict.fromkeys(matches))
-            return category, deduped
-    return None, ()
-
-
-def check_user_input(items: list[str] | str) -> SafetyResult:
+
+def _scan(automaton: _TermAutomaton, text: str, whole_words: bool) -> Iterator[tuple[int, int, int]]:
+    for term_id, end in automaton.scan(text):
+        start = end - len(automaton.terms[term_id][2])
+        if whole_words and not _is_word_boundary(text, start, end):
+            continue
+        yield term_id, start, end
+
+
+def find_prohibited_terms(text: str, *, whole_words: bool = False) -> list[TermMatch]:
+    # Offsets refer to the normalized text, which is what gets scanned.
+    automaton = _lexicon.automaton
+    return [
+        TermMatch(category=automaton.terms[term_id][0], term=automaton.terms[term_id][1], start=start, end=end)
+        for term_id, start, end in _scan(automaton, text, whole_words)
+    ]
+
+
+def _build_result(automaton: _TermAutomaton, term_ids: list[int]) -> SafetyResult:
+    if not term_ids:
+        return SafetyResult(is_safe=True)
+    # Term ids follow declaration order, so the first category keeps the
+    # priority it had when checks stopped at the first matching category.
+    grouped: dict[str, dict[str, None]] = {}
+    for term_id in term_ids:
+        category, term, _ = automaton.terms[term_id]
+        grouped.setdefault(category, {})[term] = None
+    return SafetyResult(
+        is_safe=False,
+        category=next(iter(grouped)),
+        matched_terms=tuple(dict.fromkeys(automaton.terms[term_id][1] for term_id in term_ids)),
+        categories=tuple(grouped),
+        terms_by_category=tuple((category, tuple(terms)) for category, terms in grouped.items()),
+    )
+
+
+def _collect_matches(text: str, whole_words: bool) -> SafetyResult:
+    automaton = _lexicon.automaton
+    return _build_result(automaton, sorted({term_id for term_id, _, _ in _scan(automaton, text, whole_words)}))
+
+
+# Fields checked by check_recipe_output, in the full and the compact
+# response contract; the stream must not gate on anything else.
+GATED_RECIPE_FIELDS = frozenset({"title", "ingredients", "steps", "t", "i", "s"})
+_JSON_ESCAPES = {"n": " ", "t": " ", "r": " ", "b": " ", "f": " "}
+
+
+class _GatedJsonText:
+    # Incremental JSON tokenizer: passes through only the string values under
+    # the given top-level keys, one space after each value. Keys, numbers and
+    # text outside the object are dropped.
+    __slots__ = ("_fields", "_stack", "_expect_key", "_in_string", "_is_key", "_key", "_top_key", "_escape")
+
+    def __init__(self, fields: frozenset[str]) -> None:
+        self._fields = fields
+        self._stack: list[str] = []
+        self._expect_key = False
+        self._in_string = False
+        self._is_key = False
+        self._key: list[str] = []
+        self._top_key: str | None = None
+        # None outside an escape, otherwise the escape read so far ("\\", "\\u04").
+        self._escape: str | None = None
+
+    def _gated(self) -> bool:
+        return bool(self._stack) and self._top_key in self._fields
+
+    def _emit(self, text: str, out: list[str]) -> None:
+        if self._is_key:
+            self._key.append(text)
+        elif self._gated():
+            out.append(text)
+
+    def _string_char(self, char: str, out: list[str]) -> None:
+        if self._escape is not None:
+            self._escape += char
+            if self._escape.startswith("\\u") and len(self._escape) < 6:
+                return
+            if self._escape.startswith("\\u"):
+                try:
+                    decoded = chr(int(self._escape[2:], 16))
+                except ValueError:
+                    decoded = " "
+                self._emit(" " if "\ud800" <= decoded <= "\udfff" else decoded, out)
+            else:
+                self._emit(_JSON_ESCAPES.get(char, char), out)
+            self._escape = None
+        elif char == "\\":
+            self._escape = "\\"
+        elif char == '"':
+            self._in_string = False
+            if self._is_key:
+                if len(self._stack) == 1:
+                    self._top_key = "".join(self._key)
+            elif self._gated():
+                out.append(" ")
+        else:
+            self._emit(char, out)
+
+    def feed(self, chunk: str) -> str:
+        out: list[str] = []
+        for char in chunk:
+            if self._in_string:
+                self._string_char(char, out)
+            elif char == '"':
+                self._in_string = True
+                self._is_key = self._expect_key and self._stack[-1:] == ["{"]
+                self._key = []
+            elif char in "{[":
+                self._stack.append(char)
+                self._expect_key = char == "{"
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = self._stack[-1:] == ["{"]
+            elif char == ":":
+                self._expect_key = False
+        return "".join(out)
+
+
+class StreamingSafetyScanner:
+    # Normalizes and scans text chunk by chunk; the automaton state and the
+    # pending separator are carried over, so terms split across chunks match.
+    # The automaton is pinned at creation so a reload cannot reset the state.
+    # With `fields`, the chunks are JSON and only those fields are scanned.
+    __slots__ = ("_automaton", "_state", "_ends_with_space", "_term_ids", "_json", "chars_seen")
+
+    def __init__(self, fields: frozenset[str] | None = None) -> None:
+        self._automaton = _lexicon.automaton
+        self._state = 0
+        self._ends_with_space = True
+        self._term_ids: set[int] = set()
+        self._json = _GatedJsonText(fields) if fields is not None else None
+        self.chars_seen = 0
+
+    def feed(self, chunk: str) -> SafetyResult:
+        self.chars_seen += len(chunk)
+        if self._json is not None:
+            chunk = self._json.feed(chunk)
+        normalized = collapse_separators(chunk)
+        if self._ends_with_space:
+            normalized = normalized.lstrip(" ")
+        if normalized:
+            self._state, found = self._automaton.advance(self._state, normalized)
+            self._term_ids.update(found)
+            self._ends_with_space = normalized.endswith(" ")
+        return self.result()
+
+    def result(self) -> SafetyResult:
+        return _build_result(self._automaton, sorted(self._term_ids))
+
+
+def check_user_input(items: list[str] | str, *, whole_words: bool = False) -> SafetyResult:
     if isinstance(items, str):
         values = [items]
     else:
         values = items
     joined = " ".join(value for value in values if value).strip()
-    category, terms = _collect_matches(normalize_text(joined))
-    if category is None:
-        return SafetyResult(is_safe=True)
-    return SafetyResult(is_safe=False, category=category, matched_terms=terms)
+    return _collect_matches(normalize_text(joined), whole_words)
 
 
-def check_recipe_output(recipe_title: str, ingredients: list[str], steps: list[str]) -> SafetyResult:
+def check_recipe_output(
+    recipe_title: str,
+    ingredients: list[str],
+    steps: list[str],
+    *,
+    whole_words: bool = False,
+) -> SafetyResult:
     text = " ".join([recipe_title, *ingredients, *steps]).strip()
-    category, terms = _collect_matches(normalize_text(text))
-    if category is None:
-        return SafetyResult(is_safe=True)
-    return SafetyResult(is_safe=False, category=category, matched_terms=terms)
+    return _collect_matches(normalize_text(text), whole_words)
 
 
 def build_block_message(result: SafetyResult) -> str:
     if result.is_safe:
         return "Запрос безопасен."
 
-    category = result.category or "unknown"
-    category_label = _CATEGORY_LABELS.get(category, "небезопасные ингредиенты")
-    alternatives = ", ".join(_SAFE_ALTERNATIVES.get(category, ("куриная грудка", "тофу", "овощи")))
-    matched = ", ".join(result.matched_terms) if result.matched_terms else "не указано"
+    lexicon = _lexicon
+    groups = result.terms_by_category or ((result.category or "unknown", result.matched_terms),)
+    # One block per category, so terms are never shown under another category's label.
+    blocks = []
+    for category, terms in groups:
+        category_label = lexicon.category_labels.get(category, "небезопасные ингредиенты")
+        alternatives = ", ".join(lexicon.safe_alternatives.get(category, ("куриная грудка", "тофу", "овощи")))
+        matched = ", ".join(terms) if terms else "не указано"
+        blocks.append(
+            f"Категория: {category_label}.\n"
+            f"Что обнаружено: {matched}.\n"
+            f"Попробуйте безопасные альтернативы: {alternatives}."
+        )
 
-    return (
-        "Не могу помочь с этим запросом, потому что в нем есть запрещенные или опасные ингредиенты.\n"
-        f"Категория: {category_label}.\n"
-        f"Что обнаружено: {matched}.\n"
-        f"Попробуйте безопасные альтернативы: {alternatives}."
-    )
+    intro = "Не могу помочь с этим запросом, потому что в нем есть запрещенные или опасные ингредиенты."
+    return intro + "\n" + "\n\n".join(blocks)
 
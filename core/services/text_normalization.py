@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = 16384
+# Ingredient names and prohibited terms are short and repeat a lot; long
+# texts such as LLM outputs are unique and would only churn the cache.
+SHORT_TEXT_LENGTH = 64
+
+# One pass replaces punctuation and whitespace runs alike, which is what the
+# old "punctuation to space, then collapse whitespace" chains computed.
+_SEPARATOR_RE = re.compile(r"[^a-zа-я0-9]+")
+
+
+def fold_case(value: str) -> str:
+    return value.lower().replace("ё", "е")
+
+
+def collapse_separators(value: str) -> str:
+    # Same as normalize_text but keeps a leading or trailing space, so
+    # streamed chunks can be joined without losing word boundaries.
+    return _SEPARATOR_RE.sub(" ", fold_case(value))
+
+
+def _normalize(value: str) -> str:
+    return _SEPARATOR_RE.sub(" ", fold_case(value)).strip()
+
+
+_normalize_cached = lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(_normalize)
+
+
+def normalize_text(value: str) -> str:
+    if len(value) <= SHORT_TEXT_LENGTH:
+        return _normalize_cached(value)
+    return _normalize(value)
+
+
+def normalize_cache_info():
+    return _normalize_cached.cache_info()
+
+
+def clear_normalize_cache() -> None:
+    _normalize_cached.cache_clear()
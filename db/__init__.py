@@ -1,13 +1,26 @@
-from db.models import Recipe, RecipeVote, User, UserFavorite
-from db.repo import RecipeRepository, RecipeWithRating, UserSettings
+from db.models import IngredientPlateGroup, Recipe, RecipeVote, User, UserFavorite
+from db.repo import (
+    RecipeCandidate,
+    RecipeDetail,
+    RecipeIndexRow,
+    RecipeListRow,
+    RecipeRepository,
+    UserSettings,
+)
 from db.session import SessionFactory, engine, init_models
+from db.unit_of_work import UnitOfWork
 
 __all__ = [
+    "IngredientPlateGroup",
     "Recipe",
+    "RecipeCandidate",
+    "RecipeDetail",
+    "RecipeIndexRow",
+    "RecipeListRow",
     "RecipeRepository",
-    "RecipeWithRating",
     "RecipeVote",
     "SessionFactory",
+    "UnitOfWork",
     "User",
     "UserSettings",
     "UserFavorite",
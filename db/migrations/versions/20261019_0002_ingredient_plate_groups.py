@@ -0,0 +1,46 @@
+"""Add ingredient_plate_groups learned from stored plate maps.
+
+Revision ID: 20261019_0002
+Revises: 20260218_0001
+Create Date: 2026-10-19 10:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0002"
+down_revision = "20260218_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingredient_plate_groups",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("canonical_key", sa.String(length=255), nullable=False),
+        sa.Column("plate_group", sa.String(length=32), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("support", sa.Integer(), nullable=False),
+        sa.Column("sample_name", sa.String(length=255), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_ingredient_plate_groups_canonical_key",
+        "ingredient_plate_groups",
+        ["canonical_key"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingredient_plate_groups_canonical_key", table_name="ingredient_plate_groups")
+    op.drop_table("ingredient_plate_groups")
@@ -0,0 +1,43 @@
+"""Add denormalized rating counters to recipes.
+
+Revision ID: 20261019_0003
+Revises: 20261019_0002
+Create Date: 2026-10-19 12:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0003"
+down_revision = "20261019_0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("recipes") as batch_op:
+        batch_op.add_column(sa.Column("rating", sa.Integer(), server_default="0", nullable=False))
+        batch_op.add_column(sa.Column("likes", sa.Integer(), server_default="0", nullable=False))
+        batch_op.add_column(sa.Column("dislikes", sa.Integer(), server_default="0", nullable=False))
+
+    # Correlated subqueries keep the backfill portable between SQLite and MySQL.
+    op.execute(
+        """
+        UPDATE recipes SET
+            likes = (SELECT COUNT(*) FROM recipe_votes v WHERE v.recipe_id = recipes.id AND v.vote = 1),
+            dislikes = (SELECT COUNT(*) FROM recipe_votes v WHERE v.recipe_id = recipes.id AND v.vote = -1)
+        """
+    )
+    op.execute("UPDATE recipes SET rating = likes - dislikes")
+    op.create_index("ix_recipes_rating_created_at", "recipes", ["rating", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipes_rating_created_at", table_name="recipes")
+    with op.batch_alter_table("recipes") as batch_op:
+        batch_op.drop_column("dislikes")
+        batch_op.drop_column("likes")
+        batch_op.drop_column("rating")
@@ -0,0 +1,103 @@
+"""Add precomputed browse filter attributes to recipes.
+
+Revision ID: 20261019_0004
+Revises: 20261019_0003
+Create Date: 2026-10-19 14:00:00
+"""
+
+from __future__ import annotations
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0004"
+down_revision = "20261019_0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 500
+
+# Frozen copy of core.services.recipe_attributes as of this revision: later
+# changes to the app rules must not change what this migration writes.
+FAST_RECIPE_MINUTES = 20
+ANIMAL_KEYWORDS = (
+    "кур",
+    "индей",
+    "говя",
+    "свин",
+    "бекон",
+    "рыб",
+    "лосос",
+    "тунец",
+    "кревет",
+    "краб",
+    "мяс",
+)
+_SEPARATOR_RE = re.compile(r"[^a-zа-я0-9]+")
+
+recipes = sa.table(
+    "recipes",
+    sa.column("id", sa.Integer()),
+    sa.column("time_minutes", sa.Integer()),
+    sa.column("source_ingredients", sa.JSON()),
+    sa.column("llm_response", sa.JSON()),
+    sa.column("is_vegetarian", sa.Boolean()),
+    sa.column("is_fast", sa.Boolean()),
+)
+
+
+def _normalize(value: str) -> str:
+    return _SEPARATOR_RE.sub(" ", value.lower().replace("ё", "е")).strip()
+
+
+def _recipe_flags(llm_response: dict, source_ingredients: list | None) -> tuple[bool, bool]:
+    ingredients = llm_response.get("ingredients") or source_ingredients or []
+    normalized = " ".join(_normalize(str(item)) for item in ingredients)
+    is_vegetarian = not any(keyword in normalized for keyword in ANIMAL_KEYWORDS)
+    time_minutes = llm_response.get("time_minutes")
+    return is_vegetarian, time_minutes is not None and time_minutes <= FAST_RECIPE_MINUTES
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("recipes") as batch_op:
+        batch_op.add_column(sa.Column("is_vegetarian", sa.Boolean(), server_default="0", nullable=False))
+        batch_op.add_column(sa.Column("is_fast", sa.Boolean(), server_default="0", nullable=False))
+
+    # The vegetarian check is keyword matching over normalized text, so the
+    # backfill runs in Python, in id batches.
+    bind = op.get_bind()
+    after_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(recipes.c.id, recipes.c.time_minutes, recipes.c.source_ingredients, recipes.c.llm_response)
+            .where(recipes.c.id > after_id)
+            .order_by(recipes.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for recipe_id, time_minutes, source_ingredients, llm_response in rows:
+            payload = {"time_minutes": time_minutes, **(llm_response or {})}
+            is_vegetarian, is_fast = _recipe_flags(payload, source_ingredients)
+            bind.execute(
+                recipes.update()
+                .where(recipes.c.id == recipe_id)
+                .values(is_vegetarian=is_vegetarian, is_fast=is_fast)
+            )
+        after_id = rows[-1][0]
+
+    op.create_index(
+        "ix_recipes_is_vegetarian_rating", "recipes", ["is_vegetarian", "rating", "created_at"], unique=False
+    )
+    op.create_index("ix_recipes_is_fast_rating", "recipes", ["is_fast", "rating", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipes_is_fast_rating", table_name="recipes")
+    op.drop_index("ix_recipes_is_vegetarian_rating", table_name="recipes")
+    with op.batch_alter_table("recipes") as batch_op:
+        batch_op.drop_column("is_fast")
+        batch_op.drop_column("is_vegetarian")
@@ -0,0 +1,35 @@
+"""Add composite indexes for the history and feed queries.
+
+Revision ID: 20261019_0005
+Revises: 20261019_0004
+Create Date: 2026-10-19 16:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0005"
+down_revision = "20261019_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_recipes_user_id_created_at", "recipes", ["user_id", "created_at"], unique=False)
+    op.create_index("ix_recipes_created_at", "recipes", ["created_at"], unique=False)
+    # Superseded by the composite indexes above and by the (user_id, recipe_id)
+    # unique keys on recipe_votes and user_favorites, which also serve the
+    # liked and favorite probes; the foreign keys keep a leading user_id index.
+    op.drop_index("ix_recipes_user_id", table_name="recipes")
+    op.drop_index("ix_recipe_votes_user_id", table_name="recipe_votes")
+    op.drop_index("ix_user_favorites_user_id", table_name="user_favorites")
+
+
+def downgrade() -> None:
+    op.create_index("ix_user_favorites_user_id", "user_favorites", ["user_id"], unique=False)
+    op.create_index("ix_recipe_votes_user_id", "recipe_votes", ["user_id"], unique=False)
+    op.create_index("ix_recipes_user_id", "recipes", ["user_id"], unique=False)
+    op.drop_index("ix_recipes_created_at", table_name="recipes")
+    op.drop_index("ix_recipes_user_id_created_at", table_name="recipes")
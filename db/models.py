@@ -3,7 +3,20 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import BigInteger, CheckConstraint, DateTime, ForeignKey, Integer, JSON, String, UniqueConstraint, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -32,9 +45,19 @@ class User(Base):
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    # Serves the "top" ordering as a backward index scan.
+    __table_args__ = (
+        Index("ix_recipes_rating_created_at", "rating", "created_at"),
+        Index("ix_recipes_is_vegetarian_rating", "is_vegetarian", "rating", "created_at"),
+        Index("ix_recipes_is_fast_rating", "is_fast", "rating", "created_at"),
+        # History and per-user reuse candidates: user_id = ? ORDER BY created_at.
+        Index("ix_recipes_user_id_created_at", "user_id", "created_at"),
+        # Global recent feed: ORDER BY created_at DESC LIMIT n.
+        Index("ix_recipes_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     request_type: Mapped[str] = mapped_column(String(32), default="ingredients")
     title: Mapped[str | None] = mapped_column(String(255), nullable=True)
     time_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -43,6 +66,13 @@ class Recipe(Base):
     supplemented_ingredients: Mapped[list[str]] = mapped_column(JSON, default=list)
     plate_map: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
     llm_response: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+    # Denormalized from recipe_votes and kept in step by RecipeRepository.set_vote.
+    rating: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    likes: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    dislikes: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Browse filter attributes, computed by core.services.recipe_attributes on save.
+    is_vegetarian: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
+    is_fast: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user: Mapped["User"] = relationship(back_populates="recipes")
@@ -58,7 +88,7 @@ class RecipeVote(Base):
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     recipe_id: Mapped[int] = mapped_column(ForeignKey("recipes.id", ondelete="CASCADE"), index=True)
     vote: Mapped[int] = mapped_column(Integer)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -74,12 +104,29 @@ class RecipeVote(Base):
 
 class UserFavorite(Base):
     __tablename__ = "user_favorites"
+    # The unique key also serves (user_id, recipe_id) lookups and user_id scans.
     __table_args__ = (UniqueConstraint("user_id", "recipe_id", name="uq_user_favorites_user_recipe"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     recipe_id: Mapped[int] = mapped_column(ForeignKey("recipes.id", ondelete="CASCADE"), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user: Mapped["User"] = relationship(back_populates="favorites")
     recipe: Mapped["Recipe"] = relationship(back_populates="favorites")
+
+
+class IngredientPlateGroup(Base):
+    __tablename__ = "ingredient_plate_groups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    canonical_key: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    plate_group: Mapped[str] = mapped_column(String(32))
+    confidence: Mapped[float] = mapped_column(Float)
+    support: Mapped[int] = mapped_column(Integer)
+    sample_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
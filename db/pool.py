@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+
+@dataclass(slots=True)
+class PoolMetrics:
+    checkouts: int = 0
+    overflow_events: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record_checkout(self, wait_seconds: float, overflowed: bool) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        if overflowed:
+            self.overflow_events += 1
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    # Queue pool that records how long each checkout waited for an idle (or
+    # newly opened) connection, how often it had to open an overflow
+    # connection and how often it gave up after pool_timeout.
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        overflow_before = self.overflow()
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        overflow_after = self.overflow()
+        self.metrics.record_checkout(
+            time.perf_counter() - started,
+            overflowed=overflow_after > 0 and overflow_after > overflow_before,
+        )
+        return entry
+
+    def info(self) -> dict[str, float]:
+        metrics = self.metrics
+        return {
+            "size": self.size(),
+            "in_use": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": metrics.checkouts,
+            "overflow_events": metrics.overflow_events,
+            "timeouts": metrics.timeouts,
+            "wait_ms_avg": metrics.wait_seconds_total / metrics.checkouts * 1000 if metrics.checkouts else 0.0,
+            "wait_ms_max": metrics.wait_seconds_max * 1000,
+        }
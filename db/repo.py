@@ -1,22 +1,75 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Any, Literal
 
-from sqlalchemy import Select, func, select
+from sqlalchemy import ColumnElement, Select, and_, delete, exists, func, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from db.models import Recipe, RecipeVote, User, UserFavorite
+from db.models import Base, IngredientPlateGroup, Recipe, RecipeVote, User, UserFavorite
+from db.user_cache import UserIdCache, user_id_cache
 
 RequestType = Literal["ingredients", "random"]
 BrowseScope = Literal["top", "favorites", "history"]
 GoalType = Literal["lose", "maintain", "gain"]
 
 
+# Read-path rows built from column selects: listing and matching never decode
+# the llm_response, plate_map or supplemented_ingredients blobs.
+@dataclass(slots=True, frozen=True)
+class RecipeListRow:
+    id: int
+    title: str | None
+    time_minutes: int | None
+    rating: int
+
+
+@dataclass(slots=True, frozen=True)
+class RecipeCandidate:
+    id: int
+    title: str | None
+    time_minutes: int | None
+    rating: int
+    created_at: datetime | None
+    source_ingredients: tuple[str, ...]
+    # The llm_response "ingredients" list, extracted by the database.
+    ingredients: tuple[str, ...]
+
+
+@dataclass(slots=True, frozen=True)
+class BrowseFilters:
+    only_my: bool = False
+    only_liked: bool = False
+    fast: bool = False
+    vegetarian: bool = False
+
+
 @dataclass(slots=True)
-class RecipeWithRating:
+class RecipePage:
+    items: list[RecipeListRow]
+    has_prev: bool
+    has_next: bool
+
+
+@dataclass(slots=True, frozen=True)
+class RecipeDetail:
     recipe: Recipe
     rating: int
+    is_favorite: bool
+    # 1 / -1, or 0 when the viewer has not voted.
+    viewer_vote: int
+
+
+@dataclass(slots=True)
+class RecipeIndexRow:
+    id: int
+    title: str | None
+    ingredients: list[str]
 
 
 @dataclass(slots=True)
@@ -55,8 +108,9 @@ class UserSettings:
 
 
 class RecipeRepository:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: AsyncSession, user_cache: UserIdCache = user_id_cache) -> None:
         self.session = session
+        self.user_cache = user_cache
 
     async def ensure_user(self, tg_user_id: int, username: str | None = None) -> User:
         user = await self.session.scalar(select(User).where(User.tg_user_id == tg_user_id))
@@ -71,6 +125,59 @@ class RecipeRepository:
         await self.session.flush()
         return user
 
+    async def ensure_user_id(self, tg_user_id: int, username: str | None = None) -> int:
+        cached = self.user_cache.get(tg_user_id, username)
+        if cached is not None:
+            return cached
+
+        row = (
+            await self.session.execute(select(User.id, User.username).where(User.tg_user_id == tg_user_id))
+        ).one_or_none()
+        if row is not None:
+            user_id, stored_username = row
+            if username and username != stored_username:
+                # Like first contact below: the new username is cached on the
+                # next call, once the caller's transaction has committed it.
+                await self.session.execute(update(User).where(User.id == user_id).values(username=username))
+                return user_id
+            self.user_cache.put(tg_user_id, user_id, stored_username)
+            return user_id
+
+        # First contact: an upsert, so two concurrent first updates do not
+        # trip the unique key. The id is cached on the next call, once the
+        # caller's transaction has committed the row.
+        await self.session.execute(self._user_upsert(tg_user_id, username))
+        return int(await self.session.scalar(select(User.id).where(User.tg_user_id == tg_user_id)))
+
+    def _user_upsert(self, tg_user_id: int, username: str | None) -> Any:
+        return self._upsert(
+            User,
+            {"tg_user_id": tg_user_id, "username": username, "allergies": [], "excluded_products": []},
+            [User.tg_user_id],
+            lambda incoming: {"username": func.coalesce(incoming.username, User.username)},
+        )
+
+    def _upsert(
+        self,
+        model: type[Base],
+        values: dict[str, Any],
+        conflict_columns: list[Any],
+        updates: Callable[[Any], dict[str, Any]] | None = None,
+    ) -> Any:
+        # INSERT ... ON CONFLICT (SQLite) / ON DUPLICATE KEY UPDATE (MySQL).
+        # `updates` receives the incoming row (excluded / inserted); without it
+        # an existing row is left as is.
+        if self.session.bind.dialect.name == "mysql":
+            statement = mysql_insert(model).values(**values)
+            if updates is None:
+                column = conflict_columns[0]
+                return statement.on_duplicate_key_update({column.key: column})
+            return statement.on_duplicate_key_update(updates(statement.inserted))
+        statement = sqlite_insert(model).values(**values)
+        if updates is None:
+            return statement.on_conflict_do_nothing(index_elements=conflict_columns)
+        return statement.on_conflict_do_update(index_elements=conflict_columns, set_=updates(statement.excluded))
+
     async def save_recipe(
         self,
         user_id: int,
@@ -78,6 +185,8 @@ class RecipeRepository:
         source_ingredients: list[str],
         supplemented_ingredients: list[str],
         llm_response: dict[str, Any],
+        is_vegetarian: bool = False,
+        is_fast: bool = False,
     ) -> Recipe:
         recipe = Recipe(
             user_id=user_id,
@@ -89,159 +198,267 @@ class RecipeRepository:
             time_minutes=llm_response.get("time_minutes"),
             servings=llm_response.get("servings"),
             plate_map=llm_response.get("plate_map", {}),
+            is_vegetarian=is_vegetarian,
+            is_fast=is_fast,
         )
         self.session.add(recipe)
         await self.session.flush()
         return recipe
 
-    async def set_vote(self, user_id: int, recipe_id: int, vote: Literal[-1, 1]) -> RecipeVote:
-        existing_vote = await self.session.scalar(
-            select(RecipeVote).where(RecipeVote.user_id == user_id, RecipeVote.recipe_id == recipe_id)
-        )
-        if existing_vote:
-            existing_vote.vote = vote
-            await self.session.flush()
-            return existing_vote
-
-        new_vote = RecipeVote(user_id=user_id, recipe_id=recipe_id, vote=vote)
-        self.session.add(new_vote)
+    async def update_recipe_steps(self, recipe_id: int, steps: list[str]) -> Recipe | None:
+        recipe = await self.session.get(Recipe, recipe_id)
+        if recipe is None:
+            return None
+        # A new dict, so the JSON column is seen as changed.
+        recipe.llm_response = {**(recipe.llm_response or {}), "steps": steps}
         await self.session.flush()
-        return new_vote
-
-    async def get_rating(self, recipe_id: int) -> int:
-        rating = await self.session.scalar(
-            select(func.coalesce(func.sum(RecipeVote.vote), 0)).where(RecipeVote.recipe_id == recipe_id)
-        )
-        return int(rating or 0)
+        return recipe
 
-    async def add_favorite(self, user_id: int, recipe_id: int) -> UserFavorite:
-        favorite = await self.session.scalar(
-            select(UserFavorite).where(
-                UserFavorite.user_id == user_id,
-                UserFavorite.recipe_id == recipe_id,
+    async def set_vote(self, user_id: int, recipe_id: int, vote: Literal[-1, 1]) -> int:
+        # One upsert for the vote row, then the recipe's counters are recounted
+        # from its votes (an index range on recipe_id) in the same transaction.
+        # A recount needs no previous vote, so flips, repeats and concurrent
+        # taps all converge. Returns the new rating.
+        await self.session.execute(
+            self._upsert(
+                RecipeVote,
+                {"user_id": user_id, "recipe_id": recipe_id, "vote": vote},
+                [RecipeVote.user_id, RecipeVote.recipe_id],
+                lambda incoming: {"vote": incoming.vote, "updated_at": func.now()},
             )
         )
-        if favorite:
-            return favorite
 
-        favorite = UserFavorite(user_id=user_id, recipe_id=recipe_id)
-        self.session.add(favorite)
-        await self.session.flush()
-        return favorite
+        def count(value: int) -> Any:
+            return (
+                select(func.count())
+                .where(RecipeVote.recipe_id == recipe_id, RecipeVote.vote == value)
+                .scalar_subquery()
+            )
 
-    async def remove_favorite(self, user_id: int, recipe_id: int) -> bool:
-        favorite = await self.session.scalar(
-            select(UserFavorite).where(
-                UserFavorite.user_id == user_id,
-                UserFavorite.recipe_id == recipe_id,
+        statement = (
+            update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(
+                likes=count(1),
+                dislikes=count(-1),
+                rating=select(func.coalesce(func.sum(RecipeVote.vote), 0))
+                .where(RecipeVote.recipe_id == recipe_id)
+                .scalar_subquery(),
             )
+            .execution_options(synchronize_session=False)
         )
-        if not favorite:
-            return False
-
-        await self.session.delete(favorite)
-        await self.session.flush()
-        return True
+        if self.session.bind.dialect.update_returning:
+            rating = await self.session.scalar(statement.returning(Recipe.rating))
+        else:
+            await self.session.execute(statement)
+            rating = await self.session.scalar(select(Recipe.rating).where(Recipe.id == recipe_id))
+        return int(rating or 0)
 
-    def get_top_recipes_query(self, limit: int = 10) -> Select[tuple[Recipe, int]]:
-        rating = func.coalesce(func.sum(RecipeVote.vote), 0).label("rating")
-        return (
-            select(Recipe, rating)
-            .outerjoin(RecipeVote, RecipeVote.recipe_id == Recipe.id)
-            .group_by(Recipe.id)
-            .order_by(rating.desc(), Recipe.created_at.desc())
-            .limit(limit)
+    async def add_favorite(self, user_id: int, recipe_id: int) -> None:
+        await self.session.execute(
+            self._upsert(
+                UserFavorite,
+                {"user_id": user_id, "recipe_id": recipe_id},
+                [UserFavorite.user_id, UserFavorite.recipe_id],
+            )
         )
 
-    async def get_user_liked_recipe_ids(self, user_id: int) -> set[int]:
-        rows = await self.session.scalars(
-            select(RecipeVote.recipe_id).where(RecipeVote.user_id == user_id, RecipeVote.vote == 1)
+    async def remove_favorite(self, user_id: int, recipe_id: int) -> bool:
+        result = await self.session.execute(
+            delete(UserFavorite).where(UserFavorite.user_id == user_id, UserFavorite.recipe_id == recipe_id)
         )
-        return set(rows.all())
-
-    async def get_user_favorite_recipe_ids(self, user_id: int) -> set[int]:
-        rows = await self.session.scalars(
-            select(UserFavorite.recipe_id).where(UserFavorite.user_id == user_id)
+        return result.rowcount > 0
+
+    async def get_recipe_detail(self, recipe_id: int, viewer_user_id: int) -> RecipeDetail | None:
+        # Recipe, rating, favorite flag and the viewer's vote in one round
+        # trip; both subqueries are single probes of the (user_id, recipe_id)
+        # unique keys.
+        is_favorite = exists().where(
+            UserFavorite.recipe_id == Recipe.id,
+            UserFavorite.user_id == viewer_user_id,
         )
-        return set(rows.all())
-
-    async def get_recipe_with_rating(self, recipe_id: int) -> RecipeWithRating | None:
-        rating = func.coalesce(func.sum(RecipeVote.vote), 0).label("rating")
-        row = await self.session.execute(
-            select(Recipe, rating)
-            .outerjoin(RecipeVote, RecipeVote.recipe_id == Recipe.id)
-            .where(Recipe.id == recipe_id)
-            .group_by(Recipe.id)
+        viewer_vote = (
+            select(RecipeVote.vote)
+            .where(RecipeVote.recipe_id == Recipe.id, RecipeVote.user_id == viewer_user_id)
+            .scalar_subquery()
         )
-        item = row.one_or_none()
-        if item is None:
+        row = (
+            await self.session.execute(
+                select(Recipe, is_favorite.label("is_favorite"), viewer_vote.label("viewer_vote")).where(
+                    Recipe.id == recipe_id
+                )
+            )
+        ).one_or_none()
+        if row is None:
             return None
-        recipe, recipe_rating = item
-        return RecipeWithRating(recipe=recipe, rating=int(recipe_rating or 0))
-
-    async def list_recipes_with_rating(self, scope: BrowseScope, viewer_user_id: int) -> list[RecipeWithRating]:
-        rating = func.coalesce(func.sum(RecipeVote.vote), 0).label("rating")
-        query = (
-            select(Recipe, rating)
-            .outerjoin(RecipeVote, RecipeVote.recipe_id == Recipe.id)
-            .group_by(Recipe.id)
-        )
+        recipe, favorite, vote = row
+        return RecipeDetail(recipe=recipe, rating=recipe.rating, is_favorite=bool(favorite), viewer_vote=vote or 0)
+
+    def _browse_query(
+        self,
+        query: Select[Any],
+        scope: BrowseScope,
+        viewer_user_id: int,
+        filters: BrowseFilters,
+    ) -> Select[Any]:
         if scope == "favorites":
             query = query.join(UserFavorite, UserFavorite.recipe_id == Recipe.id).where(
                 UserFavorite.user_id == viewer_user_id
             )
-            query = query.order_by(Recipe.created_at.desc())
         elif scope == "history":
-            query = query.where(Recipe.user_id == viewer_user_id).order_by(Recipe.created_at.desc())
-        else:
-            query = query.order_by(rating.desc(), Recipe.created_at.desc())
+            query = query.where(Recipe.user_id == viewer_user_id)
+        if filters.only_my:
+            query = query.where(Recipe.user_id == viewer_user_id)
+        if filters.only_liked:
+            # Semi-join served by the (user_id, recipe_id) unique key of recipe_votes.
+            query = query.where(
+                exists().where(
+                    RecipeVote.recipe_id == Recipe.id,
+                    RecipeVote.user_id == viewer_user_id,
+                    RecipeVote.vote == 1,
+                )
+            )
+        if filters.fast:
+            query = query.where(Recipe.is_fast.is_(True))
+        if filters.vegetarian:
+            query = query.where(Recipe.is_vegetarian.is_(True))
+        return query
+
+    async def count_recipes(self, scope: BrowseScope, viewer_user_id: int, filters: BrowseFilters) -> int:
+        query = self._browse_query(select(func.count(Recipe.id)), scope, viewer_user_id, filters)
+        return int(await self.session.scalar(query) or 0)
 
+    async def list_recipe_page(
+        self,
+        scope: BrowseScope,
+        viewer_user_id: int,
+        filters: BrowseFilters,
+        limit: int,
+        cursor_id: int | None = None,
+        before: bool = False,
+    ) -> RecipePage:
+        # Keyset pagination: "top" walks (rating, created_at, id), the other
+        # scopes (created_at, id), all descending. The cursor is a recipe id
+        # whose key is read inside the query, so timestamps never round-trip
+        # through callback data. A page reads limit + 1 rows.
+        keys = (Recipe.rating, Recipe.created_at, Recipe.id) if scope == "top" else (Recipe.created_at, Recipe.id)
+        columns = select(Recipe.id, Recipe.title, Recipe.time_minutes, Recipe.rating)
+        query = self._browse_query(columns, scope, viewer_user_id, filters)
+        if cursor_id is not None:
+            query = query.where(_keyset_condition(keys, cursor_id, before))
+        query = query.order_by(*(key.asc() if before else key.desc() for key in keys)).limit(limit + 1)
+        matched = [RecipeListRow(*row) for row in (await self.session.execute(query)).all()]
+
+        has_more = len(matched) > limit
+        matched = matched[:limit]
+        if before:
+            matched.reverse()
+        if before:
+            return RecipePage(items=matched, has_prev=has_more, has_next=True)
+        return RecipePage(items=matched, has_prev=cursor_id is not None, has_next=has_more)
+
+    async def _candidates(self, query: Select[Any]) -> list[RecipeCandidate]:
         rows = await self.session.execute(query)
-        result: list[RecipeWithRating] = []
-        for recipe, recipe_rating in rows.all():
-            result.append(RecipeWithRating(recipe=recipe, rating=int(recipe_rating or 0)))
-        return result
+        return [
+            RecipeCandidate(
+                id=recipe_id,
+                title=title,
+                time_minutes=time_minutes,
+                rating=rating,
+                created_at=created_at,
+                source_ingredients=tuple(str(value) for value in source_ingredients or ()),
+                ingredients=tuple(str(value) for value in ingredients if str(value).strip())
+                if isinstance(ingredients, list)
+                else (),
+            )
+            for recipe_id, title, time_minutes, rating, created_at, source_ingredients, ingredients in rows.all()
+        ]
+
+    def _candidate_query(self) -> Select[Any]:
+        return select(
+            Recipe.id,
+            Recipe.title,
+            Recipe.time_minutes,
+            Recipe.rating,
+            Recipe.created_at,
+            Recipe.source_ingredients,
+            Recipe.llm_response["ingredients"],
+        )
+
+    async def get_recipe_candidate(self, recipe_id: int) -> RecipeCandidate | None:
+        candidates = await self._candidates(self._candidate_query().where(Recipe.id == recipe_id))
+        return candidates[0] if candidates else None
+
+    async def get_recipe_payload(self, recipe_id: int) -> dict[str, Any] | None:
+        # The stored GigaChat response, loaded only for the recipe being shown.
+        return await self.session.scalar(select(Recipe.llm_response).where(Recipe.id == recipe_id))
 
     async def list_recent_recipes_with_rating_for_user(
         self,
         user_id: int,
         limit: int,
-    ) -> list[RecipeWithRating]:
-        rating = func.coalesce(func.sum(RecipeVote.vote), 0).label("rating")
-        rows = await self.session.execute(
-            select(Recipe, rating)
-            .outerjoin(RecipeVote, RecipeVote.recipe_id == Recipe.id)
+    ) -> list[RecipeCandidate]:
+        return await self._candidates(
+            self._candidate_query()
             .where(Recipe.user_id == user_id)
-            .group_by(Recipe.id)
-            .order_by(Recipe.created_at.desc())
+            .order_by(Recipe.created_at.desc(), Recipe.id.desc())
             .limit(limit)
         )
-        return [
-            RecipeWithRating(recipe=recipe, rating=int(recipe_rating or 0))
-            for recipe, recipe_rating in rows.all()
-        ]
 
     async def list_recent_recipes_with_rating_global(
         self,
         limit: int,
         exclude_user_id: int | None = None,
-    ) -> list[RecipeWithRating]:
-        rating = func.coalesce(func.sum(RecipeVote.vote), 0).label("rating")
-        query = (
-            select(Recipe, rating)
-            .outerjoin(RecipeVote, RecipeVote.recipe_id == Recipe.id)
-            .group_by(Recipe.id)
-            .order_by(Recipe.created_at.desc())
-        )
+    ) -> list[RecipeCandidate]:
+        query = self._candidate_query().order_by(Recipe.created_at.desc(), Recipe.id.desc())
         if exclude_user_id is not None:
             query = query.where(Recipe.user_id != exclude_user_id)
-        query = query.limit(limit)
+        return await self._candidates(query.limit(limit))
 
-        rows = await self.session.execute(query)
-        return [
-            RecipeWithRating(recipe=recipe, rating=int(recipe_rating or 0))
-            for recipe, recipe_rating in rows.all()
-        ]
+    async def list_recipe_index_rows(self, after_id: int, limit: int) -> list[RecipeIndexRow]:
+        rows = await self.session.execute(
+            select(Recipe.id, Recipe.title, Recipe.source_ingredients, Recipe.llm_response)
+            .where(Recipe.id > after_id)
+            .order_by(Recipe.id)
+            .limit(limit)
+        )
+        result: list[RecipeIndexRow] = []
+        for recipe_id, title, source_ingredients, llm_response in rows.all():
+            ingredients = (llm_response or {}).get("ingredients")
+            if not isinstance(ingredients, list):
+                ingredients = source_ingredients or []
+            result.append(
+                RecipeIndexRow(id=recipe_id, title=title, ingredients=[str(value) for value in ingredients])
+            )
+        return result
+
+    async def list_recipe_plate_maps(self, after_id: int, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        rows = await self.session.execute(
+            select(Recipe.id, Recipe.plate_map).where(Recipe.id > after_id).order_by(Recipe.id).limit(limit)
+        )
+        return [(recipe_id, plate_map or {}) for recipe_id, plate_map in rows.all()]
+
+    async def list_recipe_plate_maps_with_rating(
+        self,
+        after_id: int,
+        limit: int,
+    ) -> list[tuple[int, dict[str, Any], int]]:
+        rows = await self.session.execute(
+            select(Recipe.id, Recipe.plate_map, Recipe.rating)
+            .where(Recipe.id > after_id)
+            .order_by(Recipe.id)
+            .limit(limit)
+        )
+        return [(recipe_id, plate_map or {}, int(value or 0)) for recipe_id, plate_map, value in rows.all()]
+
+    async def list_ingredient_plate_groups(self) -> list[IngredientPlateGroup]:
+        rows = await self.session.scalars(select(IngredientPlateGroup).order_by(IngredientPlateGroup.canonical_key))
+        return list(rows)
+
+    async def replace_ingredient_plate_groups(self, entries: list[IngredientPlateGroup]) -> None:
+        await self.session.execute(delete(IngredientPlateGroup))
+        self.session.add_all(entries)
+        await self.session.flush()
 
     async def get_user_settings(self, user_id: int) -> UserSettings:
         user = await self.session.get(User, user_id)
@@ -289,3 +506,21 @@ class RecipeRepository:
 
         await self.session.flush()
         return user
+
+
+def _keyset_condition(keys: tuple[Any, ...], anchor_id: int, before: bool) -> ColumnElement[bool]:
+    # Expanded row comparison against the anchor row's own key values. The
+    # OR alone is not sargable, so the leading key is also bounded on its
+    # own: that range is what lets the index seek to the anchor instead of
+    # scanning every row before it.
+    anchor = aliased(Recipe)
+    anchor_values = [
+        select(getattr(anchor, key.key)).where(anchor.id == anchor_id).scalar_subquery() for key in keys
+    ]
+    clauses = []
+    for index, key in enumerate(keys):
+        equal_prefix = [keys[i] == anchor_values[i] for i in range(index)]
+        beyond = key > anchor_values[index] if before else key < anchor_values[index]
+        clauses.append(and_(*equal_prefix, beyond))
+    leading = keys[0] >= anchor_values[0] if before else keys[0] <= anchor_values[0]
+    return and_(leading, or_(*clauses))
@@ -1,11 +1,69 @@
 from __future__ import annotations
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import Any
 
-from core.config import settings
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from core.config import Settings, settings
 from db.models import Base
+from db.pool import MeteredQueuePool
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: URL, config: Settings = settings) -> dict[str, Any]:
+    options: dict[str, Any] = {"echo": False}
+    if _is_memory_sqlite(url):
+        # In-memory SQLite lives in a single connection (StaticPool).
+        return options
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+        pool_timeout=config.db_pool_timeout_seconds,
+    )
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_recycle=config.db_pool_recycle_seconds,
+            pool_pre_ping=config.db_pool_pre_ping,
+        )
+    return options
+
+
+def sqlite_pragmas(config: Settings = settings) -> list[str]:
+    return [
+        f"PRAGMA journal_mode={config.db_sqlite_journal_mode}",
+        f"PRAGMA synchronous={config.db_sqlite_synchronous}",
+        f"PRAGMA busy_timeout={config.db_sqlite_busy_timeout_ms}",
+    ]
+
+
+def build_engine(dsn: str, config: Settings = settings) -> AsyncEngine:
+    url = make_url(dsn)
+    built = create_async_engine(url, **engine_options(url, config))
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        pragmas = sqlite_pragmas(config)
+
+        @event.listens_for(built.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return built
+
+
+def pool_info(target: AsyncEngine | None = None) -> dict[str, float] | None:
+    pool = (target or engine).pool
+    return pool.info() if isinstance(pool, MeteredQueuePool) else None
+
 
-engine = create_async_engine(settings.database_dsn, echo=False)
+engine = build_engine(settings.database_dsn)
 SessionFactory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 
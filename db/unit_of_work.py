@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from db.repo import RecipeRepository
+from db.session import SessionFactory
+
+
+class UnitOfWork:
+    # One lazily opened session per Telegram update. Slow awaits (GigaChat
+    # calls) go inside `released()` so no pool connection waits on the LLM;
+    # the next `repo` access opens a fresh session.
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionFactory,
+        repository_factory: Callable[[AsyncSession], RecipeRepository] = RecipeRepository,
+    ) -> None:
+        self._session_factory = session_factory
+        self._repository_factory = repository_factory
+        self._session: AsyncSession | None = None
+        self._repo: RecipeRepository | None = None
+        self._released = False
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    @property
+    def repo(self) -> RecipeRepository:
+        if self._released:
+            raise RuntimeError("UnitOfWork is released; the database is unavailable inside released()")
+        if self._repo is None:
+            self._session = self._session_factory()
+            self._repo = self._repository_factory(self._session)
+        return self._repo
+
+    async def commit(self) -> None:
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self) -> None:
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self) -> None:
+        session, self._session, self._repo = self._session, None, None
+        if session is not None:
+            await session.close()
+
+    async def release(self) -> None:
+        # Work done so far is committed: a failed LLM call must not lose it.
+        try:
+            await self.commit()
+        finally:
+            await self.close()
+
+    @asynccontextmanager
+    async def released(self) -> AsyncIterator[None]:
+        await self.release()
+        self._released = True
+        try:
+            yield
+        finally:
+            self._released = False
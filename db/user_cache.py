@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from core.config import settings
+
+
+@dataclass(slots=True, frozen=True)
+class CachedUser:
+    user_id: int
+    username: str | None
+    expires_at: float
+
+
+class UserIdCache:
+    # Bounded LRU of tg_user_id -> (users.id, username) with a TTL, so most
+    # updates resolve the user without a database round trip.
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[int, CachedUser] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, tg_user_id: int, username: str | None = None) -> int | None:
+        # A changed username counts as a miss so the caller writes it through.
+        entry = self._entries.get(tg_user_id)
+        if entry is None or entry.expires_at <= self._clock():
+            if entry is not None:
+                del self._entries[tg_user_id]
+            self.misses += 1
+            return None
+        if username and username != entry.username:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(tg_user_id)
+        self.hits += 1
+        return entry.user_id
+
+    def put(self, tg_user_id: int, user_id: int, username: str | None) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[tg_user_id] = CachedUser(user_id, username, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(tg_user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+user_id_cache = UserIdCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
@@ -1,3 +1,14 @@
-from schemas.recipe import PlateMap, RecipeResponse
+from schemas.compact import CompactDecodeError, decode_compact_recipe, encode_compact_recipe, expand_compact_payload
+from schemas.recipe import PlateMap, RecipeResponse, RecipeSteps, RecipeSummary, parse_stored_recipe
 
-__all__ = ["PlateMap", "RecipeResponse"]
+__all__ = [
+    "CompactDecodeError",
+    "PlateMap",
+    "RecipeResponse",
+    "RecipeSteps",
+    "RecipeSummary",
+    "decode_compact_recipe",
+    "encode_compact_recipe",
+    "expand_compact_payload",
+    "parse_stored_recipe",
+]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from schemas.recipe import RecipeResponse
+
+# Short key -> RecipeResponse field.
+COMPACT_FIELDS = {
+    "t": "title",
+    "i": "ingredients",
+    "s": "steps",
+    "m": "time_minutes",
+    "n": "servings",
+    "x": "tips",
+}
+# Short key -> plate_map group; values are indexes into "i".
+COMPACT_GROUPS = {
+    "v": "veggies_fruits",
+    "g": "whole_grains",
+    "r": "proteins",
+    "f": "fats",
+    "d": "dairy(optional)",
+    "o": "others",
+}
+
+_QUANTITY_RE = re.compile(
+    r"(?:^|\s)[—–-]?\s*\d+(?:[.,/]\d+)?(?:\s*[—–-]\s*\d+(?:[.,/]\d+)?)?\s*"
+    r"(?:кг|гр?|мл|л|шт|ст\.?\s?л|ч\.?\s?л|стакан\w*|зубч\w*|щепот\w*)?\.?(?![а-яa-z])",
+    re.IGNORECASE,
+)
+
+
+class CompactDecodeError(ValueError):
+    pass
+
+
+def _ingredient_name(line: str) -> str:
+    # Plate maps hold bare names ("брокколи"), ingredients carry amounts.
+    name = _QUANTITY_RE.sub(" ", line).strip(" ,;:—–-")
+    return " ".join(name.split()).lower() or line.strip().lower()
+
+
+def _indexes(value: Any, size: int) -> list[int]:
+    if isinstance(value, (int, str)):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    indexes: list[int] = []
+    for item in value:
+        if isinstance(item, str) and item.strip().isdigit():
+            item = int(item)
+        if isinstance(item, int) and not isinstance(item, bool) and 0 <= item < size and item not in indexes:
+            indexes.append(item)
+    return indexes
+
+
+def expand_compact_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    if "title" in payload:
+        # The model ignored the compact contract; the full shape is still valid.
+        return payload
+    if "t" not in payload or "i" not in payload:
+        raise CompactDecodeError("Compact recipe must contain 't' and 'i'")
+
+    expanded: dict[str, Any] = {field: payload[key] for key, field in COMPACT_FIELDS.items() if key in payload}
+    ingredients = payload["i"] if isinstance(payload["i"], list) else []
+    plate = payload.get("p") if isinstance(payload.get("p"), dict) else {}
+    expanded["plate_map"] = {
+        group: [_ingredient_name(str(ingredients[index])) for index in _indexes(plate.get(key), len(ingredients))]
+        for key, group in COMPACT_GROUPS.items()
+    }
+    return expanded
+
+
+def decode_compact_recipe(payload: dict[str, Any]) -> RecipeResponse:
+    return RecipeResponse.model_validate(expand_compact_payload(payload))
+
+
+def encode_compact_recipe(recipe: RecipeResponse) -> dict[str, Any]:
+    plate_map = recipe.plate_map.model_dump(by_alias=True)
+    lowered = [ingredient.lower() for ingredient in recipe.ingredients]
+    plate: dict[str, list[int]] = {}
+    for key, group in COMPACT_GROUPS.items():
+        indexes = [
+            index
+            for name in plate_map.get(group, [])
+            for index, ingredient in enumerate(lowered)
+            if name.lower() in ingredient
+        ]
+        if indexes:
+            plate[key] = sorted(set(indexes))
+    compact: dict[str, Any] = {key: getattr(recipe, field) for key, field in COMPACT_FIELDS.items()}
+    compact["p"] = plate
+    return compact
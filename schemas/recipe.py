@@ -63,17 +63,24 @@ class PlateMap(BaseModel):
         return _coerce_to_list(value)
 
 
-class RecipeResponse(BaseModel):
+def _validate_steps(values: list[str]) -> list[str]:
+    cleaned = [value.strip() for value in values if len(re.sub(r"[^a-zа-я0-9]+", "", value.lower())) >= 12]
+    if len(cleaned) < 5:
+        raise ValueError("steps must contain at least 5 detailed items")
+    return cleaned
+
+
+class RecipeSummary(BaseModel):
+    # First phase of two-phase generation: everything except the steps.
     title: str
     ingredients: list[str] = Field(min_length=4)
-    steps: list[str] = Field(min_length=5)
     time_minutes: PositiveInt
     servings: PositiveInt
     plate_map: PlateMap
     nutrition: dict[str, Any] | None = None
     tips: list[str] = Field(default_factory=list)
 
-    @field_validator("ingredients", "steps", "tips", mode="before")
+    @field_validator("ingredients", "tips", mode="before")
     @classmethod
     def _normalize_lists(cls, value: Any) -> list[str]:
         return _coerce_to_list(value)
@@ -86,14 +93,6 @@ class RecipeResponse(BaseModel):
             raise ValueError("ingredients must contain at least 4 meaningful items")
         return cleaned
 
-    @field_validator("steps", mode="after")
-    @classmethod
-    def _validate_steps_quality(cls, values: list[str]) -> list[str]:
-        cleaned = [value.strip() for value in values if len(re.sub(r"[^a-zа-я0-9]+", "", value.lower())) >= 12]
-        if len(cleaned) < 5:
-            raise ValueError("steps must contain at least 5 detailed items")
-        return cleaned
-
     @field_validator("time_minutes", "servings", mode="before")
     @classmethod
     def _normalize_positive_ints(cls, value: Any) -> Any:
@@ -106,3 +105,39 @@ class RecipeResponse(BaseModel):
             if digits:
                 return int(digits.group(0))
         return value
+
+
+class RecipeResponse(RecipeSummary):
+    steps: list[str] = Field(min_length=5)
+
+    @field_validator("steps", mode="before")
+    @classmethod
+    def _normalize_steps(cls, value: Any) -> list[str]:
+        return _coerce_to_list(value)
+
+    @field_validator("steps", mode="after")
+    @classmethod
+    def _validate_steps_quality(cls, values: list[str]) -> list[str]:
+        return _validate_steps(values)
+
+
+class RecipeSteps(BaseModel):
+    # Second phase: detailed steps for an already stored summary.
+    steps: list[str] = Field(min_length=5)
+
+    @field_validator("steps", mode="before")
+    @classmethod
+    def _normalize_steps(cls, value: Any) -> list[str]:
+        return _coerce_to_list(value)
+
+    @field_validator("steps", mode="after")
+    @classmethod
+    def _validate_steps_quality(cls, values: list[str]) -> list[str]:
+        return _validate_steps(values)
+
+
+def parse_stored_recipe(payload: dict[str, Any]) -> RecipeSummary:
+    # Stored two-phase recipes keep "steps" empty until the second phase runs.
+    if payload.get("steps"):
+        return RecipeResponse.model_validate(payload)
+    return RecipeSummary.model_validate(payload)
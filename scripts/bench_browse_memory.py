@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from db.models import Base, Recipe
+from db.repo import BrowseFilters, RecipeRepository
+
+# Usage: python -m scripts.bench_browse_memory [--recipes 2000] [--runs 20]
+# Seeds a throwaway SQLite database with recipes of realistic size and reports
+# the tracemalloc peak per request for full ORM hydration versus the
+# column-select rows used by the browse and reuse paths.
+
+PAGE_SIZE = 5
+CANDIDATE_LIMIT = 300
+_STEPS = [f"Шаг {index}: " + "нарежьте, обжарьте и перемешайте ингредиенты " * 4 for index in range(8)]
+
+
+def _payload(index: int) -> dict:
+    return {
+        "title": f"Рецепт {index}",
+        "ingredients": [f"Ингредиент {index}-{item} 100 г" for item in range(10)],
+        "steps": _STEPS,
+        "time_minutes": 15 + index % 40,
+        "servings": 2,
+        "plate_map": {"vegetables": ["брокколи", "морковь"], "proteins": ["курица"], "whole_grains": ["рис"]},
+        "nutrition": {"calories_kcal": 520, "protein_g": 32, "fat_g": 14, "carbs_g": 61},
+    }
+
+
+async def _seed(session_factory: async_sessionmaker[AsyncSession], count: int) -> int:
+    async with session_factory() as session:
+        repo = RecipeRepository(session)
+        user = await repo.ensure_user(tg_user_id=1)
+        for index in range(count):
+            await repo.save_recipe(
+                user_id=user.id,
+                request_type="ingredients",
+                source_ingredients=[f"ингредиент {index}-{item}" for item in range(4)],
+                supplemented_ingredients=["зелень", "лимонный сок"],
+                llm_response=_payload(index),
+            )
+        await session.commit()
+        return user.id
+
+
+async def _measure(session_factory: async_sessionmaker[AsyncSession], runs: int, call) -> int:
+    peaks: list[int] = []
+    for _ in range(runs):
+        async with session_factory() as session:
+            tracemalloc.start()
+            await call(session)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure memory per browse and reuse request.")
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        user_id = await _seed(session_factory, args.recipes)
+
+        top_entities = select(Recipe).order_by(Recipe.rating.desc(), Recipe.created_at.desc()).limit(PAGE_SIZE + 1)
+        recent_entities = select(Recipe).order_by(Recipe.created_at.desc()).limit(CANDIDATE_LIMIT)
+        cases = {
+            "browse page": (
+                lambda session: session.scalars(top_entities),
+                lambda session: RecipeRepository(session).list_recipe_page(
+                    "top", user_id, BrowseFilters(), limit=PAGE_SIZE
+                ),
+            ),
+            "reuse candidates": (
+                lambda session: session.scalars(recent_entities),
+                lambda session: RecipeRepository(session).list_recent_recipes_with_rating_global(
+                    limit=CANDIDATE_LIMIT
+                ),
+            ),
+        }
+        print(f"{'request':<18} {'entities KiB':>13} {'rows KiB':>9} {'saved':>6}")
+        for name, (entities, rows) in cases.items():
+            before = await _measure(session_factory, args.runs, entities)
+            after = await _measure(session_factory, args.runs, rows)
+            print(f"{name:<18} {before / 1024:>13.1f} {after / 1024:>9.1f} {1 - after / before:>6.0%}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
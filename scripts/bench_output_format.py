@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from structlog.testing import capture_logs
+
+from core.services.gigachat_service import GigaChatClient, GigaChatError
+from db.models import Recipe
+from db.session import SessionFactory, engine
+from schemas import RecipeResponse, encode_compact_recipe
+
+# Usage: python -m scripts.bench_output_format [--limit 200] [--live --runs 3]
+# Compares the size of stored recipes in the full and compact contracts; with
+# --live also generates recipes in both formats and reports tokens and latency.
+
+_SCENARIOS = {
+    "ingredients": lambda client: client.generate_recipe_from_ingredients(
+        ["курица", "брокколи", "рис", "оливковое масло"], ["whole_grains"]
+    ),
+    "ready_dish": lambda client: client.generate_ready_dish("овощное рагу с нутом"),
+}
+
+
+async def _stored_recipes(limit: int) -> list[RecipeResponse]:
+    async with SessionFactory() as session:
+        rows = await session.scalars(select(Recipe.llm_response).order_by(Recipe.id.desc()).limit(limit))
+        payloads = list(rows)
+    await engine.dispose()
+
+    recipes: list[RecipeResponse] = []
+    for payload in payloads:
+        try:
+            recipes.append(RecipeResponse.model_validate(payload or {}))
+        except ValidationError:
+            continue
+    return recipes
+
+
+def _report_sizes(recipes: list[RecipeResponse]) -> None:
+    full = [
+        len(json.dumps(recipe.model_dump(by_alias=True, exclude={"nutrition"}), ensure_ascii=False)) for recipe in recipes
+    ]
+    compact = [
+        len(json.dumps(encode_compact_recipe(recipe), ensure_ascii=False, separators=(",", ":"))) for recipe in recipes
+    ]
+    print(f"stored recipes: {len(recipes)}")
+    print(f"{'full':<10} {statistics.mean(full):>8.0f} chars/recipe")
+    print(f"{'compact':<10} {statistics.mean(compact):>8.0f} chars/recipe  ({1 - sum(compact) / sum(full):.0%} smaller)")
+
+
+async def _run_live(runs: int) -> None:
+    print(f"{'scenario':<12} {'format':<8} {'ok':>3} {'latency ms':>11} {'tokens':>7} {'chars':>6}")
+    for scenario, generate in _SCENARIOS.items():
+        for output_format in ("full", "compact"):
+            client = GigaChatClient(output_format=output_format, max_retries=1)
+            ok = 0
+            with capture_logs() as logs:
+                for _ in range(runs):
+                    try:
+                        await generate(client)
+                        ok += 1
+                    except GigaChatError:
+                        continue
+            stats = [entry for entry in logs if entry["event"] == "gigachat_generation_stats"]
+            latency = statistics.mean(entry["latency_ms"] for entry in stats) if stats else 0.0
+            tokens = [entry["completion_tokens"] for entry in stats if entry["completion_tokens"] is not None]
+            chars = statistics.mean(entry["response_chars"] for entry in stats) if stats else 0.0
+            token_text = f"{statistics.mean(tokens):.0f}" if tokens else "n/a"
+            print(f"{scenario:<12} {output_format:<8} {ok:>3} {latency:>11.0f} {token_text:>7} {chars:>6.0f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the full and compact GigaChat output contracts.")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="call GigaChat with the configured credentials")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    recipes = await _stored_recipes(args.limit)
+    if recipes:
+        _report_sizes(recipes)
+    else:
+        print("no stored recipes to measure")
+    if args.live:
+        await _run_live(args.runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+
+from core.services.plate_service import GROUP_OTHERS, current_plate_lexicon, plate_service
+
+# Usage: python -m scripts.bench_plate [--size 1000000]
+# Classifies a synthetic ingredient list with the old keyword loop and with classify_many.
+
+_NAMES = (
+    "Куриная грудка", "Рис бурый", "Брокколи", "Оливковое масло", "Соль", "Сливки", "Тунец консервированный",
+    "Чеснок", "Гречневая крупа", "Шампиньоны", "Лук репчатый", "Морковь", "Яйца", "Шпинат", "Помидоры черри",
+    "Сыр пармезан", "Греческий йогурт", "Киноа", "Филе индейки", "Лосось", "Авокадо", "Нут", "Кабачок",
+    "Овсяные хлопья", "Банан", "Грецкие орехи", "Молоко", "Паприка", "Лимонный сок", "Мёд",
+)
+_UNITS = ("г", "мл", "шт", "ст.л.", "ч.л.")
+
+
+def _synthetic(size: int, seed: int = 11) -> list[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(_NAMES)} {rng.randint(1, 300)} {rng.choice(_UNITS)}" for _ in range(size)]
+
+
+def _legacy_classify(ingredients: list[str]) -> list[str]:
+    group_keywords = current_plate_lexicon().group_keywords
+    result: list[str] = []
+    for ingredient in ingredients:
+        normalized = re.sub(r"[^a-zа-я0-9 ]+", "", ingredient.lower()).strip()
+        matched = GROUP_OTHERS
+        for group, keywords in group_keywords.items():
+            if any(keyword in normalized for keyword in keywords):
+                matched = group
+                break
+        result.append(matched)
+    return result
+
+
+def _measure(name: str, classify, ingredients: list[str]) -> list[str]:
+    started = time.perf_counter()
+    groups = classify(ingredients)
+    seconds = time.perf_counter() - started
+    print(f"{name:<26} {seconds:>7.2f} s  {len(ingredients) / seconds:>12,.0f} ingredients/s")
+    return groups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark plate group classification throughput.")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    ingredients = _synthetic(args.size)
+    print(f"ingredients: {len(ingredients):,}, distinct: {len(set(ingredients)):,}")
+    legacy = _measure("legacy keyword loop", _legacy_classify, ingredients)
+    compiled = _measure("classify_many", plate_service.classify_many, ingredients)
+    _measure("classify_many, warm cache", plate_service.classify_many, ingredients)
+    mismatches = sum(left != right for left, right in zip(legacy, compiled))
+    print(f"mismatches vs legacy: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
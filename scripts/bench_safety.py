@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+
+from core.services.lexicons import SAFETY_LEXICON, lexicon_path, read_lexicon
+from core.services.safety_service import check_recipe_output, check_user_input, normalize_text
+
+# Usage: python -m scripts.bench_safety [--number 2000]
+# Compares the compiled automaton with the previous per-term substring scan.
+
+_WORDS = (
+    "нарежьте", "курицу", "кубиками", "обжарьте", "на", "сковороде", "с", "оливковым", "маслом",
+    "добавьте", "рис", "и", "брокколи", "посолите", "готовьте", "под", "крышкой", "минут",
+    "перемешайте", "подавайте", "горячим", "укроп", "чеснок", "сливки", "томаты", "лук",
+)
+
+
+_PROHIBITED_TERMS: dict[str, list[str]] = read_lexicon(lexicon_path(SAFETY_LEXICON), ("prohibited_terms",))[
+    "prohibited_terms"
+]
+
+
+def _legacy_check(text: str) -> str | None:
+    normalized = normalize_text(text)
+    for category, terms in _PROHIBITED_TERMS.items():
+        if any(normalize_text(term) in normalized for term in terms):
+            return category
+    return None
+
+
+def _llm_output(tokens: int, seed: int = 7) -> tuple[str, list[str], list[str]]:
+    rng = random.Random(seed)
+    words = [rng.choice(_WORDS) for _ in range(tokens)]
+    steps = [" ".join(words[index : index + 30]).capitalize() + "." for index in range(0, tokens, 30)]
+    return "Боул с курицей и брокколи", ["Курица 250 г", "Рис 120 г", "Брокколи 200 г"], steps
+
+
+def _report(name: str, legacy: float, compiled: float, number: int) -> None:
+    print(
+        f"{name:<22} legacy {legacy / number * 1e6:>9.1f} us  "
+        f"automaton {compiled / number * 1e6:>9.1f} us  speedup x{legacy / compiled:.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark prohibited-term matching.")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    short_inputs = ["курица, рис, брокколи", "салат с бензином и укропом", "паста с лососем"]
+    for text in short_inputs:
+        legacy = timeit.timeit(lambda: _legacy_check(text), number=args.number)
+        compiled = timeit.timeit(lambda: check_user_input(text), number=args.number)
+        _report(f"short: {text[:14]}", legacy, compiled, args.number)
+
+    title, ingredients, steps = _llm_output(900)
+    number = max(args.number // 10, 1)
+    for name, output_steps in (
+        ("llm 900 tokens, clean", steps),
+        ("llm 900 tokens, unsafe", [*steps, "Добавьте отбеливатель."]),
+    ):
+        joined = " ".join([title, *ingredients, *output_steps])
+        legacy = timeit.timeit(lambda: _legacy_check(joined), number=number)
+        compiled = timeit.timeit(lambda: check_recipe_output(title, ingredients, output_steps), number=number)
+        _report(name, legacy, compiled, number)
+
+
+if __name__ == "__main__":
+    main()
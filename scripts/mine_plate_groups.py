@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import asyncio
+
+from core.services.plate_learning import refresh_learned_plate_groups
+from core.services.plate_service import current_learned_groups
+from db.repo import RecipeRepository
+from db.session import SessionFactory, engine
+
+# Usage: python -m scripts.mine_plate_groups
+# Rebuilds ingredient_plate_groups from the plate maps of all stored recipes.
+
+
+async def main() -> None:
+    async with SessionFactory() as session:
+        learned = await refresh_learned_plate_groups(RecipeRepository(session))
+    await engine.dispose()
+
+    print(f"learned ingredients: {learned}")
+    for key, (group, confidence) in sorted(current_learned_groups().groups.items())[:20]:
+        print(f"  {key:<30} {group:<18} {confidence:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.services.recipe_text_index import DEFAULT_MIN_SCORE
+from core.services.reuse_replay import (
+    DEFAULT_INTERSECTION_GRID,
+    DEFAULT_JACCARD_GRID,
+    DEFAULT_LLM_LATENCY_SECONDS,
+    format_reports,
+    load_corpus,
+    load_requests,
+    replay,
+)
+from db.repo import RecipeCandidate, RecipeRepository
+
+# Usage:
+#   python -m scripts.replay_reuse --corpus tests/fixtures/reuse_corpus.json
+#   python -m scripts.replay_reuse --requests bot.log --dsn sqlite+aiosqlite:///./snapshot.db
+# bot.log only contains request text when the bot ran with RECORD_RECIPE_REQUESTS=true.
+
+
+def _parse_grid(value: str, cast: type) -> tuple:
+    return tuple(cast(item) for item in value.split(",") if item.strip())
+
+
+async def _load_snapshot(dsn: str, limit: int) -> list[RecipeCandidate]:
+    engine = create_async_engine(dsn, echo=False)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_factory() as session:
+            return await RecipeRepository(session).list_recent_recipes_with_rating_global(limit=limit)
+    finally:
+        await engine.dispose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recipe requests and report reuse hit rate per threshold.")
+    parser.add_argument("--corpus", type=Path, help="JSON fixture with recipes and requests")
+    parser.add_argument("--requests", type=Path, help="JSONL request log (bot structlog output or fixture lines)")
+    parser.add_argument("--dsn", help="DB snapshot DSN used when --corpus is not given")
+    parser.add_argument("--limit", type=int, default=300, help="Number of recent recipes used as candidates")
+    parser.add_argument("--jaccard", default=",".join(map(str, DEFAULT_JACCARD_GRID)))
+    parser.add_argument("--intersection", default=",".join(map(str, DEFAULT_INTERSECTION_GRID)))
+    parser.add_argument("--text-min-score", type=float, default=DEFAULT_MIN_SCORE)
+    parser.add_argument("--llm-latency", type=float, default=DEFAULT_LLM_LATENCY_SECONDS)
+    args = parser.parse_args()
+
+    requests = []
+    if args.corpus is not None:
+        candidates, requests = load_corpus(args.corpus)
+    else:
+        if args.dsn is None:
+            from core.config import settings
+
+            args.dsn = settings.database_dsn
+        candidates = await _load_snapshot(args.dsn, args.limit)
+    if args.requests is not None:
+        requests = load_requests(args.requests)
+    if not requests:
+        parser.error("no requests to replay: pass --requests or a --corpus with requests")
+
+    reports = replay(
+        requests,
+        candidates,
+        jaccard_grid=_parse_grid(args.jaccard, float),
+        intersection_grid=_parse_grid(args.intersection, int),
+        text_min_score=args.text_min_score,
+        llm_latency_seconds=args.llm_latency,
+    )
+    print(f"candidates: {len(candidates)}, requests: {len(requests)}")
+    print(format_reports(reports))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import unittest
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot.keyboards.browse import decode_cursor, encode_cursor
+from core.services.recipe_attributes import recipe_flags
+from db.models import Base
+from db.repo import BrowseFilters, RecipeRepository
+
+
+class CursorEncodingTests(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        for recipe_id in (0, 35, 36, 123456789):
+            for before in (False, True):
+                self.assertEqual(decode_cursor(encode_cursor(recipe_id, before)), (recipe_id, before))
+
+    def test_invalid_cursor(self) -> None:
+        for cursor in ("", "n", "x12", "n!"):
+            self.assertIsNone(decode_cursor(cursor))
+
+
+class KeysetPaginationTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            self.owner_id = (await repo.ensure_user(tg_user_id=1)).id
+            self.other_id = (await repo.ensure_user(tg_user_id=2)).id
+            self.recipe_ids = []
+            # Same-second inserts: created_at ties must be broken by id.
+            for index in range(7):
+                source_ingredients = ["тофу"] if index < 4 else ["курица"]
+                payload = {"title": f"Рецепт {index}", "time_minutes": 10 + index * 5}
+                is_vegetarian, is_fast = recipe_flags(payload, source_ingredients)
+                saved = await repo.save_recipe(
+                    user_id=self.owner_id if index % 2 == 0 else self.other_id,
+                    request_type="ingredients",
+                    source_ingredients=source_ingredients,
+                    supplemented_ingredients=[],
+                    llm_response=payload,
+                    is_vegetarian=is_vegetarian,
+                    is_fast=is_fast,
+                )
+                self.recipe_ids.append(saved.id)
+            for recipe_id in self.recipe_ids[:3]:
+                await repo.set_vote(user_id=self.other_id, recipe_id=recipe_id, vote=1)
+            await session.commit()
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def _page(self, scope: str = "top", **kwargs):
+        async with self.session_factory() as session:
+            return await RecipeRepository(session).list_recipe_page(
+                scope=scope,
+                viewer_user_id=self.owner_id,
+                filters=kwargs.pop("filters", BrowseFilters()),
+                limit=3,
+                **kwargs,
+            )
+
+    async def test_walks_forward_and_back_without_gaps(self) -> None:
+        seen: list[list[int]] = []
+        page = await self._page()
+        seen.append([item.id for item in page.items])
+        self.assertFalse(page.has_prev)
+        while page.has_next:
+            page = await self._page(cursor_id=page.items[-1].id)
+            seen.append([item.id for item in page.items])
+
+        ids = self.recipe_ids
+        expected = [ids[2], ids[1], ids[0], ids[6], ids[5], ids[4], ids[3]]
+        self.assertEqual([recipe_id for chunk in seen for recipe_id in chunk], expected)
+        self.assertEqual([len(chunk) for chunk in seen], [3, 3, 1])
+
+        back = await self._page(cursor_id=seen[2][0], before=True)
+        self.assertEqual([item.id for item in back.items], seen[1])
+        self.assertTrue(back.has_prev)
+        self.assertTrue(back.has_next)
+
+    async def test_history_scope_with_sql_filters(self) -> None:
+        page = await self._page(scope="history", filters=BrowseFilters(fast=True))
+        self.assertEqual([item.id for item in page.items], [self.recipe_ids[2], self.recipe_ids[0]])
+
+        liked = await self._page(filters=BrowseFilters(only_liked=True))
+        self.assertEqual(liked.items, [])
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            await repo.set_vote(user_id=self.owner_id, recipe_id=self.recipe_ids[5], vote=1)
+            await repo.set_vote(user_id=self.owner_id, recipe_id=self.recipe_ids[6], vote=-1)
+            await session.commit()
+        liked = await self._page(filters=BrowseFilters(only_liked=True))
+        self.assertEqual([item.id for item in liked.items], [self.recipe_ids[5]])
+
+    async def test_vegetarian_filter_and_count(self) -> None:
+        filters = BrowseFilters(vegetarian=True)
+        page = await self._page(scope="history", filters=filters)
+        self.assertEqual([item.id for item in page.items], [self.recipe_ids[2], self.recipe_ids[0]])
+        self.assertFalse(page.has_next)
+
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            self.assertEqual(await repo.count_recipes("top", self.owner_id, BrowseFilters()), 7)
+            self.assertEqual(await repo.count_recipes("top", self.owner_id, filters), 4)
+            self.assertEqual(await repo.count_recipes("history", self.owner_id, filters), 2)
+
+    async def test_candidates_read_ingredients_from_json(self) -> None:
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            saved = await repo.save_recipe(
+                user_id=self.owner_id,
+                request_type="ingredients",
+                source_ingredients=[],
+                supplemented_ingredients=[],
+                llm_response={"title": "Плов", "ingredients": ["Рис 200 г", "Морковь 1 шт"], "steps": ["..."]},
+            )
+            await session.commit()
+            candidates = await repo.list_recent_recipes_with_rating_for_user(user_id=self.owner_id, limit=1)
+            payload = await repo.get_recipe_payload(saved.id)
+
+        self.assertEqual(candidates[0].id, saved.id)
+        self.assertEqual(candidates[0].ingredients, ("Рис 200 г", "Морковь 1 шт"))
+        self.assertEqual(candidates[0].source_ingredients, ())
+        self.assertEqual(payload["steps"], ["..."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+
+from core.config import settings
+from db.pool import MeteredQueuePool
+from db.session import build_engine, engine_options, pool_info
+
+
+class EngineOptionsTests(unittest.TestCase):
+    def test_mysql_profile(self) -> None:
+        config = settings.model_copy(update={"db_pool_size": 8, "db_max_overflow": 4, "db_pool_recycle_seconds": 600})
+        options = engine_options(make_url("mysql+asyncmy://u:p@db/recipes"), config)
+
+        self.assertIs(options["poolclass"], MeteredQueuePool)
+        self.assertEqual((options["pool_size"], options["max_overflow"]), (8, 4))
+        self.assertEqual(options["pool_recycle"], 600)
+        self.assertTrue(options["pool_pre_ping"])
+
+    def test_sqlite_profiles(self) -> None:
+        file_options = engine_options(make_url("sqlite+aiosqlite:///./app.db"))
+        self.assertIs(file_options["poolclass"], MeteredQueuePool)
+        self.assertNotIn("pool_pre_ping", file_options)
+
+        self.assertEqual(engine_options(make_url("sqlite+aiosqlite:///:memory:")), {"echo": False})
+
+
+class SQLiteEngineTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        config = settings.model_copy(
+            update={"db_pool_size": 1, "db_max_overflow": 1, "db_pool_timeout_seconds": 0.3}
+        )
+        self.engine = build_engine(f"sqlite+aiosqlite:///{Path(self.directory.name) / 'pool.db'}", config)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+        self.directory.cleanup()
+
+    async def test_pragmas_applied_on_connect(self) -> None:
+        async with self.engine.connect() as connection:
+            journal_mode = await connection.exec_driver_sql("PRAGMA journal_mode")
+            synchronous = await connection.exec_driver_sql("PRAGMA synchronous")
+            busy_timeout = await connection.exec_driver_sql("PRAGMA busy_timeout")
+            self.assertEqual(journal_mode.scalar(), "wal")
+            self.assertEqual(synchronous.scalar(), 1)
+            self.assertEqual(busy_timeout.scalar(), 5000)
+
+    async def test_pool_metrics(self) -> None:
+        first = await self.engine.connect()
+        second = await self.engine.connect()
+        self.assertEqual(pool_info(self.engine)["in_use"], 2)
+        with self.assertRaises(exc.TimeoutError):
+            await self.engine.connect()
+
+        async def release_soon() -> None:
+            await asyncio.sleep(0.02)
+            await first.close()
+
+        release = asyncio.create_task(release_soon())
+        third = await self.engine.connect()
+        await release
+        await second.close()
+        await third.close()
+
+        info = pool_info(self.engine)
+        self.assertEqual(info["in_use"], 0)
+        self.assertEqual(info["checkouts"], 3)
+        self.assertEqual(info["overflow_events"], 1)
+        self.assertEqual(info["timeouts"], 1)
+        self.assertGreaterEqual(info["wait_ms_max"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,10 @@ import json
 import unittest
 from unittest.mock import patch
 
+from structlog.testing import capture_logs
+
 from core.services.gigachat_service import GigaChatClient, GigaChatError
+from schemas import RecipeResponse, RecipeSummary, encode_compact_recipe
 
 
 def _unsafe_payload_json() -> str:
@@ -48,6 +51,67 @@ class _FakeUnsafeGigaChat:
         return {"choices": [{"message": {"content": content}}]}
 
 
+def _safe_payload_json() -> str:
+    return _unsafe_payload_json().replace("Человечина", "Курица").replace("человечина", "курица")
+
+
+def _chunks(text: str, size: int = 16) -> list[dict]:
+    return [{"choices": [{"delta": {"content": text[index : index + size]}}]} for index in range(0, len(text), size)]
+
+
+class _FakeStreamingGigaChat:
+    payloads: list[str] = []
+    delivered: list[int] = []
+    closed: list[bool] = []
+
+    def __init__(self, **kwargs) -> None:
+        self.kwargs = kwargs
+
+    async def astream(self, request_payload):
+        chunks = _chunks(type(self).payloads.pop(0))
+        type(self).delivered.append(0)
+        type(self).closed.append(False)
+        try:
+            for chunk in chunks:
+                type(self).delivered[-1] += 1
+                yield chunk
+        finally:
+            type(self).closed[-1] = True
+
+    def chat(self, request_payload):
+        raise AssertionError("streaming client must not fall back to chat")
+
+
+class _FakeCompactGigaChat:
+    prompts: list[str] = []
+
+    def __init__(self, **kwargs) -> None:
+        self.kwargs = kwargs
+
+    def chat(self, request_payload):
+        type(self).prompts.append(request_payload["messages"][-1]["content"])
+        recipe = RecipeResponse.model_validate_json(_safe_payload_json())
+        content = json.dumps(encode_compact_recipe(recipe), ensure_ascii=False, separators=(",", ":"))
+        return {"choices": [{"message": {"content": content}}], "usage": {"completion_tokens": 120}}
+
+
+class _FakeTwoPhaseGigaChat:
+    prompts: list[str] = []
+
+    def __init__(self, **kwargs) -> None:
+        self.kwargs = kwargs
+
+    def chat(self, request_payload):
+        prompt = request_payload["messages"][-1]["content"]
+        type(self).prompts.append(prompt)
+        payload = json.loads(_safe_payload_json())
+        if "шаги приготовления для уже выбранного рецепта" in prompt.lower():
+            content = {"steps": payload["steps"]}
+        else:
+            content = {key: value for key, value in payload.items() if key != "steps"}
+        return {"choices": [{"message": {"content": json.dumps(content, ensure_ascii=False)}}]}
+
+
 class GigaChatSafetyRetryTests(unittest.IsolatedAsyncioTestCase):
     async def test_unsafe_recipe_triggers_retries_and_final_error(self) -> None:
         client = GigaChatClient(auth_key="test", max_retries=2, timeout_seconds=1.0)
@@ -59,6 +123,65 @@ class GigaChatSafetyRetryTests(unittest.IsolatedAsyncioTestCase):
                 )
         self.assertIn("UNSAFE_RECIPE", str(ctx.exception))
 
+    async def test_unsafe_stream_is_cancelled_and_retried(self) -> None:
+        unsafe = _unsafe_payload_json()
+        _FakeStreamingGigaChat.payloads = [unsafe, _safe_payload_json()]
+        _FakeStreamingGigaChat.delivered = []
+        _FakeStreamingGigaChat.closed = []
+        client = GigaChatClient(auth_key="test", max_retries=2, timeout_seconds=1.0, streaming=True)
+        with patch("core.services.gigachat_service.GigaChat", _FakeStreamingGigaChat):
+            recipe = await client._request_recipe(
+                messages=[{"role": "system", "content": "sys"}, {"role": "user", "content": "usr"}],
+                scenario="ingredients",
+            )
+
+        self.assertIn("Курица 100 г", recipe.ingredients)
+        self.assertEqual(_FakeStreamingGigaChat.closed, [True, True])
+        self.assertLess(_FakeStreamingGigaChat.delivered[0], len(_chunks(unsafe)))
+
+    async def test_unsafe_word_in_tip_does_not_abort_stream(self) -> None:
+        payload = json.loads(_safe_payload_json())
+        payload["tips"] = ["Не берите пластиковую миску, подойдет стеклянная форма."]
+        _FakeStreamingGigaChat.payloads = [json.dumps(payload, ensure_ascii=False)]
+        _FakeStreamingGigaChat.delivered = []
+        _FakeStreamingGigaChat.closed = []
+        client = GigaChatClient(auth_key="test", max_retries=1, timeout_seconds=1.0, streaming=True)
+        with patch("core.services.gigachat_service.GigaChat", _FakeStreamingGigaChat):
+            recipe = await client._request_recipe(
+                messages=[{"role": "system", "content": "sys"}, {"role": "user", "content": "usr"}],
+                scenario="ingredients",
+            )
+
+        self.assertEqual(recipe.tips, payload["tips"])
+        self.assertEqual(_FakeStreamingGigaChat.delivered, [len(_chunks(json.dumps(payload, ensure_ascii=False)))])
+
+    async def test_compact_output_is_requested_decoded_and_measured(self) -> None:
+        _FakeCompactGigaChat.prompts = []
+        client = GigaChatClient(auth_key="test", max_retries=1, streaming=False, output_format="compact")
+        with patch("core.services.gigachat_service.GigaChat", _FakeCompactGigaChat), capture_logs() as logs:
+            recipe = await client.generate_recipe_from_ingredients(["курица", "рис"], ["veggies_fruits"])
+
+        self.assertIn("p: object", _FakeCompactGigaChat.prompts[0])
+        self.assertEqual(recipe.plate_map.proteins, ["курица"])
+        stats = [entry for entry in logs if entry["event"] == "gigachat_generation_stats"]
+        self.assertEqual(stats[0]["output_format"], "compact")
+        self.assertEqual(stats[0]["completion_tokens"], 120)
+
+
+    async def test_two_phase_summary_then_steps(self) -> None:
+        _FakeTwoPhaseGigaChat.prompts = []
+        client = GigaChatClient(auth_key="test", max_retries=1, streaming=False, output_format="full")
+        with patch("core.services.gigachat_service.GigaChat", _FakeTwoPhaseGigaChat):
+            summary = await client.generate_summary_from_ingredients(["курица", "спагетти"], [])
+            recipe = await client.generate_steps(summary)
+
+        self.assertNotIsInstance(summary, RecipeResponse)
+        self.assertIsInstance(summary, RecipeSummary)
+        self.assertNotIn("steps: string[]", _FakeTwoPhaseGigaChat.prompts[0])
+        self.assertIn("Курица 100 г", _FakeTwoPhaseGigaChat.prompts[1])
+        self.assertEqual(recipe.title, summary.title)
+        self.assertEqual(len(recipe.steps), 5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import unittest
+
+from core.services.ingredient_canonicalizer import canonical_ingredient_set, canonicalize_ingredient
+
+
+class IngredientCanonicalizerTests(unittest.TestCase):
+    def test_strips_quantities_and_units(self) -> None:
+        self.assertEqual(canonicalize_ingredient("Брокколи 200 г"), canonicalize_ingredient("брокколи"))
+        self.assertEqual(canonicalize_ingredient("1/2 ч. л. соли"), canonicalize_ingredient("соль"))
+        self.assertEqual(canonicalize_ingredient("Яйца 2 шт"), canonicalize_ingredient("яйцо"))
+
+    def test_llm_phrase_matches_user_input(self) -> None:
+        self.assertEqual(canonicalize_ingredient("200 г куриной грудки"), canonicalize_ingredient("курица"))
+        self.assertEqual(canonicalize_ingredient("Куриное филе 300 г"), canonicalize_ingredient("Курица"))
+
+    def test_maps_synonyms(self) -> None:
+        self.assertEqual(canonicalize_ingredient("Томаты 150 г"), canonicalize_ingredient("помидор"))
+        self.assertEqual(canonicalize_ingredient("гречневая крупа 100 г"), canonicalize_ingredient("гречка"))
+
+    def test_keeps_distinct_ingredients_apart(self) -> None:
+        keys = canonical_ingredient_set(["курица", "рис", "брокколи", "помидор", "масло"])
+        self.assertEqual(len(keys), 5)
+
+    def test_skips_empty_values(self) -> None:
+        self.assertEqual(canonical_ingredient_set(["", "по вкусу", "200 г"]), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
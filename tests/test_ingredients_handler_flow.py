@@ -3,12 +3,15 @@ from __future__ import annotations
 import unittest
 from datetime import datetime, timezone
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from bot.handlers import ingredients as ingredients_handler
+from bot.handlers import ready_dish as ready_dish_handler
 from bot.states import UserMode
 from db.models import Recipe
-from db.repo import RecipeWithRating
+from db.repo import RecipeCandidate, RecipeDetail, UserSettings
+from core.services.recipe_text_index import RecipeTextIndex
+from db.unit_of_work import UnitOfWork
 from schemas import RecipeResponse
 
 
@@ -44,22 +47,27 @@ def _valid_recipe_payload() -> dict:
 
 
 class _FakeSession:
+    def __init__(self) -> None:
+        self.commits = 0
+        self.closed = False
+
     async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
         return None
 
+    async def close(self) -> None:
+        self.closed = True
+
 
 class _FakeSessionFactory:
     def __init__(self) -> None:
-        self.session = _FakeSession()
-
-    def __call__(self) -> "_FakeSessionFactory":
-        return self
-
-    async def __aenter__(self) -> _FakeSession:
-        return self.session
+        self.sessions: list[_FakeSession] = []
 
-    async def __aexit__(self, exc_type, exc, tb) -> bool:
-        return False
+    def __call__(self) -> _FakeSession:
+        self.sessions.append(_FakeSession())
+        return self.sessions[-1]
 
 
 class _FakeState:
@@ -80,22 +88,17 @@ class _FakeMessage:
         self.answers.append((text, reply_markup))
 
 
-def _candidate_item(recipe_id: int = 42) -> RecipeWithRating:
+def _candidate_item(recipe_id: int = 42) -> RecipeCandidate:
     payload = _valid_recipe_payload()
-    recipe = Recipe(
+    return RecipeCandidate(
         id=recipe_id,
-        user_id=1,
-        request_type="ingredients",
         title=payload["title"],
         time_minutes=payload["time_minutes"],
-        servings=payload["servings"],
-        source_ingredients=["курица", "рис", "брокколи"],
-        supplemented_ingredients=[],
-        plate_map=payload["plate_map"],
-        llm_response=payload,
+        rating=5,
         created_at=datetime.now(timezone.utc),
+        source_ingredients=("курица", "рис", "брокколи"),
+        ingredients=tuple(payload["ingredients"]),
     )
-    return RecipeWithRating(recipe=recipe, rating=5)
 
 
 class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
@@ -104,11 +107,13 @@ class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
         state = _FakeState()
 
         class _FailingClient:
+            two_phase = False
+
             async def generate_recipe_from_ingredients(self, *args, **kwargs):
                 raise AssertionError("LLM should not be called for unsafe input")
 
         with patch.object(ingredients_handler, "GigaChatClient", _FailingClient):
-            await ingredients_handler.ingredients_input_handler(message, state)
+            await ingredients_handler.ingredients_input_handler(message, state, UnitOfWork(_FakeSessionFactory()))
 
         self.assertTrue(any("запрещенные" in text.lower() for text, _ in message.answers))
         self.assertIn(UserMode.main_menu, state.states)
@@ -122,11 +127,11 @@ class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
             def __init__(self, session) -> None:
                 self.session = session
 
-            async def ensure_user(self, tg_user_id: int, username: str | None = None):
-                return SimpleNamespace(id=1)
+            async def ensure_user_id(self, tg_user_id: int, username: str | None = None):
+                return 1
 
             async def get_user_settings(self, user_id: int):
-                return SimpleNamespace(prompt_text=lambda: "нет")
+                return UserSettings()
 
             async def list_recent_recipes_with_rating_for_user(self, user_id: int, limit: int):
                 return [candidate]
@@ -134,24 +139,27 @@ class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
             async def list_recent_recipes_with_rating_global(self, limit: int, exclude_user_id: int | None = None):
                 return []
 
-            async def get_user_favorite_recipe_ids(self, user_id: int):
-                return set()
+            async def get_recipe_detail(self, recipe_id: int, viewer_user_id: int):
+                recipe = Recipe(id=recipe_id, llm_response=_valid_recipe_payload())
+                return RecipeDetail(recipe=recipe, rating=candidate.rating, is_favorite=True, viewer_vote=1)
 
             async def save_recipe(self, **kwargs):
                 raise AssertionError("save_recipe must not be called when recipe is reused")
 
         class _FailingClient:
+            two_phase = False
+
             async def generate_recipe_from_ingredients(self, *args, **kwargs):
                 raise AssertionError("LLM should not be called when recipe is reused")
 
-        with (
-            patch.object(ingredients_handler, "SessionFactory", _FakeSessionFactory()),
-            patch.object(ingredients_handler, "RecipeRepository", _Repo),
-            patch.object(ingredients_handler, "GigaChatClient", _FailingClient),
-        ):
-            await ingredients_handler.ingredients_input_handler(message, state)
+        uow = UnitOfWork(_FakeSessionFactory(), repository_factory=_Repo)
+        with patch.object(ingredients_handler, "GigaChatClient", _FailingClient):
+            await ingredients_handler.ingredients_input_handler(message, state, uow)
 
         self.assertTrue(any("найден похожий рецепт" in text.lower() for text, _ in message.answers))
+        markups = [markup for _, markup in message.answers if markup is not None]
+        buttons = [button.text for row in markups[0].inline_keyboard for button in row]
+        self.assertIn("⭐ Убрать из избранного", buttons)
         self.assertIn(UserMode.main_menu, state.states)
 
     async def test_calls_llm_and_saves_when_no_match(self) -> None:
@@ -160,16 +168,17 @@ class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
         payload = _valid_recipe_payload()
         generated = RecipeResponse.model_validate(payload)
         calls = {"llm": 0, "save": 0}
+        saved: dict[str, Recipe] = {}
 
         class _Repo:
             def __init__(self, session) -> None:
                 self.session = session
 
-            async def ensure_user(self, tg_user_id: int, username: str | None = None):
-                return SimpleNamespace(id=1)
+            async def ensure_user_id(self, tg_user_id: int, username: str | None = None):
+                return 1
 
             async def get_user_settings(self, user_id: int):
-                return SimpleNamespace(prompt_text=lambda: "нет")
+                return UserSettings()
 
             async def list_recent_recipes_with_rating_for_user(self, user_id: int, limit: int):
                 return []
@@ -177,9 +186,6 @@ class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
             async def list_recent_recipes_with_rating_global(self, limit: int, exclude_user_id: int | None = None):
                 return []
 
-            async def get_user_favorite_recipe_ids(self, user_id: int):
-                return set()
-
             async def save_recipe(self, **kwargs):
                 calls["save"] += 1
                 recipe = Recipe(
@@ -195,25 +201,104 @@ class IngredientsHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
                     llm_response=payload,
                     created_at=datetime.now(timezone.utc),
                 )
+                saved["recipe"] = recipe
                 return recipe
 
-            async def get_rating(self, recipe_id: int):
-                return 0
+            async def get_recipe_detail(self, recipe_id: int, viewer_user_id: int):
+                return RecipeDetail(recipe=saved["recipe"], rating=0, is_favorite=False, viewer_vote=0)
+
+        sessions = _FakeSessionFactory()
+        uow = UnitOfWork(sessions, repository_factory=_Repo)
+        case = self
 
         class _Client:
+            two_phase = False
+
             async def generate_recipe_from_ingredients(self, *args, **kwargs):
                 calls["llm"] += 1
+                # No session may stay checked out while GigaChat is thinking.
+                case.assertFalse(uow.active)
+                case.assertTrue(sessions.sessions[0].closed)
+                with case.assertRaises(RuntimeError):
+                    uow.repo
                 return generated
 
+        with patch.object(ingredients_handler, "GigaChatClient", _Client):
+            await ingredients_handler.ingredients_input_handler(message, state, uow)
+
+        self.assertEqual(len(sessions.sessions), 2)
+        self.assertGreater(sessions.sessions[1].commits, 0)
+        self.assertEqual(calls["llm"], 1)
+        self.assertEqual(calls["save"], 1)
+        self.assertTrue(any("сохранен" in text.lower() for text, _ in message.answers))
+        self.assertIn(UserMode.main_menu, state.states)
+
+
+class ReadyDishHandlerFlowTests(unittest.IsolatedAsyncioTestCase):
+    async def test_negated_ingredient_is_not_served_from_reuse(self) -> None:
+        message = _FakeMessage("рис без курицы")
+        state = _FakeState()
+        chicken = RecipeCandidate(
+            id=42,
+            title="Курица с рисом",
+            time_minutes=30,
+            rating=5,
+            created_at=datetime.now(timezone.utc),
+            source_ingredients=("курица", "рис"),
+            ingredients=("Куриное филе 200 г", "Рис 100 г"),
+        )
+        index = RecipeTextIndex()
+        index.add(chicken.id, chicken.title, list(chicken.ingredients))
+        payload = _valid_recipe_payload()
+        calls = {"llm": 0}
+
+        class _Repo:
+            def __init__(self, session) -> None:
+                self.session = session
+
+            async def ensure_user_id(self, tg_user_id: int, username: str | None = None):
+                return 1
+
+            async def get_user_settings(self, user_id: int):
+                return UserSettings()
+
+            async def list_recent_recipes_with_rating_for_user(self, user_id: int, limit: int):
+                return [chicken]
+
+            async def list_recent_recipes_with_rating_global(self, limit: int, exclude_user_id: int | None = None):
+                return [chicken]
+
+            async def list_recipe_index_rows(self, after_id: int, limit: int):
+                return []
+
+            async def get_recipe_candidate(self, recipe_id: int):
+                return chicken if recipe_id == chicken.id else None
+
+            async def save_recipe(self, **kwargs):
+                return Recipe(id=77, plate_map=payload["plate_map"], llm_response=payload)
+
+            async def get_recipe_detail(self, recipe_id: int, viewer_user_id: int):
+                recipe = Recipe(id=recipe_id, llm_response=payload)
+                return RecipeDetail(recipe=recipe, rating=0, is_favorite=False, viewer_vote=0)
+
+        class _Client:
+            two_phase = False
+
+            async def generate_ready_dish(self, *args, **kwargs):
+                calls["llm"] += 1
+                return RecipeResponse.model_validate(payload)
+
+        self.assertTrue(index.search("рис без курицы", min_score=0.0))
+        uow = UnitOfWork(_FakeSessionFactory(), repository_factory=_Repo)
         with (
-            patch.object(ingredients_handler, "SessionFactory", _FakeSessionFactory()),
-            patch.object(ingredients_handler, "RecipeRepository", _Repo),
-            patch.object(ingredients_handler, "GigaChatClient", _Client),
+            patch.object(ready_dish_handler, "GigaChatClient", _Client),
+            patch.object(ready_dish_handler, "recipe_text_index", index),
+            patch.object(ready_dish_handler, "current_cooccurrence_model", MagicMock()),
         ):
-            await ingredients_handler.ingredients_input_handler(message, state)
+            await ready_dish_handler.ready_dish_input_handler(message, state, uow)
 
         self.assertEqual(calls["llm"], 1)
-        self.assertEqual(calls["save"], 1)
+        self.assertFalse(any("найден похожий рецепт" in text.lower() for text, _ in message.answers))
         self.assertTrue(any("сохранен" in text.lower() for text, _ in message.answers))
         self.assertIn(UserMode.main_menu, state.states)
 
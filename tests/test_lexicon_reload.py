@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.services.lexicon_reload import LexiconWatcher, reload_lexicons
+from core.services.lexicons import NUTRITION_LEXICON, PLATE_LEXICON, SAFETY_LEXICON, LexiconError, lexicon_path
+from core.services.nutrition_service import current_nutrition_table, install_nutrition_table
+from core.services.plate_service import (
+    PlateService,
+    current_plate_lexicon,
+    install_plate_lexicon,
+)
+from core.services.safety_service import (
+    StreamingSafetyScanner,
+    check_user_input,
+    current_safety_lexicon,
+    install_safety_lexicon,
+)
+
+
+def _bundled(name: str) -> dict:
+    return json.loads(lexicon_path(name).read_text(encoding="utf-8"))
+
+
+class LexiconReloadTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._safety = current_safety_lexicon()
+        self._plate = current_plate_lexicon()
+        self._nutrition = current_nutrition_table()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name)
+        self._write(SAFETY_LEXICON, _bundled(SAFETY_LEXICON))
+        self._write(PLATE_LEXICON, _bundled(PLATE_LEXICON))
+        self._write(NUTRITION_LEXICON, _bundled(NUTRITION_LEXICON))
+
+    def tearDown(self) -> None:
+        install_safety_lexicon(self._safety)
+        install_plate_lexicon(self._plate)
+        install_nutrition_table(self._nutrition)
+        self._tmp.cleanup()
+
+    def _write(self, name: str, payload: dict) -> Path:
+        path = lexicon_path(name, self.directory)
+        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    async def test_reload_swaps_in_new_terms_and_reports_them(self) -> None:
+        safety = _bundled(SAFETY_LEXICON)
+        safety["version"] = 2
+        safety["prohibited_terms"]["dangerous_non_food"].append("пенопласт")
+        self._write(SAFETY_LEXICON, safety)
+        plate = _bundled(PLATE_LEXICON)
+        plate["group_keywords"]["whole_grains"].append("кускус")
+        self._write(PLATE_LEXICON, plate)
+
+        scanner = StreamingSafetyScanner()
+        self.assertTrue(check_user_input("пенопласт").is_safe)
+
+        reports = await reload_lexicons(self.directory)
+
+        self.assertEqual(
+            [(report.name, report.version) for report in reports],
+            [("safety", 2), ("plate", 1), ("nutrition", 1)],
+        )
+        self.assertTrue(all(report.size_bytes > 0 and report.entries > 0 for report in reports))
+        self.assertFalse(check_user_input("пенопласт").is_safe)
+        self.assertIn("кускус", PlateService().classify_ingredients(["кускус"])["whole_grains"])
+        # Scanners started before the swap finish on the lexicon they began with.
+        self.assertTrue(scanner.feed("пенопласт").is_safe)
+
+    async def test_invalid_file_keeps_active_lexicons(self) -> None:
+        lexicon_path(PLATE_LEXICON, self.directory).write_text('{"version": 0}', encoding="utf-8")
+        with self.assertRaises(LexiconError):
+            await reload_lexicons(self.directory)
+        self.assertIs(current_safety_lexicon(), self._safety)
+        self.assertIs(current_plate_lexicon(), self._plate)
+
+    async def test_watcher_reloads_only_changed_files(self) -> None:
+        watcher = LexiconWatcher(self.directory, interval_seconds=0.01)
+        self.assertEqual(await watcher.check_once(), [])
+
+        safety = _bundled(SAFETY_LEXICON)
+        safety["version"] = 3
+        path = self._write(SAFETY_LEXICON, safety)
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        reports = await watcher.check_once()
+        self.assertEqual([(report.name, report.version) for report in reports], [("safety", 3)])
+        self.assertEqual(current_safety_lexicon().version, 3)
+        self.assertIs(current_plate_lexicon(), self._plate)
+
+
+if __name__ == "__main__":
+    unittest.main()
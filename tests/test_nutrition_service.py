@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import unittest
+
+from core.services.lexicons import LexiconError
+from core.services.nutrition_service import (
+    compile_nutrition_table,
+    compute_nutrition,
+    current_nutrition_table,
+    parse_ingredient_quantity,
+)
+
+
+def _food(line: str) -> str:
+    parsed = parse_ingredient_quantity(line)
+    assert parsed is not None, line
+    return current_nutrition_table().names[parsed.food_index]
+
+
+class NutritionServiceTests(unittest.TestCase):
+    def test_parses_units_pieces_fractions_and_ranges(self) -> None:
+        cases = {
+            "Куриная грудка 250 г": 250.0,
+            "Рис бурый 0,12 кг": 120.0,
+            "Оливковое масло 1 ст. л.": 15.0,
+            "Мед ½ ч.л.": 2.5,
+            "Яйца 2-4 шт": 165.0,
+            "Молоко 1 стакан": 200.0,
+            "2 зубчика чеснока": 10.0,
+        }
+        for line, grams in cases.items():
+            with self.subTest(line=line):
+                self.assertAlmostEqual(parse_ingredient_quantity(line).grams, grams)
+
+    def test_skips_lines_without_quantity_or_known_food(self) -> None:
+        self.assertIsNone(parse_ingredient_quantity("Соль по вкусу"))
+        self.assertIsNone(parse_ingredient_quantity("Соус терияки 30 мл"))
+        # A bare count needs a piece weight, which rice does not have.
+        self.assertIsNone(parse_ingredient_quantity("Рис 2"))
+
+    def test_longest_keyword_wins(self) -> None:
+        self.assertEqual(_food("Масло сливочное 10 г"), "сливочн")
+        self.assertEqual(_food("Масло оливковое 10 г"), "оливков")
+        self.assertEqual(_food("Филе лосося сырое 200 г"), "лосос")
+
+    def test_computes_per_serving_macros(self) -> None:
+        nutrition = compute_nutrition(
+            ["Куриная грудка 200 г", "Рис 100 г", "Оливковое масло 10 мл", "Соль по вкусу"],
+            servings=2,
+        )
+        self.assertEqual(
+            nutrition,
+            {
+                "calories_kcal": 332,
+                "protein_g": 27.1,
+                "fat_g": 7.4,
+                "carbs_g": 38.9,
+                "per_serving": True,
+                "coverage": 0.75,
+            },
+        )
+        self.assertIsNone(compute_nutrition(["Соль по вкусу"], servings=1))
+
+    def test_rejects_malformed_table(self) -> None:
+        with self.assertRaises(LexiconError):
+            compile_nutrition_table({"version": 1, "foods": [{"keywords": ["рис"], "kcal": "много"}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
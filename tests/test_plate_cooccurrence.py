@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from bot import main as bot_main
+
+from core.services.ingredient_canonicalizer import canonicalize_ingredient
+from core.services.plate_cooccurrence import (
+    CooccurrenceModel,
+    current_cooccurrence_model,
+    install_cooccurrence_model,
+)
+from core.services.plate_service import GROUP_PROTEINS, GROUP_WHOLE_GRAINS, PlateService
+
+
+def _plate_map(**groups: list[str]) -> dict:
+    return {"veggies_fruits": [], "whole_grains": [], "proteins": [], "fats": [], "others": [], **groups}
+
+
+def _keys(*names: str) -> set[str]:
+    return {canonicalize_ingredient(name) for name in names}
+
+
+class CooccurrenceModelTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._model = current_cooccurrence_model()
+        self.model = CooccurrenceModel()
+        self.model.add_recipe(1, _plate_map(veggies_fruits=["брокколи"], proteins=["лосось"], whole_grains=["киноа"]), 3)
+        self.model.add_recipe(2, _plate_map(veggies_fruits=["брокколи"], proteins=["тофу"], whole_grains=["рис"]), 1)
+        self.model.add_recipe(3, _plate_map(veggies_fruits=["брокколи"], proteins=["индейка"]), 0)
+
+    def tearDown(self) -> None:
+        install_cooccurrence_model(self._model)
+
+    def test_suggest_ranks_by_rated_cooccurrence(self) -> None:
+        self.assertEqual(self.model.suggest(_keys("брокколи"), GROUP_PROTEINS, limit=3), ["лосось", "тофу"])
+        self.assertEqual(self.model.suggest(_keys("тофу"), GROUP_WHOLE_GRAINS), ["рис"])
+
+    def test_rating_updates_are_incremental(self) -> None:
+        self.model.update_rating(3, 5)
+        self.assertEqual(self.model.suggest(_keys("брокколи"), GROUP_PROTEINS), ["индейка"])
+        self.model.update_rating(3, -1)
+        self.model.update_rating(1, 0)
+        self.assertEqual(self.model.suggest(_keys("брокколи"), GROUP_PROTEINS), ["тофу"])
+
+    def test_updates_invalidate_only_the_touched_keys(self) -> None:
+        salmon, tofu = canonicalize_ingredient("лосось"), canonicalize_ingredient("тофу")
+        self.model.suggest(_keys("лосось"), GROUP_WHOLE_GRAINS)
+        self.model.suggest(_keys("тофу"), GROUP_WHOLE_GRAINS)
+
+        self.model.update_rating(2, 4)
+        self.assertIn((salmon, GROUP_WHOLE_GRAINS), self.model._top)
+        self.assertNotIn((tofu, GROUP_WHOLE_GRAINS), self.model._top)
+        self.assertEqual(self.model.suggest(_keys("тофу"), GROUP_WHOLE_GRAINS), ["рис"])
+
+    def test_regrouped_key_leaves_neighbour_top_lists(self) -> None:
+        self.assertEqual(self.model.suggest(_keys("брокколи"), GROUP_PROTEINS, limit=3), ["лосось", "тофу"])
+        self.model.add_recipe(4, _plate_map(veggies_fruits=["тофу"], whole_grains=["рис"]), 2)
+        self.model.add_recipe(5, _plate_map(veggies_fruits=["тофу"], whole_grains=["рис"]), 2)
+        self.assertEqual(self.model.suggest(_keys("брокколи"), GROUP_PROTEINS, limit=3), ["лосось"])
+
+    def test_recommendations_prefer_model_and_fall_back_to_pool(self) -> None:
+        install_cooccurrence_model(self.model)
+        recommendations = PlateService.build_recommendations(
+            [GROUP_PROTEINS, GROUP_WHOLE_GRAINS],
+            ingredients=["Брокколи 200 г"],
+        )
+        self.assertEqual(recommendations, ["лосось", "киноа"])
+        self.assertEqual(PlateService.build_recommendations([GROUP_PROTEINS], ingredients=["Паприка"]), ["куриная грудка"])
+
+
+class _FakeSession:
+    async def __aenter__(self) -> _FakeSession:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+class RefreshPlateModelsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_round_does_not_stop_the_loop(self) -> None:
+        rebuilt = asyncio.Event()
+        calls = {"refresh": 0}
+
+        async def refresh(repo) -> None:
+            calls["refresh"] += 1
+            if calls["refresh"] == 1:
+                raise KeyError("bad plate_map")
+
+        async def rebuild(repo) -> None:
+            rebuilt.set()
+
+        with (
+            patch.object(bot_main, "SessionFactory", _FakeSession),
+            patch.object(bot_main, "refresh_learned_plate_groups", refresh),
+            patch.object(bot_main, "rebuild_cooccurrence_model", rebuild),
+        ):
+            task = asyncio.create_task(bot_main.refresh_plate_models_periodically(0))
+            await asyncio.wait_for(rebuilt.wait(), timeout=1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertGreaterEqual(calls["refresh"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
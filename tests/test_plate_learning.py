@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import unittest
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.services.plate_learning import (
+    load_learned_plate_groups,
+    mine_plate_groups,
+    refresh_learned_plate_groups,
+)
+from core.services.plate_service import (
+    GROUP_OTHERS,
+    GROUP_WHOLE_GRAINS,
+    LearnedPlateGroups,
+    current_learned_groups,
+    install_learned_groups,
+    plate_service,
+)
+from db.models import Base
+from db.repo import RecipeRepository
+
+
+def _plate_map(**groups: list[str]) -> dict:
+    return {"veggies_fruits": [], "whole_grains": [], "proteins": [], "fats": [], "others": [], **groups}
+
+
+class PlateLearningTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._learned = current_learned_groups()
+
+    def tearDown(self) -> None:
+        install_learned_groups(self._learned)
+
+    def test_mining_keeps_confident_keys_with_enough_support(self) -> None:
+        plate_maps = [
+            _plate_map(whole_grains=["кускус"], others=["соль"]),
+            _plate_map(whole_grains=["Кускус 150 г"]),
+            _plate_map(whole_grains=["кускус"]),
+            _plate_map(proteins=["кускус"], veggies_fruits=["спаржа"]),
+            _plate_map(veggies_fruits=["спаржа"], fats=["спаржа"]),
+        ]
+        learned = mine_plate_groups(plate_maps, min_support=2, min_confidence=0.7)
+        self.assertEqual([(entry.canonical_key, entry.plate_group) for entry in learned], [("кускус", "whole_grains")])
+        self.assertEqual(learned[0].support, 4)
+        self.assertAlmostEqual(learned[0].confidence, 0.75)
+
+    def test_learned_table_is_consulted_before_keywords(self) -> None:
+        self.assertEqual(plate_service.classify_one("Кускус 200 г"), GROUP_OTHERS)
+        install_learned_groups(LearnedPlateGroups(groups={"кускус": (GROUP_WHOLE_GRAINS, 0.9)}))
+        self.assertEqual(plate_service.classify_one("Кускус 200 г"), GROUP_WHOLE_GRAINS)
+        self.assertEqual(plate_service.analyze(["Кускус", "Курица", "Брокколи"]).missing_groups, [])
+
+    async def test_refresh_persists_and_reloads_table(self) -> None:
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with session_factory() as session:
+                repo = RecipeRepository(session)
+                user = await repo.ensure_user(tg_user_id=1)
+                for _ in range(3):
+                    await repo.save_recipe(
+                        user_id=user.id,
+                        request_type="ingredients",
+                        source_ingredients=["кускус"],
+                        supplemented_ingredients=[],
+                        llm_response={"title": "Кускус", "plate_map": _plate_map(whole_grains=["кускус"])},
+                    )
+                await session.commit()
+                self.assertEqual(await refresh_learned_plate_groups(repo), 1)
+
+            install_learned_groups(LearnedPlateGroups(groups={}))
+            async with session_factory() as session:
+                self.assertEqual(await load_learned_plate_groups(RecipeRepository(session)), 1)
+            self.assertEqual(current_learned_groups().groups["кускус"], (GROUP_WHOLE_GRAINS, 1.0))
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import unittest
+
+from core.services.plate_service import (
+    GROUP_OTHERS,
+    GROUP_PROTEINS,
+    GROUP_WHOLE_GRAINS,
+    PlateService,
+    plate_service,
+)
+
+
+class PlateServiceTests(unittest.TestCase):
+    def test_classify_one_keeps_group_priority(self) -> None:
+        # "рис" (whole grains) is checked before "курин" (proteins).
+        self.assertEqual(plate_service.classify_one("Куриная грудка с рисом"), GROUP_WHOLE_GRAINS)
+        self.assertEqual(plate_service.classify_one("Филе индейки 300 г"), GROUP_PROTEINS)
+        self.assertEqual(plate_service.classify_one("Соль по вкусу"), GROUP_OTHERS)
+
+    def test_classify_many_matches_classify_ingredients(self) -> None:
+        ingredients = ["Нут 200 г", "Брокколи", "Нут 200 г", "Оливковое масло", "Паприка"]
+        groups = PlateService.classify_many(ingredients)
+        classified = PlateService().classify_ingredients(ingredients)
+        for ingredient, group in zip(ingredients, groups):
+            self.assertIn(ingredient, classified[group])
+        self.assertEqual(classified[GROUP_PROTEINS], ["Нут 200 г", "Нут 200 г"])
+
+    def test_analyze_reports_missing_groups(self) -> None:
+        analysis = plate_service.analyze(["Курица", "Брокколи"])
+        self.assertEqual(analysis.missing_groups, [GROUP_WHOLE_GRAINS])
+        self.assertEqual(analysis.recommendations, ["гречка"])
+
+
+if __name__ == "__main__":
+    unittest.main()
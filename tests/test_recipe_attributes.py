@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import unittest
+
+from core.services.recipe_attributes import is_fast, is_vegetarian, recipe_flags
+
+
+class RecipeAttributesTests(unittest.TestCase):
+    def test_vegetarian_keywords(self) -> None:
+        self.assertTrue(is_vegetarian(["Тофу 200 г", "Брокколи"]))
+        self.assertFalse(is_vegetarian(["Куриная грудка 250 г", "Рис"]))
+        self.assertFalse(is_vegetarian(["ЛОСОСЬ"]))
+
+    def test_fast_threshold(self) -> None:
+        self.assertTrue(is_fast(20))
+        self.assertFalse(is_fast(21))
+        self.assertFalse(is_fast(None))
+
+    def test_flags_prefer_llm_ingredients(self) -> None:
+        payload = {"ingredients": ["Говядина 300 г"], "time_minutes": 15}
+        self.assertEqual(recipe_flags(payload, ["морковь"]), (False, True))
+        self.assertEqual(recipe_flags({}, ["морковь"]), (True, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
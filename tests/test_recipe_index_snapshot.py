@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from core.services import recipe_index_snapshot
+from core.services.recipe_index_snapshot import load_snapshot, restore_snapshot, write_snapshot
+from core.services.recipe_text_index import RecipeTextIndex
+
+
+def _index() -> RecipeTextIndex:
+    index = RecipeTextIndex()
+    index.add(1, "Боул с курицей", ["Куриная грудка 250 г", "Рис бурый 120 г", "Брокколи 200 г"])
+    index.add(2, "Вегетарианское рагу из нута", ["Нут 200 г", "Кабачок 1 шт", "Томаты 3 шт"])
+    index.add(3, "Быстрый вегетарианский ужин: овощной омлет", ["Яйца 3 шт", "Шпинат 50 г", "Сыр 30 г"])
+    index.add(4, "Паста с лососем", ["Паста 200 г", "Лосось 150 г", "Сливки 100 мл"])
+    index.high_water_mark = 4
+    return index
+
+
+class RecipeIndexSnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "index.snapshot"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _restored(self, source: RecipeTextIndex) -> RecipeTextIndex:
+        write_snapshot(source, self.path)
+        return load_snapshot(self.path, RecipeTextIndex())
+
+    def test_roundtrip_preserves_search_results(self) -> None:
+        source = _index()
+        restored = self._restored(source)
+        self.assertEqual(len(restored), 4)
+        self.assertEqual(restored.high_water_mark, 4)
+        for query in ("быстрый вегетарианский ужин", "паста с лососем", "курица рис брокколи"):
+            expected = source.search(query, min_score=0.0)
+            actual = restored.search(query, min_score=0.0)
+            self.assertEqual([match.recipe_id for match in actual], [match.recipe_id for match in expected])
+            for left, right in zip(actual, expected):
+                self.assertAlmostEqual(left.score, right.score, places=5)
+
+    def test_new_rows_extend_and_shadow_snapshot(self) -> None:
+        restored = self._restored(_index())
+        restored.add(5, "Пицца маргарита", ["Тесто 300 г", "Моцарелла 150 г"])
+        restored.add(4, "Гречка с грибами", ["Гречка 100 г", "Шампиньоны 200 г"])
+        self.assertEqual(len(restored), 5)
+        self.assertEqual(restored.search("пицца маргарита", limit=1)[0].recipe_id, 5)
+        self.assertEqual(restored.search("паста с лососем", min_score=0.5), [])
+        self.assertTrue(restored.remove(1))
+        self.assertNotIn(1, restored)
+
+        compacted = self._restored(restored)
+        self.assertEqual(sorted(compacted.doc_ids()), [2, 3, 4, 5])
+
+    def test_empty_index_roundtrip(self) -> None:
+        restored = self._restored(RecipeTextIndex())
+        self.assertEqual(len(restored), 0)
+        self.assertEqual(restored.search("паста"), [])
+
+    def test_restore_ignores_missing_and_corrupt_files(self) -> None:
+        index = RecipeTextIndex()
+        self.assertFalse(restore_snapshot(self.path, index))
+        self.path.write_bytes(b"not a snapshot")
+        self.assertFalse(restore_snapshot(self.path, index))
+        self.assertEqual(len(index), 0)
+
+    def test_snapshot_from_other_canonicalizer_is_rejected(self) -> None:
+        stale = recipe_index_snapshot.CANONICALIZER_FINGERPRINT ^ 0xFFFFFFFF
+        with patch.object(recipe_index_snapshot, "CANONICALIZER_FINGERPRINT", stale):
+            write_snapshot(_index(), self.path)
+
+        with self.assertRaisesRegex(ValueError, "fingerprint"):
+            load_snapshot(self.path, RecipeTextIndex())
+        index = RecipeTextIndex()
+        self.assertFalse(restore_snapshot(self.path, index))
+        self.assertEqual(len(index), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,8 @@ from __future__ import annotations
 import unittest
 from datetime import datetime, timedelta, timezone
 
-from core.services.recipe_match_service import find_best_recipe_match
-from db.models import Recipe
-from db.repo import RecipeWithRating
+from core.services.recipe_match_service import MatchConstraints, find_best_recipe_match, find_top_matches
+from db.repo import RecipeCandidate
 
 
 def _item(
@@ -14,21 +13,18 @@ def _item(
     source_ingredients: list[str],
     rating: int,
     created_at: datetime,
-) -> RecipeWithRating:
-    recipe = Recipe(
+    time_minutes: int = 20,
+    llm_ingredients: list[str] | None = None,
+) -> RecipeCandidate:
+    return RecipeCandidate(
         id=recipe_id,
-        user_id=1,
-        request_type="ingredients",
         title=f"Recipe {recipe_id}",
-        time_minutes=20,
-        servings=2,
-        source_ingredients=source_ingredients,
-        supplemented_ingredients=[],
-        plate_map={},
-        llm_response={"ingredients": source_ingredients},
+        time_minutes=time_minutes,
+        rating=rating,
         created_at=created_at,
+        source_ingredients=tuple(source_ingredients),
+        ingredients=tuple(llm_ingredients or source_ingredients),
     )
-    return RecipeWithRating(recipe=recipe, rating=rating)
 
 
 class RecipeMatchServiceTests(unittest.TestCase):
@@ -42,7 +38,7 @@ class RecipeMatchServiceTests(unittest.TestCase):
         assert result is not None
         self.assertEqual(result.match_type, "exact")
         self.assertEqual(result.similarity, 1.0)
-        self.assertEqual(result.item.recipe.id, 1)
+        self.assertEqual(result.item.id, 1)
 
     def test_similar_match_uses_jaccard_threshold(self) -> None:
         now = datetime.now(timezone.utc)
@@ -85,7 +81,62 @@ class RecipeMatchServiceTests(unittest.TestCase):
         result = find_best_recipe_match(["рис", "курица", "брокколи"], candidates)
         self.assertIsNotNone(result)
         assert result is not None
-        self.assertEqual(result.item.recipe.id, 12)
+        self.assertEqual(result.item.id, 12)
+
+    def test_llm_ingredients_match_user_input(self) -> None:
+        now = datetime.now(timezone.utc)
+        candidates = [
+            _item(
+                20,
+                source_ingredients=[
+                    "200 г куриной грудки",
+                    "Рис 120 г",
+                    "Брокколи 200 г",
+                    "Томаты 2 шт",
+                ],
+                rating=0,
+                created_at=now,
+            ),
+        ]
+        result = find_best_recipe_match(["курица", "рис", "брокколи", "помидоры"], candidates)
+        self.assertIsNotNone(result)
+        assert result is not None
+        self.assertEqual(result.match_type, "exact")
+
+    def test_top_matches_are_ranked_and_bounded(self) -> None:
+        now = datetime.now(timezone.utc)
+        candidates = [
+            _item(30, source_ingredients=["курица", "рис", "брокколи", "помидор"], rating=9, created_at=now),
+            _item(31, source_ingredients=["курица", "рис", "брокколи"], rating=1, created_at=now),
+            _item(32, source_ingredients=["курица", "рис", "брокколи"], rating=4, created_at=now),
+            _item(33, source_ingredients=["гречка", "грибы", "лук"], rating=10, created_at=now),
+        ]
+        result = find_top_matches(["курица", "рис", "брокколи"], candidates, k=2)
+        self.assertEqual([match.item.id for match in result], [32, 31])
+
+        result = find_top_matches(["курица", "рис", "брокколи"], candidates, k=5, min_jaccard=0.7)
+        self.assertEqual([match.item.id for match in result], [32, 31, 30])
+        self.assertEqual(result[2].match_type, "similar")
+
+    def test_constraints_filter_allergens_and_time(self) -> None:
+        now = datetime.now(timezone.utc)
+        candidates = [
+            _item(
+                40,
+                source_ingredients=["курица", "рис", "брокколи"],
+                rating=9,
+                created_at=now,
+                llm_ingredients=["Курица 200 г", "Рис 100 г", "Брокколи 150 г", "Арахисовое масло 1 ст.л."],
+            ),
+            _item(41, source_ingredients=["курица", "рис", "брокколи"], rating=5, created_at=now, time_minutes=60),
+            _item(42, source_ingredients=["курица", "рис", "брокколи"], rating=1, created_at=now, time_minutes=25),
+        ]
+        constraints = MatchConstraints(allergies=("арахис",), time_limit_minutes=30)
+        result = find_top_matches(["курица", "рис", "брокколи"], candidates, k=3, constraints=constraints)
+        self.assertEqual([match.item.id for match in result], [42])
+
+        excluded = MatchConstraints(excluded_products=("брокколи",))
+        self.assertIsNone(find_best_recipe_match(["курица", "рис", "брокколи"], candidates, constraints=excluded))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import unittest
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from db.models import Base, Recipe
+from db.repo import BrowseFilters, RecipeRepository
+
+
+class RecipeRatingCounterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            self.user_ids = [(await repo.ensure_user(tg_user_id=tg_id)).id for tg_id in (1, 2, 3)]
+            self.recipe_ids = []
+            for title in ("Суп", "Салат"):
+                saved = await repo.save_recipe(
+                    user_id=self.user_ids[0],
+                    request_type="ingredients",
+                    source_ingredients=["морковь"],
+                    supplemented_ingredients=[],
+                    llm_response={"title": title},
+                )
+                self.recipe_ids.append(saved.id)
+            await session.commit()
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def _counters(self, recipe_id: int) -> tuple[int, int, int]:
+        async with self.session_factory() as session:
+            recipe = await session.get(Recipe, recipe_id)
+            return recipe.rating, recipe.likes, recipe.dislikes
+
+    async def _vote(self, user_index: int, recipe_id: int, vote: int) -> int:
+        async with self.session_factory() as session:
+            rating = await RecipeRepository(session).set_vote(
+                user_id=self.user_ids[user_index], recipe_id=recipe_id, vote=vote
+            )
+            await session.commit()
+            return rating
+
+    async def test_votes_update_counters(self) -> None:
+        recipe_id = self.recipe_ids[0]
+        await self._vote(0, recipe_id, 1)
+        await self._vote(1, recipe_id, 1)
+        rating = await self._vote(2, recipe_id, -1)
+
+        self.assertEqual(rating, 1)
+        self.assertEqual(await self._counters(recipe_id), (1, 2, 1))
+
+    async def test_vote_flip_and_repeat(self) -> None:
+        recipe_id = self.recipe_ids[0]
+        await self._vote(0, recipe_id, 1)
+        await self._vote(0, recipe_id, 1)
+        self.assertEqual(await self._counters(recipe_id), (1, 1, 0))
+
+        rating = await self._vote(0, recipe_id, -1)
+        self.assertEqual(rating, -1)
+        self.assertEqual(await self._counters(recipe_id), (-1, 0, 1))
+
+    async def test_favorites_are_idempotent(self) -> None:
+        recipe_id = self.recipe_ids[0]
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            await repo.add_favorite(user_id=self.user_ids[0], recipe_id=recipe_id)
+            await repo.add_favorite(user_id=self.user_ids[0], recipe_id=recipe_id)
+            await session.commit()
+            self.assertTrue((await repo.get_recipe_detail(recipe_id, viewer_user_id=self.user_ids[0])).is_favorite)
+
+            self.assertTrue(await repo.remove_favorite(user_id=self.user_ids[0], recipe_id=recipe_id))
+            self.assertFalse(await repo.remove_favorite(user_id=self.user_ids[0], recipe_id=recipe_id))
+            await session.commit()
+            self.assertFalse((await repo.get_recipe_detail(recipe_id, viewer_user_id=self.user_ids[0])).is_favorite)
+
+    async def test_recipe_detail_reports_viewer_state(self) -> None:
+        recipe_id = self.recipe_ids[0]
+        await self._vote(0, recipe_id, -1)
+        await self._vote(1, recipe_id, 1)
+        await self._vote(2, recipe_id, 1)
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            await repo.add_favorite(user_id=self.user_ids[1], recipe_id=recipe_id)
+            await session.commit()
+
+            voter = await repo.get_recipe_detail(recipe_id, viewer_user_id=self.user_ids[0])
+            fan = await repo.get_recipe_detail(recipe_id, viewer_user_id=self.user_ids[1])
+            other = await repo.get_recipe_detail(self.recipe_ids[1], viewer_user_id=self.user_ids[1])
+            missing = await repo.get_recipe_detail(10_000, viewer_user_id=self.user_ids[0])
+
+        self.assertEqual((voter.recipe.title, voter.rating, voter.is_favorite, voter.viewer_vote), ("Суп", 1, False, -1))
+        self.assertEqual((fan.is_favorite, fan.viewer_vote), (True, 1))
+        self.assertEqual((other.rating, other.is_favorite, other.viewer_vote), (0, False, 0))
+        self.assertIsNone(missing)
+
+    async def test_top_scope_orders_by_stored_rating(self) -> None:
+        first, second = self.recipe_ids
+        await self._vote(0, second, 1)
+        await self._vote(1, first, -1)
+
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            top = await repo.list_recipe_page("top", viewer_user_id=self.user_ids[0], filters=BrowseFilters(), limit=5)
+            loaded = await repo.get_recipe_detail(first, viewer_user_id=self.user_ids[0])
+
+        self.assertEqual([(item.id, item.rating) for item in top.items], [(second, 1), (first, -1)])
+        self.assertEqual(loaded.rating, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
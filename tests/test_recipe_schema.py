@@ -4,7 +4,7 @@ import unittest
 
 from pydantic import ValidationError
 
-from schemas import RecipeResponse
+from schemas import CompactDecodeError, RecipeResponse, decode_compact_recipe, encode_compact_recipe
 
 
 def _valid_payload() -> dict:
@@ -58,6 +58,33 @@ class RecipeSchemaTests(unittest.TestCase):
         self.assertEqual(len(recipe.steps), 5)
 
 
+class CompactSchemaTests(unittest.TestCase):
+    def test_expands_plate_indexes_into_names(self) -> None:
+        compact = {
+            "t": "Теплый боул",
+            "i": _valid_payload()["ingredients"],
+            "s": _valid_payload()["steps"],
+            "m": "35 минут",
+            "n": 2,
+            "p": {"v": [2], "g": ["1"], "r": [0, 0, 9], "f": 3},
+            "x": [],
+        }
+        recipe = decode_compact_recipe(compact)
+        self.assertEqual(recipe.time_minutes, 35)
+        self.assertEqual(recipe.plate_map.veggies_fruits, ["брокколи"])
+        self.assertEqual(recipe.plate_map.whole_grains, ["рис бурый"])
+        self.assertEqual(recipe.plate_map.proteins, ["куриная грудка"])
+        self.assertEqual(recipe.plate_map.fats, ["оливковое масло"])
+        self.assertEqual(recipe.plate_map.dairy_optional, [])
+
+    def test_round_trip_and_full_shape_fallback(self) -> None:
+        recipe = RecipeResponse.model_validate(_valid_payload())
+        self.assertEqual(decode_compact_recipe(encode_compact_recipe(recipe)), recipe)
+        self.assertEqual(decode_compact_recipe(_valid_payload()), recipe)
+        with self.assertRaises(CompactDecodeError):
+            decode_compact_recipe({"s": []})
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot import recipe_steps
+from db.models import Base, Recipe
+from db.repo import RecipeRepository
+from schemas import RecipeResponse, RecipeSummary, parse_stored_recipe
+
+_STEPS = [
+    "Промойте рис и отварите его 20 минут под крышкой на слабом огне.",
+    "Нарежьте куриную грудку кубиками по 2 см и посолите.",
+    "Обжарьте курицу 8 минут до золотистой корочки на среднем огне.",
+    "Бланшируйте брокколи 3 минуты в кипящей подсоленной воде.",
+    "Соберите боул, полейте оливковым маслом и подавайте сразу.",
+]
+
+
+def _summary() -> RecipeSummary:
+    return RecipeSummary.model_validate(
+        {
+            "title": "Боул с курицей",
+            "ingredients": ["Куриная грудка 250 г", "Рис 120 г", "Брокколи 200 г", "Оливковое масло 1 ст.л."],
+            "time_minutes": 35,
+            "servings": 2,
+            "plate_map": {"proteins": ["куриная грудка"], "whole_grains": ["рис"]},
+        }
+    )
+
+
+class _FakeClient:
+    calls = 0
+
+    async def generate_steps(self, summary: RecipeSummary) -> RecipeResponse:
+        type(self).calls += 1
+        await asyncio.sleep(0.01)
+        return RecipeResponse.model_validate({**summary.model_dump(by_alias=True), "steps": _STEPS})
+
+
+class RecipeStepsTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session)
+            user = await repo.ensure_user(tg_user_id=1)
+            saved = await repo.save_recipe(
+                user_id=user.id,
+                request_type="ingredients",
+                source_ingredients=["курица"],
+                supplemented_ingredients=[],
+                llm_response=_summary().model_dump(by_alias=True),
+            )
+            await session.commit()
+            self.recipe_id = saved.id
+        _FakeClient.calls = 0
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def test_prefetch_and_tap_share_one_generation_and_persist_steps(self) -> None:
+        with (
+            patch.object(recipe_steps, "SessionFactory", self.session_factory),
+            patch.object(recipe_steps, "GigaChatClient", _FakeClient),
+        ):
+            recipe_steps.schedule_recipe_steps(self.recipe_id, _summary())
+            recipe = await recipe_steps.ensure_recipe_steps(self.recipe_id)
+            self.assertEqual(recipe.steps, _STEPS)
+            # Stored steps are served without another call.
+            await recipe_steps.ensure_recipe_steps(self.recipe_id)
+
+        self.assertEqual(_FakeClient.calls, 1)
+        async with self.session_factory() as session:
+            stored = await session.get(Recipe, self.recipe_id)
+        self.assertIsInstance(parse_stored_recipe(stored.llm_response), RecipeResponse)
+
+    async def test_missing_recipe_returns_none(self) -> None:
+        with patch.object(recipe_steps, "SessionFactory", self.session_factory):
+            self.assertIsNone(await recipe_steps.ensure_recipe_steps(self.recipe_id + 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import unittest
+
+from core.services.recipe_text_index import RecipeTextIndex, parse_text_query, sync_recipe_text_index
+from db.repo import RecipeIndexRow
+
+
+def _index() -> RecipeTextIndex:
+    index = RecipeTextIndex()
+    index.add(1, "Боул с курицей", ["Куриная грудка 250 г", "Рис бурый 120 г", "Брокколи 200 г"])
+    index.add(2, "Вегетарианское рагу из нута", ["Нут 200 г", "Кабачок 1 шт", "Томаты 3 шт"])
+    index.add(3, "Быстрый вегетарианский ужин: овощной омлет", ["Яйца 3 шт", "Шпинат 50 г", "Сыр 30 г"])
+    index.add(4, "Паста с лососем", ["Паста 200 г", "Лосось 150 г", "Сливки 100 мл"])
+    return index
+
+
+class RecipeTextIndexTests(unittest.TestCase):
+    def test_free_text_request_finds_similar_title(self) -> None:
+        matches = _index().search("быстрый вегетарианский ужин", limit=1, min_score=0.5)
+        self.assertEqual([match.recipe_id for match in matches], [3])
+
+    def test_ingredients_contribute_to_score(self) -> None:
+        matches = _index().search("паста с лососем и сливками", limit=1)
+        self.assertEqual(matches[0].recipe_id, 4)
+        self.assertGreater(matches[0].score, 0.8)
+
+    def test_threshold_rejects_unrelated_request(self) -> None:
+        self.assertEqual(_index().search("пицца маргарита"), [])
+
+    def test_readding_recipe_replaces_its_row(self) -> None:
+        index = _index()
+        index.add(4, "Пицца маргарита", ["Тесто 300 г", "Моцарелла 150 г"])
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.search("паста с лососем", min_score=0.5), [])
+        self.assertEqual(index.search("пицца маргарита", limit=1)[0].recipe_id, 4)
+
+    def test_negated_ingredient_is_excluded_not_searched(self) -> None:
+        query = parse_text_query("рис без курицы")
+        self.assertEqual(query.text, "рис")
+        self.assertEqual(query.excluded, ("курицы",))
+
+        index = RecipeTextIndex()
+        index.add(1, "Курица с рисом", ["Куриное филе 200 г", "Рис 100 г"])
+        self.assertLess(index.search("рис без курицы", min_score=0.0)[0].score, index.search("курица с рисом")[0].score)
+
+    def test_negation_covers_joined_terms_until_a_preposition(self) -> None:
+        query = parse_text_query("не острое, без лука и грибов, с нутом")
+        self.assertEqual(query.text, "с нутом")
+        self.assertEqual(query.excluded, ("острое", "лука", "грибов"))
+
+
+class SyncRecipeTextIndexTests(unittest.IsolatedAsyncioTestCase):
+    async def test_sync_loads_only_rows_after_high_water_mark(self) -> None:
+        rows = [
+            RecipeIndexRow(id=5, title="Гречка с грибами", ingredients=["Гречка 100 г", "Шампиньоны 200 г"]),
+            RecipeIndexRow(id=6, title="Салат с тунцом", ingredients=["Тунец 1 банка", "Огурец 1 шт"]),
+        ]
+        requested: list[int] = []
+
+        class _Repo:
+            async def list_recipe_index_rows(self, after_id: int, limit: int) -> list[RecipeIndexRow]:
+                requested.append(after_id)
+                return [row for row in rows if row.id > after_id][:limit]
+
+        index = RecipeTextIndex()
+        self.assertEqual(await sync_recipe_text_index(_Repo(), index), 2)
+        self.assertEqual(await sync_recipe_text_index(_Repo(), index), 0)
+        self.assertEqual(requested, [0, 6])
+        self.assertEqual(index.high_water_mark, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from core.config import settings
+from core.services.reuse_replay import REQUEST_EVENT, load_corpus, parse_request_line, replay, request_log_fields
+
+FIXTURE = Path(__file__).parent / "fixtures" / "reuse_corpus.json"
+
+
+class ReuseReplayTests(unittest.TestCase):
+    def test_parses_fixture_and_structlog_lines(self) -> None:
+        request = parse_request_line(
+            '{"event": "recipe_request_received", "mode": "ingredients", "ingredients": ["рис", "нут"]}'
+        )
+        assert request is not None
+        self.assertEqual(request.text, "рис, нут")
+        self.assertIsNone(parse_request_line('{"event": "update_received", "user_id": 1}'))
+        self.assertIsNone(parse_request_line("not json"))
+
+    def test_request_text_is_logged_only_when_recording(self) -> None:
+        with patch.object(settings, "record_recipe_requests", False):
+            self.assertEqual(request_log_fields("ready_dish", dish_request="ужин без глютена"), {"mode": "ready_dish"})
+        self.assertIsNone(parse_request_line(json.dumps({"event": REQUEST_EVENT, "mode": "ready_dish"})))
+
+        with patch.object(settings, "record_recipe_requests", True):
+            fields = request_log_fields("ready_dish", dish_request="ужин без глютена")
+        request = parse_request_line(json.dumps({"event": REQUEST_EVENT, **fields}, ensure_ascii=False))
+        assert request is not None
+        self.assertEqual(request.text, "ужин без глютена")
+
+    def test_corpus_replay_is_reproducible(self) -> None:
+        candidates, requests = load_corpus(FIXTURE)
+        self.assertEqual(len(candidates), 8)
+        self.assertEqual(len(requests), 20)
+
+        reports = {
+            (report.min_jaccard, report.min_intersection): report
+            for report in replay(requests, candidates, jaccard_grid=(0.6, 0.8), intersection_grid=(3,))
+        }
+        default = reports[(0.8, 3)]
+        self.assertEqual(default.requests, 20)
+        self.assertEqual(default.hits, 9)
+        self.assertEqual(default.text_hits, 3)
+        self.assertEqual(default.llm_calls_saved, 9)
+        self.assertGreater(reports[(0.6, 3)].hits, default.hits)
+        self.assertGreater(default.latency_saved_seconds, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,13 @@ from __future__ import annotations
 import unittest
 
 from core.services.safety_service import (
+    GATED_RECIPE_FIELDS,
+    StreamingSafetyScanner,
     build_block_message,
     check_recipe_output,
     check_user_input,
+    find_prohibited_terms,
+    normalize_text,
 )
 
 
@@ -40,6 +44,78 @@ class SafetyServiceTests(unittest.TestCase):
         self.assertIn("запрещенные", text)
         self.assertIn("альтернативы", text)
 
+    def test_reports_every_category_and_term(self) -> None:
+        result = check_user_input(["героин", "бензин", "укроп"])
+        self.assertFalse(result.is_safe)
+        self.assertEqual(result.category, "dangerous_non_food")
+        self.assertEqual(result.categories, ("dangerous_non_food", "illegal_drugs"))
+        self.assertEqual(result.matched_terms, ("бензин", "героин"))
+        self.assertEqual(result.terms_by_category, (("dangerous_non_food", ("бензин",)), ("illegal_drugs", ("героин",))))
+
+    def test_block_message_lists_terms_under_their_own_category(self) -> None:
+        text = build_block_message(check_user_input(["героин", "бензин"]))
+        blocks = text.split("\n\n")
+        self.assertEqual(len(blocks), 2)
+        self.assertIn("бензин", blocks[0])
+        self.assertNotIn("героин", blocks[0])
+        self.assertIn("героин", blocks[1])
+        self.assertNotIn("бензин", blocks[1])
+
+    def test_finds_overlapping_terms_with_offsets(self) -> None:
+        text = normalize_text("Метамфетамин и каннибализм")
+        found = {(match.term, match.start, match.end) for match in find_prohibited_terms(text)}
+        self.assertEqual(
+            found,
+            {
+                ("метамфетамин", 0, 12),
+                ("амфетамин", 3, 12),
+                ("каннибал", 15, 23),
+                ("каннибализм", 15, 26),
+            },
+        )
+
+    def test_whole_words_skips_matches_inside_words(self) -> None:
+        self.assertFalse(check_user_input("стеклоочиститель").is_safe)
+        self.assertTrue(check_user_input("стеклоочиститель", whole_words=True).is_safe)
+        self.assertFalse(check_user_input("немного стекло", whole_words=True).is_safe)
+
+    def test_streaming_scanner_matches_terms_split_across_chunks(self) -> None:
+        scanner = StreamingSafetyScanner()
+        self.assertTrue(scanner.feed('{"title": "Паста", "steps": ["Добавьте от').is_safe)
+        self.assertTrue(scanner.feed("бели").is_safe)
+        result = scanner.feed('ватель в кастрюлю"]}')
+        self.assertFalse(result.is_safe)
+        self.assertEqual(result.matched_terms, ("отбеливатель",))
+
+    def test_streaming_scanner_normalizes_separators_between_chunks(self) -> None:
+        scanner = StreamingSafetyScanner()
+        scanner.feed("HUMAN,  ")
+        self.assertFalse(scanner.feed("\n meat").is_safe)
+
+    def test_gated_scanner_ignores_fields_outside_the_output_gate(self) -> None:
+        text = '{"title":"Салат","tips":["Не берите пластиковую миску","стеклянная форма"],"plate_map":{"others":[]}}'
+        scanner = StreamingSafetyScanner(GATED_RECIPE_FIELDS)
+        for index in range(0, len(text), 7):
+            result = scanner.feed(text[index : index + 7])
+        self.assertTrue(result.is_safe)
+        self.assertTrue(check_recipe_output("Салат", [], []).is_safe)
+        self.assertFalse(StreamingSafetyScanner().feed(text).is_safe)
+
+    def test_gated_scanner_reads_gated_values_across_chunks_and_escapes(self) -> None:
+        scanner = StreamingSafetyScanner(GATED_RECIPE_FIELDS)
+        self.assertTrue(scanner.feed('```json\n{"x": ["отбеливатель"], "s": ["Добавьте от').is_safe)
+        self.assertTrue(scanner.feed("бели").is_safe)
+        result = scanner.feed('\\u0432атель \\"в\\" кастрюлю"]}')
+        self.assertFalse(result.is_safe)
+        self.assertEqual(result.matched_terms, ("отбеливатель",))
+
+        compact = StreamingSafetyScanner(GATED_RECIPE_FIELDS)
+        self.assertFalse(compact.feed('{"t": "Паста", "i": ["Человечина 100 г"]}').is_safe)
+
+        # Terms must not join across two separate values.
+        joined = StreamingSafetyScanner(GATED_RECIPE_FIELDS)
+        self.assertTrue(joined.feed('{"steps": ["Отбели", "ватель не нужен"]}').is_safe)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import unittest
+
+from core.services.plate_service import PlateService
+from core.services.text_normalization import collapse_separators, fold_case, normalize_text
+
+
+class TextNormalizationTests(unittest.TestCase):
+    def test_normalize_text_collapses_punctuation_and_whitespace(self) -> None:
+        self.assertEqual(normalize_text("  Оливковое масло — 1 ст.л.\n"), "оливковое масло 1 ст л")
+        self.assertEqual(normalize_text("Свёкла (печёная)"), "свекла печеная")
+        self.assertEqual(normalize_text("🥦!!"), "")
+
+    def test_long_texts_bypass_cache_with_same_result(self) -> None:
+        text = "Нарежьте курицу, обжарьте с луком. " * 10
+        self.assertEqual(normalize_text(text), normalize_text(text.upper()))
+
+    def test_collapse_separators_keeps_edge_spaces(self) -> None:
+        self.assertEqual(collapse_separators("HUMAN,  "), "human ")
+        self.assertEqual(collapse_separators("\n meat"), " meat")
+        self.assertEqual(fold_case("ЁЖИК"), "ежик")
+
+    def test_plate_service_matches_folded_spelling(self) -> None:
+        classified = PlateService().classify_ingredients(["Чечевица красная", "Растительное-масло"])
+        self.assertEqual(classified["proteins"], ["Чечевица красная"])
+        self.assertEqual(classified["fats"], ["Растительное-масло"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot.middlewares.unit_of_work import UnitOfWorkMiddleware
+from db.models import Base, User
+from db.unit_of_work import UnitOfWork
+
+
+class UnitOfWorkTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        # A file database gets a real connection pool, unlike :memory:.
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{Path(self.directory.name) / 'uow.db'}")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.middleware = UnitOfWorkMiddleware(self.session_factory)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+        self.directory.cleanup()
+
+    async def _user_count(self) -> int:
+        async with self.session_factory() as session:
+            return await session.scalar(select(func.count()).select_from(User))
+
+    async def test_commits_after_handler(self) -> None:
+        async def handler(event, data) -> str:
+            await data["uow"].repo.ensure_user(tg_user_id=1)
+            return "done"
+
+        self.assertEqual(await self.middleware(handler, object(), {}), "done")
+        self.assertEqual(await self._user_count(), 1)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+    async def test_rolls_back_on_error(self) -> None:
+        async def handler(event, data) -> None:
+            await data["uow"].repo.ensure_user(tg_user_id=2)
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            await self.middleware(handler, object(), {})
+        self.assertEqual(await self._user_count(), 0)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+    async def test_session_is_lazy(self) -> None:
+        seen: list[UnitOfWork] = []
+
+        async def handler(event, data) -> None:
+            seen.append(data["uow"])
+
+        await self.middleware(handler, object(), {})
+        self.assertFalse(seen[0].active)
+
+    async def test_released_returns_connection_and_reacquires(self) -> None:
+        uow = UnitOfWork(self.session_factory)
+        user = await uow.repo.ensure_user(tg_user_id=3)
+        self.assertEqual(self.engine.pool.checkedout(), 1)
+
+        async with uow.released():
+            self.assertEqual(self.engine.pool.checkedout(), 0)
+            self.assertFalse(uow.active)
+            with self.assertRaises(RuntimeError):
+                uow.repo
+            # Work done before the release is already committed.
+            self.assertEqual(await self._user_count(), 1)
+
+        settings = await uow.repo.get_user_settings(user.id)
+        self.assertIsNone(settings.goal)
+        await uow.release()
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
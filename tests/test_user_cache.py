@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import unittest
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from db.models import Base, User
+from db.repo import RecipeRepository
+from db.user_cache import UserIdCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class UserIdCacheTests(unittest.TestCase):
+    def test_ttl_and_lru_eviction(self) -> None:
+        clock = _Clock()
+        cache = UserIdCache(max_size=2, ttl_seconds=10, clock=clock)
+        cache.put(1, 101, "a")
+        cache.put(2, 102, "b")
+        self.assertEqual(cache.get(1), 101)
+        cache.put(3, 103, "c")
+
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1, "a"), 101)
+        clock.now = 11
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.info(), {"hits": 2, "misses": 2, "size": 1, "max_size": 2})
+
+    def test_username_change_is_a_miss(self) -> None:
+        cache = UserIdCache(max_size=10, ttl_seconds=60)
+        cache.put(1, 101, "old")
+        self.assertIsNone(cache.get(1, "new"))
+        self.assertEqual(cache.get(1, None), 101)
+
+
+class EnsureUserIdTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.cache = UserIdCache(max_size=100, ttl_seconds=60)
+        self.statements: list[str] = []
+        event.listen(
+            self.engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: self.statements.append(statement),
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def _ensure(self, tg_user_id: int, username: str | None) -> int:
+        async with self.session_factory() as session:
+            user_id = await RecipeRepository(session, user_cache=self.cache).ensure_user_id(tg_user_id, username)
+            await session.commit()
+            return user_id
+
+    async def test_round_trips_only_on_miss_or_rename(self) -> None:
+        created = await self._ensure(7, "cook")
+        self.assertEqual(await self._ensure(7, "cook"), created)
+
+        self.statements.clear()
+        self.assertEqual(await self._ensure(7, "cook"), created)
+        self.assertEqual(await self._ensure(7, None), created)
+        self.assertEqual(self.statements, [])
+
+        self.assertEqual(await self._ensure(7, "chef"), created)
+        self.assertTrue(any(statement.startswith("UPDATE users") for statement in self.statements))
+        async with self.session_factory() as session:
+            self.assertEqual(await session.scalar(select(User.username).where(User.id == created)), "chef")
+
+    async def test_rolled_back_rename_is_not_cached(self) -> None:
+        created = await self._ensure(8, "cook")
+        await self._ensure(8, "cook")
+        async with self.session_factory() as session:
+            await RecipeRepository(session, user_cache=self.cache).ensure_user_id(8, "chef")
+            await session.rollback()
+
+        self.statements.clear()
+        self.assertEqual(await self._ensure(8, "chef"), created)
+        self.assertTrue(any(statement.startswith("UPDATE users") for statement in self.statements))
+
+        self.statements.clear()
+        self.assertEqual(await self._ensure(8, "chef"), created)
+        self.assertEqual(await self._ensure(8, "chef"), created)
+        self.assertEqual(len([s for s in self.statements if s.startswith("SELECT")]), 1)
+
+    async def test_upsert_keeps_one_row(self) -> None:
+        async with self.session_factory() as session:
+            repo = RecipeRepository(session, user_cache=self.cache)
+            first = await repo.ensure_user_id(9, "a")
+            # A second first-contact path, as a concurrent update would take.
+            await session.execute(repo._user_upsert(9, None))
+            await session.commit()
+            users = (await session.execute(select(User.id, User.username).where(User.tg_user_id == 9))).all()
+
+        self.assertEqual(users, [(first, "a")])
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()